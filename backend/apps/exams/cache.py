@@ -0,0 +1,189 @@
+"""
+Process-local caches for data that only changes on admin actions.
+
+Each gunicorn worker keeps its own copy. Invalidation across workers goes
+through a CacheVersion counter in the database: writers bump the counter in
+the same transaction as their change, and readers compare their cached version
+with the stored one at most once every CACHE_REVALIDATE_SECONDS. A change
+therefore reaches every worker within that delay, and requests in between
+don't touch the database at all.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db.models import F
+
+from .models import ActiveDataset, CacheVersion, HallSeating, HallTicketExam
+from .halls import hall_summary
+from .snapshots import dump_json
+
+ACTIVE_DATASET = 'active_dataset'
+HALL_TICKET_SCHEDULE = 'hall_ticket_schedule'
+
+_lock = threading.Lock()
+_versions = {}  # name -> (version, checked_at)
+_active_dataset = None  # (version, dataset or None)
+_department_semesters = OrderedDict()  # (department, version) -> semesters JSON, '' or None, LRU order
+_hall_summaries = None  # (version, dataset id, hall listing)
+
+
+def _revalidate_seconds():
+    return getattr(settings, 'CACHE_REVALIDATE_SECONDS', 2.0)
+
+
+def get_version(name):
+    """
+    Return the current version of a counter.
+    The database is consulted only when the local copy is older than the
+    revalidation interval.
+    """
+    now = time.monotonic()
+    cached = _versions.get(name)
+    if cached is not None and now - cached[1] < _revalidate_seconds():
+        return cached[0]
+
+    version = CacheVersion.objects.filter(name=name).values_list('version', flat=True).first() or 0
+    with _lock:
+        _versions[name] = (version, now)
+    return version
+
+
+def bump_version(name):
+    """
+    Increment a counter after the data it guards has changed.
+    Call inside the writer's transaction so the new version becomes visible
+    together with the change. The local copy is dropped immediately so this
+    worker never serves stale data.
+    """
+    updated = CacheVersion.objects.filter(name=name).update(version=F('version') + 1)
+    if not updated:
+        CacheVersion.objects.get_or_create(name=name, defaults={'version': 1})
+    with _lock:
+        _versions.pop(name, None)
+
+
+def get_active_dataset():
+    """
+    Return the active Dataset (or None) without querying it on every request.
+    """
+    global _active_dataset
+
+    version = get_version(ACTIVE_DATASET)
+    cached = _active_dataset
+    if cached is not None and cached[0] == version:
+        return cached[1]
+
+    pointer = ActiveDataset.objects.select_related('dataset').filter(id=ActiveDataset.SINGLETON_ID).first()
+    dataset = pointer.dataset if pointer else None
+    with _lock:
+        _active_dataset = (version, dataset)
+    return dataset
+
+
+def invalidate_active_dataset():
+    """
+    Signal every worker that the active dataset (or its students) changed.
+    """
+    global _active_dataset, _hall_summaries
+
+    bump_version(ACTIVE_DATASET)
+    with _lock:
+        _active_dataset = None
+        _hall_summaries = None
+
+
+def get_hall_summaries(dataset):
+    """
+    Return the hall listing (hall, date, session, block, floor, occupancy) of
+    a dataset, built from its seating maps once per active dataset version.
+    """
+    global _hall_summaries
+
+    version = get_version(ACTIVE_DATASET)
+    cached = _hall_summaries
+    if cached is not None and cached[:2] == (version, dataset.id):
+        return cached[2]
+
+    summaries = [
+        hall_summary(seating)
+        for seating in HallSeating.objects.filter(dataset=dataset).defer('seats_json')
+    ]
+    with _lock:
+        _hall_summaries = (version, dataset.id, summaries)
+    return summaries
+
+
+def _build_department_semesters(department):
+    """
+    Group a department's exams by semester, in the shape served by the
+    hall ticket endpoint. Returns an empty dict when there are no exams.
+    """
+    exams = (
+        HallTicketExam.objects.filter(department=department)
+        .order_by('semester', 'exam_date', 'session')
+        .values_list('semester', 'course_code', 'course_title', 'exam_date', 'session')
+    )
+
+    semesters_data = {}
+    for sem, course_code, course_title, exam_date, session in exams:
+        semesters_data.setdefault(sem, []).append({
+            'course_code': course_code,
+            'course_title': course_title,
+            'exam_date': exam_date.strftime('%d-%m-%Y'),
+            'session': session
+        })
+    return semesters_data
+
+
+def get_department_semesters_json(department):
+    """
+    Return the semester-grouped exam schedule for a department, serialized
+    as JSON: '' when the department has no exams, None when no schedule is
+    loaded at all.
+    The payload is identical for every student of the department, so it is
+    built and serialized once per schedule version and kept in a bounded LRU.
+    Empty results are cached too; loading the schedule bumps its version, so
+    they are dropped as soon as it changes.
+    """
+    key = (department, get_version(HALL_TICKET_SCHEDULE))
+    with _lock:
+        if key in _department_semesters:
+            _department_semesters.move_to_end(key)
+            return _department_semesters[key]
+
+    semesters_data = _build_department_semesters(department)
+    if semesters_data:
+        semesters_data = dump_json(semesters_data)
+    else:
+        semesters_data = '' if HallTicketExam.objects.exists() else None
+    with _lock:
+        _department_semesters[key] = semesters_data
+        _department_semesters.move_to_end(key)
+        while len(_department_semesters) > getattr(settings, 'HALL_TICKET_CACHE_SIZE', 32):
+            _department_semesters.popitem(last=False)
+    return semesters_data
+
+
+def invalidate_hall_ticket_schedule():
+    """
+    Signal every worker that the hall ticket schedule was reloaded.
+    """
+    bump_version(HALL_TICKET_SCHEDULE)
+    with _lock:
+        _department_semesters.clear()
+
+
+def clear_local_caches():
+    """
+    Forget everything cached in this process, as if it had just started.
+    Used by tests, which run many database states in one process.
+    """
+    global _active_dataset, _hall_summaries
+
+    with _lock:
+        _versions.clear()
+        _active_dataset = None
+        _department_semesters.clear()
+        _hall_summaries = None
@@ -0,0 +1,331 @@
+"""
+Columnar snapshots of datasets' normalized students.
+
+Next to each dataset's uploaded file (datasets/<name>.xlsx) ingest writes a
+directory datasets/<name>.columns/ holding one NumPy .npy file per column
+plus a manifest. Text columns are dictionary-encoded (int32 codes into an
+array of distinct values), exam dates are datetime64[D] and the hall/seat
+integers int64 with a sentinel for "not a number", so every file can be
+memory-mapped and a dataset's students are back as the DataFrame
+normalize_student_frame() returns in milliseconds, without re-running the
+Excel parsers.
+
+A snapshot mirrors the stored students: it is rewritten when a delta changes
+them and removed with the dataset. Its manifest records the dataset revision
+it was written at; readers ignore a snapshot whose revision is not the
+dataset's current one, and a failed rewrite removes the old snapshot rather
+than leaving it behind. Storage backends without local paths get no
+snapshot, and readers fall back to the database or the original file.
+"""
+import heapq
+import itertools
+import json
+import logging
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from .models import Student
+from .utils import DERIVED_STUDENT_FIELDS, STUDENT_FIELDS
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 1
+MANIFEST = 'manifest.json'
+SUFFIX = '.columns'
+
+COLUMNS = STUDENT_FIELDS + DERIVED_STUDENT_FIELDS
+DATE_FIELDS = ['exam_date']
+INTEGER_FIELDS = ['hall_no_int', 'seat_no_int']
+TEXT_FIELDS = [field for field in COLUMNS if field not in DATE_FIELDS + INTEGER_FIELDS]
+MISSING_INTEGER = np.iinfo(np.int64).min  # Never a valid IntegerField value
+
+
+def snapshot_path(dataset):
+    """
+    Directory of a dataset's column snapshot, or None if its file has no
+    local path.
+    """
+    if not dataset.file:
+        return None
+    try:
+        path = dataset.file.path
+    except NotImplementedError:
+        return None
+    return os.path.splitext(path)[0] + SUFFIX
+
+
+class ColumnSnapshotWriter:
+    """
+    Collect normalized student frames chunk by chunk and write them as a
+    column snapshot. Each chunk is spilled to a temporary directory as it
+    comes (text columns as sorted distinct values and codes into them), and
+    write() merges the chunks' values in one streaming pass over the files,
+    so memory stays flat however many rows are collected. close() removes
+    the spilled chunks. A chunk that cannot be spilled never fails the
+    caller: collecting stops and write() raises the error instead.
+    """
+    def __init__(self):
+        self.rows = 0
+        self.chunks = []  # rows per spilled chunk
+        self.spill = None
+        self.error = None
+        try:
+            self.spill = tempfile.TemporaryDirectory(prefix='columns-')
+        except OSError as e:
+            self.error = e
+
+    def _spill_path(self, chunk, name):
+        return os.path.join(self.spill.name, f'{chunk}.{name}.npy')
+
+    def append(self, students):
+        if self.error is not None:
+            return
+        try:
+            self._spill(len(self.chunks), students)
+        except OSError as e:
+            self.error = e
+            self.close()
+            return
+        self.chunks.append(len(students))
+        self.rows += len(students)
+
+    def _spill(self, chunk, students):
+        for field in TEXT_FIELDS:
+            column = np.asarray(students[field].to_numpy(dtype=object), dtype=str)
+            values, codes = np.unique(column, return_inverse=True)
+            np.save(self._spill_path(chunk, f'{field}.values'), values, allow_pickle=False)
+            np.save(self._spill_path(chunk, f'{field}.codes'), codes.astype(np.int32), allow_pickle=False)
+        for field in DATE_FIELDS:
+            np.save(self._spill_path(chunk, field),
+                    np.array(students[field].tolist(), dtype='datetime64[D]'), allow_pickle=False)
+        for field in INTEGER_FIELDS:
+            column = students[field].to_numpy(dtype=object)
+            np.save(self._spill_path(chunk, field),
+                    np.where(pd.isna(column), MISSING_INTEGER, column).astype(np.int64), allow_pickle=False)
+
+    def close(self):
+        if self.spill is not None:
+            self.spill.cleanup()
+
+    def _load(self, chunk, name):
+        return np.load(self._spill_path(chunk, name), mmap_mode='r', allow_pickle=False)
+
+    def _write_text(self, directory, field):
+        """
+        Merge the chunks' sorted distinct values into the column's values
+        file, mapping each chunk's codes to codes into it.
+        """
+        chunk_values = [self._load(chunk, f'{field}.values') for chunk in range(len(self.chunks))]
+        # '<U1' at least so empty columns load
+        width = max([values.dtype.itemsize // 4 for values in chunk_values] + [1])
+        merged = np.lib.format.open_memmap(self._spill_path('merged', field), mode='w+', dtype=f'<U{width}',
+                                           shape=(max(sum(map(len, chunk_values)), 1),))
+        lookups = [
+            np.lib.format.open_memmap(self._spill_path(chunk, f'{field}.lookup'), mode='w+', dtype=np.int32,
+                                      shape=(len(values),))
+            for chunk, values in enumerate(chunk_values)
+        ]
+        distinct, last = 0, None
+        for value, chunk, index in heapq.merge(*(
+            zip(_iterate(values), itertools.repeat(chunk), itertools.count())
+            for chunk, values in enumerate(chunk_values)
+        )):
+            if value != last:
+                merged[distinct] = last = value
+                distinct += 1
+            lookups[chunk][index] = distinct - 1
+        np.save(os.path.join(directory, f'{field}.values.npy'), merged[:max(distinct, 1)], allow_pickle=False)
+
+        codes = np.lib.format.open_memmap(os.path.join(directory, f'{field}.codes.npy'), mode='w+',
+                                          dtype=np.int32, shape=(self.rows,))
+        offset = 0
+        for chunk, rows in enumerate(self.chunks):
+            codes[offset:offset + rows] = lookups[chunk][self._load(chunk, f'{field}.codes')]
+            offset += rows
+        codes.flush()
+
+    def _write_array(self, directory, field, dtype):
+        column = np.lib.format.open_memmap(os.path.join(directory, f'{field}.npy'), mode='w+', dtype=dtype,
+                                           shape=(self.rows,))
+        offset = 0
+        for chunk, rows in enumerate(self.chunks):
+            column[offset:offset + rows] = self._load(chunk, field)
+            offset += rows
+        column.flush()
+
+    def _write_columns(self, directory):
+        for field in TEXT_FIELDS:
+            self._write_text(directory, field)
+        for field in DATE_FIELDS:
+            self._write_array(directory, field, 'datetime64[D]')
+        for field in INTEGER_FIELDS:
+            self._write_array(directory, field, np.int64)
+
+    def write(self, directory, content_hash='', revision=0):
+        """
+        Write the snapshot of dataset revision `revision` to `directory`,
+        replacing any previous one only once the new one is complete. Each
+        write builds in a directory of its own, and a snapshot of a newer
+        revision already in place is kept. Returns True if it was written.
+        """
+        if self.error is not None:
+            raise self.error
+        parent, base = os.path.split(directory)
+        os.makedirs(parent, exist_ok=True)
+        temporary = tempfile.mkdtemp(prefix=f'{base}.', suffix='.tmp', dir=parent)
+        try:
+            self._write_columns(temporary)
+            with open(os.path.join(temporary, MANIFEST), 'w') as f:
+                json.dump({
+                    'version': FORMAT_VERSION,
+                    'rows': self.rows,
+                    'columns': COLUMNS,
+                    'content_hash': content_hash,
+                    'revision': revision,
+                }, f)
+            current = _read_manifest_file(directory)
+            if current is not None and current.get('revision', 0) > revision:
+                # A later change was written first
+                return False
+            shutil.rmtree(directory, ignore_errors=True)
+            os.replace(temporary, directory)
+        finally:
+            shutil.rmtree(temporary, ignore_errors=True)
+        return True
+
+
+def _iterate(array, block=4096):
+    # Elements as Python objects, reading a memory-mapped array a block at a time
+    for start in range(0, len(array), block):
+        yield from array[start:start + block].tolist()
+
+
+def write_column_snapshot(dataset, writer):
+    """
+    Write a filled ColumnSnapshotWriter as the dataset's snapshot at its
+    current revision, then close the writer. Failures are logged, not raised: the snapshot is only
+    an accelerator, and the previous one is removed so nothing reads it.
+    Returns True if it was written.
+    """
+    directory = snapshot_path(dataset)
+    if directory is None:
+        return False
+    try:
+        return writer.write(directory, dataset.content_hash, dataset.revision)
+    except (OSError, ValueError):
+        logger.exception('Could not write the column snapshot of dataset %s', dataset.id)
+        delete_column_snapshot(dataset)
+        return False
+    finally:
+        writer.close()
+
+
+def build_column_snapshot(dataset, batch_size=5000):
+    """
+    (Re)write a dataset's snapshot from its stored students, e.g. after a
+    delta or for datasets imported before snapshots existed.
+    Returns True if it was written.
+    """
+    writer = ColumnSnapshotWriter()
+    rows = (
+        Student.objects.filter(dataset=dataset).order_by('pk')
+        .values_list(*COLUMNS).iterator(chunk_size=batch_size)
+    )
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            writer.append(pd.DataFrame(batch, columns=COLUMNS))
+            batch = []
+    if batch or not writer.rows:
+        writer.append(pd.DataFrame(batch, columns=COLUMNS))
+    return write_column_snapshot(dataset, writer)
+
+
+def _read_manifest_file(directory):
+    try:
+        with open(os.path.join(directory, MANIFEST)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def read_manifest(dataset):
+    """
+    Manifest of a dataset's snapshot, or None if it has no usable one:
+    missing, of another format, or written at another revision than the
+    dataset's (`dataset` should be fresh from the database).
+    """
+    directory = snapshot_path(dataset)
+    if directory is None:
+        return None
+    manifest = _read_manifest_file(directory)
+    if manifest is None:
+        return None
+    if manifest.get('version') != FORMAT_VERSION or manifest.get('columns') != COLUMNS:
+        return None
+    # Snapshots from before revisions were recorded describe revision 0
+    if manifest.get('revision', 0) != dataset.revision:
+        return None
+    return manifest
+
+
+def load_columns(dataset, fields=None, mmap=True):
+    """
+    Raw column arrays of a dataset's snapshot (memory-mapped by default):
+    text fields as (codes, values) pairs, the others as arrays. Returns
+    None if the dataset has no usable snapshot.
+    """
+    if read_manifest(dataset) is None:
+        return None
+    directory = snapshot_path(dataset)
+    mode = 'r' if mmap else None
+
+    def load(name):
+        return np.load(os.path.join(directory, f'{name}.npy'), mmap_mode=mode, allow_pickle=False)
+
+    columns = {}
+    try:
+        for field in fields or COLUMNS:
+            if field in TEXT_FIELDS:
+                columns[field] = (load(f'{field}.codes'), load(f'{field}.values'))
+            else:
+                columns[field] = load(field)
+    except (OSError, ValueError):
+        return None
+    return columns
+
+
+def load_student_frame(dataset):
+    """
+    The dataset's students as normalize_student_frame() returns them (text
+    as str, exam_date as datetime.date or None, hall/seat integers as int or
+    None), or None if the dataset has no usable snapshot.
+    """
+    columns = load_columns(dataset)
+    if columns is None:
+        return None
+    data = {}
+    for field in COLUMNS:
+        if field in TEXT_FIELDS:
+            codes, values = columns[field]
+            data[field] = values.astype(object)[codes]
+        elif field in DATE_FIELDS:
+            data[field] = columns[field].astype(object)
+        else:
+            integers = columns[field]
+            data[field] = np.where(integers == MISSING_INTEGER, None, integers.astype(object))
+    return pd.DataFrame(data, columns=COLUMNS)
+
+
+def delete_column_snapshot(dataset):
+    """
+    Remove a dataset's snapshot, if any.
+    """
+    directory = snapshot_path(dataset)
+    if directory:
+        shutil.rmtree(directory, ignore_errors=True)
@@ -0,0 +1,96 @@
+"""
+Consistency report of a stored dataset.
+
+Compares a dataset's students with everything derived from them (summary
+stats, snapshots, seating maps, column snapshot, hall ticket schedule) and
+counts rows the parsers could not make sense of. Every check is an aggregate
+query, so a report on a large dataset reads counts, not rows.
+"""
+from django.db.models import Count, Q, Sum
+
+from .columnar import read_manifest
+from .models import DatasetStats, HallSeating, HallTicketExam, Student, StudentSnapshot
+
+# (name, description, filter) of the student rows reported as warnings
+SUSPECT_ROWS = [
+    ('missing_exam_date', 'without an exam date', Q(exam_date__isnull=True)),
+    ('missing_department', 'whose register number matches no department', Q(department='')),
+    ('missing_hall', 'without a hall', Q(hall_no='')),
+    ('non_numeric_hall', 'with a non-numeric hall number', ~Q(hall_no='') & Q(hall_no_int__isnull=True)),
+    ('non_numeric_seat', 'with a non-numeric seat number', ~Q(seat_no='') & Q(seat_no_int__isnull=True)),
+]
+
+
+def check_dataset(dataset, sample_limit=0):
+    """
+    Report on one dataset. Returns a dict of:
+      counts:   students, seated students, halls and the derived row counts
+      problems: derived data that disagrees with the students
+      warnings: students the sheet left incomplete, and departments with
+                no hall ticket schedule
+      samples:  up to sample_limit register numbers per warning
+    """
+    students = Student.objects.filter(dataset=dataset)
+    counts = students.aggregate(
+        students=Count('id'),
+        seated=Count('id', filter=~Q(hall_no='')),
+        halls=Count('hall_no', distinct=True, filter=~Q(hall_no='')),
+        **{name: Count('id', filter=condition) for name, _, condition in SUSPECT_ROWS},
+    )
+    problems, warnings, samples = [], [], {}
+
+    stats = DatasetStats.objects.filter(dataset=dataset).first()
+    if stats is None:
+        problems.append('No summary stats')
+    else:
+        if stats.distinct_students != counts['students']:
+            problems.append(f"Stats count {stats.distinct_students} students, {counts['students']} are stored")
+        if stats.distinct_halls != counts['halls']:
+            problems.append(f"Stats count {stats.distinct_halls} halls, {counts['halls']} are stored")
+
+    # Snapshots and seating maps are built on activation; none yet is fine
+    counts['snapshots'] = StudentSnapshot.objects.filter(dataset=dataset).count()
+    if counts['snapshots'] and counts['snapshots'] != counts['students']:
+        problems.append(f"{counts['snapshots']} student snapshots for {counts['students']} students")
+
+    seating = HallSeating.objects.filter(dataset=dataset).aggregate(halls=Count('id'), seated=Sum('occupancy'))
+    counts['seating_maps'] = seating['halls']
+    if seating['halls'] and seating['seated'] != counts['seated']:
+        problems.append(f"Seating maps seat {seating['seated']} students, {counts['seated']} have a hall")
+
+    manifest = read_manifest(dataset)
+    counts['column_snapshot_rows'] = manifest['rows'] if manifest else None
+    if manifest and manifest['rows'] != counts['students']:
+        problems.append(f"Column snapshot has {manifest['rows']} rows for {counts['students']} students")
+
+    for name, description, condition in SUSPECT_ROWS:
+        if counts[name]:
+            warnings.append(f'{counts[name]} students {description}')
+            if sample_limit:
+                samples[name] = list(students.filter(condition).order_by('register_no')
+                                     .values_list('register_no', flat=True)[:sample_limit])
+
+    clashes = (
+        students.exclude(hall_no='').exclude(seat_no='')
+        .values('exam_date', 'session', 'hall_no', 'seat_no')
+        .annotate(students=Count('id')).filter(students__gt=1)
+        .order_by('exam_date', 'session', 'hall_no', 'seat_no')
+    )
+    counts['seat_clashes'] = clashes.count()
+    if counts['seat_clashes']:
+        warnings.append(f"{counts['seat_clashes']} seats are given to more than one student")
+        if sample_limit:
+            samples['seat_clashes'] = [
+                f"{clash['exam_date']} {clash['session']} hall {clash['hall_no']} seat {clash['seat_no']}"
+                for clash in clashes[:sample_limit]
+            ]
+
+    scheduled = set(HallTicketExam.objects.values_list('department', flat=True).distinct())
+    unscheduled = (
+        students.exclude(department='').exclude(department__in=scheduled)
+        .values('department').annotate(students=Count('id')).order_by('department')
+    )
+    for row in unscheduled:
+        warnings.append(f"{row['students']} {row['department']} students have no hall ticket schedule")
+
+    return {'counts': counts, 'problems': problems, 'warnings': warnings, 'samples': samples}
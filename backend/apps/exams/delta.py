@@ -0,0 +1,273 @@
+"""
+Incremental (delta) imports into an existing dataset.
+
+A corrected sheet is compared with the stored students by register number
+(unique per dataset) and only the difference is written: new students are
+inserted, changed rows updated and, unless the sheet is partial, students
+missing from it deleted. Snapshots and seating maps are rebuilt only for the
+students and halls that changed, so fixing a few hundred seats doesn't
+rewrite the whole dataset or its derived tables. Reloads (re-parsing a
+dataset's own file after a parser fix) go through the same path.
+"""
+import logging
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Max, Min, Q
+
+from .cache import invalidate_active_dataset
+from .halls import refresh_hall_seatings
+from .columnar import build_column_snapshot, load_student_frame
+from .ingest import build_students, bulk_upsert, read_student_sheet
+from .instrumentation import StageTimer
+from .models import Dataset, DatasetStats, Student
+from .snapshots import refresh_student_snapshots
+from .uploads import file_hash
+from .utils import STUDENT_FIELDS, DERIVED_STUDENT_FIELDS, normalize_student_frame
+
+logger = logging.getLogger(__name__)
+
+# Everything stored from the sheet except the register number (the key)
+COMPARED_FIELDS = STUDENT_FIELDS[1:] + DERIVED_STUDENT_FIELDS
+EXAM_DATE, SESSION, HALL_NO = (COMPARED_FIELDS.index(field) for field in ('exam_date', 'session', 'hall_no'))
+
+
+def _hall_key(values):
+    return values[EXAM_DATE], values[SESSION], values[HALL_NO]
+
+
+def diff_students(dataset, students, remove_missing=True, batch_size=None):
+    """
+    Compare a normalized student frame with the stored students of a
+    dataset. Returns a dict of:
+      added:   register numbers only in the sheet
+      updated: {register_no: (student id, old values, new values)}
+      removed: {register_no: (student id, old values)} (empty unless remove_missing)
+      unchanged: number of identical students
+    Values are tuples in COMPARED_FIELDS order.
+    """
+    batch_size = batch_size or settings.STUDENT_INSERT_BATCH_SIZE
+    incoming = dict(zip(
+        students['register_no'].tolist(),
+        zip(*(students[field].tolist() for field in COMPARED_FIELDS))
+    ))
+
+    updated, removed = {}, {}
+    unchanged = 0
+    stored = (
+        Student.objects.filter(dataset=dataset)
+        .values_list('id', 'register_no', *COMPARED_FIELDS)
+        .iterator(chunk_size=batch_size)
+    )
+    seen = set()
+    for pk, register_no, *old in stored:
+        old = tuple(old)
+        seen.add(register_no)
+        new = incoming.get(register_no)
+        if new is None:
+            if remove_missing:
+                removed[register_no] = (pk, old)
+        elif new != old:
+            updated[register_no] = (pk, old, new)
+        else:
+            unchanged += 1
+
+    added = [register_no for register_no in incoming if register_no not in seen]
+    return {'added': added, 'updated': updated, 'removed': removed, 'unchanged': unchanged}
+
+
+def _refresh_stats(dataset, rows_read, parse_seconds):
+    """
+    Recompute a dataset's summary from its stored students (one aggregate).
+    """
+    summary = Student.objects.filter(dataset=dataset).aggregate(
+        students=Count('id'),
+        halls=Count('hall_no', distinct=True, filter=~Q(hall_no='')),
+        first_exam_date=Min('exam_date'),
+        last_exam_date=Max('exam_date'),
+    )
+    DatasetStats.objects.update_or_create(dataset=dataset, defaults={
+        'row_count': rows_read,
+        'distinct_students': summary['students'],
+        'distinct_halls': summary['halls'],
+        'first_exam_date': summary['first_exam_date'],
+        'last_exam_date': summary['last_exam_date'],
+        'parse_seconds': round(parse_seconds, 3),
+    })
+
+
+def apply_student_delta(dataset, file_obj, remove_missing=True, dry_run=False,
+                        content_hash='', batch_size=None, sample_limit=50):
+    """
+    Bring `dataset` in line with a corrected student sheet, writing only
+    what differs. With remove_missing=False the sheet is a partial patch and
+    students absent from it are kept. With dry_run nothing is written.
+
+    A full sheet's content_hash is recorded on the dataset, whose contents it
+    now matches; a partial one clears it. See apply_student_frame() for how
+    the changes are written and what is returned. A sheet that can't be
+    parsed raises ValueError, whatever the spreadsheet library raised.
+    """
+    timer = StageTimer()
+    with timer.span('parse'):
+        try:
+            students, rows_read, duplicates = read_student_sheet(file_obj)
+        except ValueError:
+            raise
+        except Exception as e:
+            # Corrupt workbooks fail deep inside openpyxl/xlrd with their own errors
+            raise ValueError(f'Could not parse file: {e}') from e
+    return apply_student_frame(dataset, students, rows_read, duplicates, remove_missing, dry_run,
+                               content_hash, batch_size, sample_limit, timer)
+
+
+def _write_students(dataset, students, added, updated, batch_size):
+    """
+    Insert the added and overwrite the updated students of a normalized
+    frame, building at most batch_size Student objects at a time. Both go
+    through one upsert on (dataset, register_no) where the database has one.
+    """
+    register_nos = set(added) | set(updated)
+    changed = students[students['register_no'].isin(register_nos)]
+    for start in range(0, len(changed), batch_size):
+        batch = build_students(dataset, changed.iloc[start:start + batch_size])
+        if bulk_upsert(Student, batch, ['dataset', 'register_no'], COMPARED_FIELDS, batch_size):
+            continue
+        new = []
+        for student in batch:
+            if student.register_no in updated:
+                student.pk = updated[student.register_no][0]
+            else:
+                new.append(student)
+        Student.objects.bulk_update([student for student in batch if student.pk], COMPARED_FIELDS,
+                                    batch_size=batch_size)
+        Student.objects.bulk_create(new, batch_size=batch_size)
+
+
+def apply_student_frame(dataset, students, rows_read, duplicates=None, remove_missing=True,
+                        dry_run=False, content_hash='', batch_size=None, sample_limit=50, timer=None):
+    """
+    Bring `dataset` in line with a normalized, de-duplicated student frame
+    (as read_student_sheet() returns it), writing only what differs.
+
+    All writes (students, stats, snapshots, seating maps) happen in one
+    transaction, under a row lock on the dataset so concurrent deltas and
+    activations queue, and any change bumps the dataset's revision. The
+    active dataset's caches are invalidated only when something changed,
+    and the dataset's column snapshot is rewritten after the commit. Pass
+    a StageTimer to have the stages timed into it.
+
+    Returns a change summary: counts of added, updated, removed and
+    unchanged students, the first `sample_limit` register numbers of each
+    change and the duplicate rows dropped from the sheet.
+    """
+    batch_size = batch_size or settings.STUDENT_INSERT_BATCH_SIZE
+    timer = timer or StageTimer()
+
+    with transaction.atomic():
+        dataset = Dataset.objects.select_for_update().get(pk=dataset.pk)
+        with timer.span('diff'):
+            diff = diff_students(dataset, students, remove_missing, batch_size)
+        added, updated, removed = diff['added'], diff['updated'], diff['removed']
+
+        if not dry_run:
+            with timer.span('write'):
+                removed_ids = [pk for pk, _ in removed.values()]
+                for start in range(0, len(removed_ids), batch_size):
+                    Student.objects.filter(pk__in=removed_ids[start:start + batch_size]).delete()
+                _write_students(dataset, students, added, updated, batch_size)
+
+            with timer.span('refresh'):
+                if added or updated or removed:
+                    # Snapshots and seating maps that were current are patched;
+                    # stale ones are rebuilt whole at the next activation
+                    current = dataset.snapshots_revision == dataset.revision
+                    dataset.revision += 1
+                    if current:
+                        halls = {_hall_key(old) for _, old in removed.values()}
+                        for _, old, new in updated.values():
+                            halls.update((_hall_key(old), _hall_key(new)))
+                        new_students = students[students['register_no'].isin(set(added))]
+                        halls.update(_hall_key(values) for values in
+                                     zip(*(new_students[field].tolist() for field in COMPARED_FIELDS)))
+                        refresh_student_snapshots(dataset, [*added, *updated, *removed], batch_size)
+                        refresh_hall_seatings(dataset, halls)
+                        dataset.snapshots_revision = dataset.revision
+                _refresh_stats(dataset, rows_read, timer.total('parse', 'normalize'))
+
+                dataset.content_hash = content_hash if remove_missing else ''
+                dataset.save(update_fields=['content_hash', 'revision', 'snapshots_revision'])
+                if dataset.is_active and (added or updated or removed):
+                    invalidate_active_dataset()
+
+    if not dry_run and (added or updated or removed):
+        with timer.span('columns'):
+            build_column_snapshot(dataset)
+
+    timer.log(logger, logging.INFO, '%s dataset %s: %d added, %d updated, %d removed, %d unchanged',
+              'Checked delta for' if dry_run else 'Applied delta to', dataset.id,
+              len(added), len(updated), len(removed), diff['unchanged'])
+    return {
+        'dataset_id': dataset.id,
+        'dry_run': dry_run,
+        'added': len(added),
+        'updated': len(updated),
+        'removed': len(removed),
+        'unchanged': diff['unchanged'],
+        'register_nos': {
+            'added': added[:sample_limit],
+            'updated': list(updated)[:sample_limit],
+            'removed': list(removed)[:sample_limit],
+        },
+        'duplicates': duplicates or {'count': 0, 'register_nos': []},
+    }
+
+
+def reload_students(dataset, source='file', dry_run=False, force=False, batch_size=None, sample_limit=50,
+                    timer=None):
+    """
+    Re-run the current parsers and normalization over a dataset and write
+    only the students whose stored values come out different, e.g. after a
+    fix to date parsing or department detection.
+
+    source='file' re-parses the uploaded file; source='snapshot' starts from
+    the column snapshot instead, which takes milliseconds but only refreshes
+    what is derived from the stored text (hall/seat numbers, departments).
+    Raises FileNotFoundError if the chosen source is missing, or the
+    snapshot was written at another revision than the dataset's.
+
+    The uploaded file no longer describes a dataset a delta has changed, and
+    reloading it would undo the delta: source='file' raises ValueError then
+    unless `force` is passed, and a forced reload records the file's hash.
+
+    Returns the change summary of apply_student_frame().
+    """
+    timer = timer or StageTimer()
+    with timer.span('parse'):
+        if source == 'snapshot':
+            students = load_student_frame(dataset)
+            if students is None:
+                raise FileNotFoundError(f'Dataset {dataset.id} has no up-to-date column snapshot')
+            duplicates = None
+        else:
+            with dataset.file.open('rb') as f:
+                content_hash = file_hash(f)
+                if dataset.revision and dataset.content_hash != content_hash and not force:
+                    raise ValueError(
+                        f'Dataset {dataset.id} was changed by a delta after its upload; reloading its '
+                        'file would undo the delta (reload the snapshot, or force it to go back to the file)'
+                    )
+                students, rows_read, duplicates = read_student_sheet(f)
+    if source == 'snapshot':
+        with timer.span('normalize'):
+            students = normalize_student_frame(students[STUDENT_FIELDS])
+        # The snapshot holds no duplicates; keep the sheet's row count
+        rows_read = (
+            DatasetStats.objects.filter(dataset=dataset).values_list('row_count', flat=True).first()
+            or len(students)
+        )
+        # The stored students are unchanged, so their hash still describes them
+        content_hash = dataset.content_hash
+    return apply_student_frame(dataset, students, rows_read, duplicates, dry_run=dry_run,
+                               content_hash=content_hash, batch_size=batch_size,
+                               sample_limit=sample_limit, timer=timer)
@@ -0,0 +1,179 @@
+"""
+Hall seating maps: who sits where in each exam hall, per date and session.
+
+Activating a dataset materializes one HallSeating row per hall, date and
+session (with block and floor resolved from the hall number), so the hall
+endpoints read a handful of rows instead of grouping Student on each request.
+"""
+from itertools import groupby
+
+from django.conf import settings
+from django.db import transaction
+
+from .models import HallSeating, Student
+from .snapshots import dump_json
+
+ACADEMIC_BLOCK = 'Academic Block'
+INNOVATION_BLOCK = 'Innovation Block (IT Tower)'
+UNKNOWN = 'Unknown'
+
+# Hall number range of each floor, per block
+FLOORS = {
+    ACADEMIC_BLOCK: [
+        (100, 199, 'Ground Floor'),
+        (200, 299, 'First Floor'),
+        (300, 399, 'Second Floor'),
+        (400, 499, 'Third Floor'),
+        (500, 599, 'Fourth Floor'),
+        (600, 699, 'Fifth Floor'),
+    ],
+    INNOVATION_BLOCK: [
+        (1000, 1999, 'First Floor'),
+        (2000, 2999, 'Second Floor'),
+        (3000, 3999, 'Third Floor'),
+        (4000, 4999, 'Fourth Floor'),
+        (5000, 5999, 'Fifth Floor'),
+    ],
+}
+
+
+def get_block_from_hall_no(hall_no):
+    """
+    Block of a hall from its number.
+    3-digit numbers (100-999) are in the Academic Block, 4+ digit numbers
+    (1000+) in the Innovation Block (IT Tower).
+    """
+    if hall_no is None:
+        return UNKNOWN
+    if 100 <= hall_no <= 999:
+        return ACADEMIC_BLOCK
+    if hall_no >= 1000:
+        return INNOVATION_BLOCK
+    return UNKNOWN
+
+
+def get_floor_from_hall_no(hall_no, block):
+    """
+    Floor of a hall: the hundreds series in the Academic Block (1xx ground,
+    2xx first, ... 6xx fifth) and the thousands series in the Innovation
+    Block (1xxx first ... 5xxx fifth), as the student hall seating page
+    shows them.
+    """
+    for first, last, floor in FLOORS.get(block, []):
+        if first <= hall_no <= last:
+            return floor
+    return UNKNOWN
+
+
+def _hall_seating(dataset, key, rows):
+    """
+    HallSeating for the students of one hall, date and session.
+    """
+    exam_date, session, hall_no, hall_no_int = key
+    seats = [
+        {
+            'seat_no': seat_no,
+            'register_no': register_no,
+            'name': name,
+            'department': department or None,
+            'course_code': course_code,
+        }
+        for _, _, _, _, seat_no, register_no, name, department, course_code in rows
+    ]
+    block = get_block_from_hall_no(hall_no_int)
+    return HallSeating(
+        dataset=dataset,
+        exam_date=exam_date,
+        session=session,
+        hall_no=hall_no,
+        block=block,
+        floor=get_floor_from_hall_no(hall_no_int, block),
+        occupancy=len(seats),
+        seats_json=dump_json(seats),
+    )
+
+
+def _seating_rows(students):
+    """
+    Seat rows of students with a hall, grouped (by ordering) per date,
+    session and hall and ordered by seat within each.
+    """
+    return (
+        students.exclude(hall_no='')
+        .order_by('exam_date', 'session', 'hall_no_int', 'hall_no', 'seat_no_int', 'seat_no')
+        .values_list('exam_date', 'session', 'hall_no', 'hall_no_int', 'seat_no',
+                     'register_no', 'name', 'department', 'course_code')
+    )
+
+
+def build_hall_seatings(dataset, batch_size=None):
+    """
+    Materialize the seating maps of a dataset from one ordered pass over its
+    students, replacing any built before. Returns the number of halls (per
+    date and session) created.
+    """
+    batch_size = batch_size or settings.STUDENT_INSERT_BATCH_SIZE
+
+    students = _seating_rows(Student.objects.filter(dataset=dataset))
+
+    created = 0
+    batch = []
+    with transaction.atomic():
+        HallSeating.objects.filter(dataset=dataset).delete()
+        for key, rows in groupby(students.iterator(chunk_size=batch_size), key=lambda row: row[:4]):
+            batch.append(_hall_seating(dataset, key, rows))
+            if len(batch) >= batch_size:
+                HallSeating.objects.bulk_create(batch)
+                created += len(batch)
+                batch = []
+        if batch:
+            HallSeating.objects.bulk_create(batch)
+            created += len(batch)
+    return created
+
+
+def refresh_hall_seatings(dataset, keys):
+    """
+    Rebuild the seating maps of some halls of a dataset after students were
+    added, moved or removed. `keys` are (exam_date, session, hall_no) tuples;
+    halls left without students are dropped. Does nothing for datasets
+    without seating maps (built at activation). Returns the number of halls
+    written.
+    """
+    keys = {key for key in keys if key[2]}
+    if not keys or not HallSeating.objects.filter(dataset=dataset).exists():
+        return 0
+
+    hall_nos = {hall_no for _, _, hall_no in keys}
+    with transaction.atomic():
+        # Fetch by hall number (few values) and match the exact keys here
+        stale = [
+            pk for pk, *key in
+            HallSeating.objects.filter(dataset=dataset, hall_no__in=hall_nos)
+            .values_list('pk', 'exam_date', 'session', 'hall_no')
+            if tuple(key) in keys
+        ]
+        HallSeating.objects.filter(pk__in=stale).delete()
+
+        students = _seating_rows(Student.objects.filter(dataset=dataset, hall_no__in=hall_nos))
+        seatings = [
+            _hall_seating(dataset, key, rows)
+            for key, rows in groupby(students, key=lambda row: row[:4])
+            if key[:3] in keys
+        ]
+        HallSeating.objects.bulk_create(seatings)
+    return len(seatings)
+
+
+def hall_summary(seating):
+    """
+    Hall listing entry (everything but the seat grid).
+    """
+    return {
+        'hall_no': seating.hall_no,
+        'exam_date': seating.exam_date.strftime('%Y-%m-%d') if seating.exam_date else None,
+        'session': seating.session,
+        'block': seating.block,
+        'floor': seating.floor,
+        'occupancy': seating.occupancy,
+    }
@@ -0,0 +1,290 @@
+"""
+Loading of source spreadsheets into the database.
+
+These functions run from management commands and deploy scripts, never from
+the student request path.
+"""
+import logging
+import os
+
+import pandas as pd
+
+from django.conf import settings
+from django.db import connections, router, transaction
+
+from .cache import HALL_TICKET_SCHEDULE, invalidate_hall_ticket_schedule
+from .columnar import ColumnSnapshotWriter, load_student_frame, write_column_snapshot
+from .instrumentation import StageTimer, WarningLimiter
+from .models import CacheVersion, DatasetStats, HallTicketExam, Student
+from .utils import (
+    parse_hall_ticket_excel, iter_student_chunks, normalize_student_frame,
+    drop_duplicate_register_numbers, STUDENT_FIELDS, DERIVED_STUDENT_FIELDS
+)
+
+logger = logging.getLogger(__name__)
+
+# A schedule exam is identified by its key; the other fields are updated
+SCHEDULE_KEY = ['department', 'semester', 'course_code']
+SCHEDULE_FIELDS = ['course_title', 'exam_date', 'session']
+
+
+def build_students(dataset, students):
+    """
+    Create (unsaved) Student objects from a normalized student frame,
+    reading whole column lists rather than one Series per row.
+    """
+    return [
+        Student(
+            dataset=dataset,
+            register_no=register_no,
+            name=name,
+            course_code=course_code,
+            course_title=course_title,
+            exam_date=exam_date,
+            session=session,
+            hall_no=hall_no,
+            seat_no=seat_no,
+            hall_no_int=hall_no_int,
+            seat_no_int=seat_no_int,
+            department=department
+        )
+        for (register_no, name, course_code, course_title, exam_date, session, hall_no, seat_no,
+             hall_no_int, seat_no_int, department)
+        in zip(*(students[field].tolist() for field in STUDENT_FIELDS + DERIVED_STUDENT_FIELDS))
+    ]
+
+
+def _add_date_report(total, report, chunk, warnings, sample_limit):
+    """
+    Log a chunk's unparseable exam dates (through a WarningLimiter) and add
+    them to the sheet's running {'count', 'values'} report.
+    """
+    if not report.get('count'):
+        return
+    warnings.warning('Chunk %d: %d exam dates could not be read, e.g. %s',
+                     chunk, report['count'], ', '.join(map(repr, report['values'])))
+    total['count'] += report['count']
+    for value in report['values']:
+        if len(total['values']) < sample_limit and value not in total['values']:
+            total['values'].append(value)
+
+
+def ingest_students(dataset, file_obj, chunk_size=None, batch_size=None, report_limit=50, progress=None):
+    """
+    Stream a student sheet into `dataset`.
+
+    Rows are read, normalized and inserted chunk by chunk, each chunk with
+    INSERTs of at most batch_size rows, so peak memory depends on the chunk
+    size rather than the sheet size. Everything runs in one transaction: a
+    failure part-way leaves no students behind.
+
+    If given, progress(rows_inserted) is called after every chunk.
+
+    Returns {'students_count': <rows inserted>, 'duplicates': <report>,
+    'unparsed_dates': {'count': <rows>, 'values': [<first few values>]}}.
+    A DatasetStats row summarizing the sheet is written in the same transaction,
+    and a column snapshot of the students (see columnar.py) next to the file.
+    """
+    chunk_size = chunk_size or settings.STUDENT_INGEST_CHUNK_SIZE
+    batch_size = batch_size or settings.STUDENT_INSERT_BATCH_SIZE
+
+    seen = set()
+    halls = set()
+    first_date = last_date = None
+    rows_read = 0
+    inserted = 0
+    timer = StageTimer()
+    duplicates = {'count': 0, 'register_nos': []}
+    unparsed_dates = {'count': 0, 'values': []}
+    date_warnings = WarningLimiter(logger)
+    columns = ColumnSnapshotWriter()
+
+    with transaction.atomic():
+        # The sheet reader times its sniff, parse and map stages itself
+        chunks = iter_student_chunks(file_obj, chunk_size=chunk_size, timer=timer)
+        for number, chunk in enumerate(chunks, 1):
+            with timer.span('normalize'):
+                date_report = {}
+                students = normalize_student_frame(chunk, date_report)
+                students = students[students['register_no'] != '']
+                rows_read += len(students)
+                students, report = drop_duplicate_register_numbers(students, report_limit, seen=seen)
+            _add_date_report(unparsed_dates, date_report, number, date_warnings, report_limit)
+
+            duplicates['count'] += report['count']
+            room = report_limit - len(duplicates['register_nos'])
+            duplicates['register_nos'].extend(report['register_nos'][:room])
+
+            halls.update(students['hall_no'].unique())
+            dates = students['exam_date'].dropna()
+            if len(dates):
+                chunk_first, chunk_last = dates.min(), dates.max()
+                first_date = chunk_first if first_date is None else min(first_date, chunk_first)
+                last_date = chunk_last if last_date is None else max(last_date, chunk_last)
+
+            with timer.span('insert'):
+                Student.objects.bulk_create(build_students(dataset, students), batch_size=batch_size)
+            with timer.span('columns'):
+                columns.append(students)
+            inserted += len(students)
+            if progress:
+                progress(inserted)
+
+        halls.discard('')
+        DatasetStats.objects.create(
+            dataset=dataset,
+            row_count=rows_read,
+            distinct_students=inserted,
+            distinct_halls=len(halls),
+            first_exam_date=first_date,
+            last_exam_date=last_date,
+            parse_seconds=round(timer.total('sniff', 'parse', 'map', 'normalize'), 3),
+        )
+    date_warnings.flush('unparseable exam date warnings')
+
+    with timer.span('columns'):
+        write_column_snapshot(dataset, columns)
+
+    timer.log(logger, logging.INFO,
+              'Imported %d students into dataset %s (%d duplicate rows dropped, %d exam dates unparseable)',
+              inserted, dataset.id, duplicates['count'], unparsed_dates['count'])
+    return {'students_count': inserted, 'duplicates': duplicates, 'unparsed_dates': unparsed_dates}
+
+
+def read_student_sheet(file_obj, chunk_size=None, report_limit=50):
+    """
+    Normalized, de-duplicated students of a whole sheet.
+    Returns (DataFrame, rows read, duplicate report).
+    """
+    chunk_size = chunk_size or settings.STUDENT_INGEST_CHUNK_SIZE
+    frames = []
+    seen = set()
+    rows_read = 0
+    duplicates = {'count': 0, 'register_nos': []}
+    unparsed_dates = {'count': 0, 'values': []}
+    date_warnings = WarningLimiter(logger)
+    for number, chunk in enumerate(iter_student_chunks(file_obj, chunk_size=chunk_size), 1):
+        date_report = {}
+        students = normalize_student_frame(chunk, date_report)
+        students = students[students['register_no'] != '']
+        rows_read += len(students)
+        students, report = drop_duplicate_register_numbers(students, report_limit, seen=seen)
+        _add_date_report(unparsed_dates, date_report, number, date_warnings, report_limit)
+        duplicates['count'] += report['count']
+        room = report_limit - len(duplicates['register_nos'])
+        duplicates['register_nos'].extend(report['register_nos'][:room])
+        frames.append(students)
+    date_warnings.flush('unparseable exam date warnings')
+    if not frames:
+        return normalize_student_frame(pd.DataFrame()), 0, duplicates
+    return pd.concat(frames, ignore_index=True), rows_read, duplicates
+
+
+def load_dataset_students(dataset):
+    """
+    A dataset's normalized students from its column snapshot, falling back
+    to re-parsing the original file (duplicates dropped, as at upload).
+    Returns (DataFrame, source) with source 'snapshot' or 'file'.
+    """
+    students = load_student_frame(dataset)
+    if students is not None:
+        return students, 'snapshot'
+    with dataset.file.open('rb') as f:
+        students, _, _ = read_student_sheet(f)
+    return students, 'file'
+
+
+def bulk_upsert(model, objs, unique_fields, update_fields, batch_size):
+    """
+    Insert `objs` in batches, updating `update_fields` of the rows that
+    already exist with the same `unique_fields` (INSERT ... ON CONFLICT DO
+    UPDATE, or ON DUPLICATE KEY UPDATE on MySQL). Returns False without
+    writing if the database can't upsert, so the caller falls back to
+    separate updates and inserts.
+    """
+    features = connections[router.db_for_write(model)].features
+    if features.supports_update_conflicts_with_target:
+        model.objects.bulk_create(objs, batch_size=batch_size, update_conflicts=True,
+                                  unique_fields=unique_fields, update_fields=update_fields)
+    elif features.supports_update_conflicts:
+        model.objects.bulk_create(objs, batch_size=batch_size, update_conflicts=True,
+                                  update_fields=update_fields)
+    else:
+        return False
+    return True
+
+
+def _acquire_schedule_lock():
+    """
+    Serialize schedule loaders across processes for the current transaction.
+    An UPDATE on the schedule's version row takes a row lock on PostgreSQL and
+    MySQL and the database write lock on SQLite, so concurrent loaders queue
+    here instead of all seeing an empty table and all inserting.
+    """
+    CacheVersion.objects.get_or_create(name=HALL_TICKET_SCHEDULE)
+    CacheVersion.objects.filter(name=HALL_TICKET_SCHEDULE).update(name=HALL_TICKET_SCHEDULE)
+
+
+def load_hall_ticket_schedule(path=None, replace=False, dry_run=False, batch_size=None):
+    """
+    Load the hall ticket schedule workbook into HallTicketExam.
+
+    Only one process loads at a time. Unless replace is set, the load is
+    skipped when the table already has rows, so running this from every
+    deploy or worker start is safe. A replace upserts the workbook's exams by
+    (department, semester, course_code) and deletes only the exams no longer
+    in it, so students never see an empty schedule mid-load. With dry_run
+    the changes are counted but nothing is written.
+
+    Returns a summary: counts of records parsed and exams created, updated,
+    removed and unchanged, and whether the load was skipped.
+    """
+    batch_size = batch_size or settings.STUDENT_INSERT_BATCH_SIZE
+    path = path or settings.HALL_TICKET_EXCEL_PATH
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Hall ticket file not found: {path}")
+
+    # Parse before taking the lock so it is held only for the write
+    with open(path, 'rb') as excel_file:
+        records = parse_hall_ticket_excel(excel_file)
+    # A course listed twice for a department and semester: the last row wins
+    incoming = {tuple(record[field] for field in SCHEDULE_KEY): record for record in records}
+    summary = {'records': len(records), 'created': 0, 'updated': 0, 'removed': 0,
+               'unchanged': 0, 'skipped': False}
+    if not incoming:
+        return summary
+
+    with transaction.atomic():
+        _acquire_schedule_lock()
+
+        stored = {}
+        rows = HallTicketExam.objects.values_list('id', *SCHEDULE_KEY, *SCHEDULE_FIELDS).order_by()
+        for pk, *values in rows.iterator(chunk_size=batch_size):
+            stored[tuple(values[:len(SCHEDULE_KEY)])] = (pk, tuple(values[len(SCHEDULE_KEY):]))
+        if stored and not replace:
+            summary['skipped'] = True
+            return summary
+
+        added, updated = [], []
+        for key, record in incoming.items():
+            exam = HallTicketExam(**record)
+            if key not in stored:
+                added.append(exam)
+            elif stored[key][1] != tuple(record[field] for field in SCHEDULE_FIELDS):
+                updated.append(exam)
+        removed_ids = [pk for key, (pk, _) in stored.items() if key not in incoming]
+        summary.update(created=len(added), updated=len(updated), removed=len(removed_ids),
+                       unchanged=len(incoming) - len(added) - len(updated))
+        if dry_run or not (added or updated or removed_ids):
+            return summary
+
+        for start in range(0, len(removed_ids), batch_size):
+            HallTicketExam.objects.filter(pk__in=removed_ids[start:start + batch_size]).delete()
+        if not bulk_upsert(HallTicketExam, added + updated, SCHEDULE_KEY, SCHEDULE_FIELDS, batch_size):
+            for exam in updated:
+                exam.pk = stored[tuple(getattr(exam, field) for field in SCHEDULE_KEY)][0]
+            HallTicketExam.objects.bulk_update(updated, SCHEDULE_FIELDS, batch_size=batch_size)
+            HallTicketExam.objects.bulk_create(added, batch_size=batch_size)
+        invalidate_hall_ticket_schedule()
+
+    return summary
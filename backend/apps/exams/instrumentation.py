@@ -0,0 +1,69 @@
+"""
+Cheap instrumentation for the upload and parsing paths.
+
+Stage timings are accumulated with perf_counter and logged once per
+operation, and warnings that can repeat for every row of a sheet are capped,
+so instrumenting a hot loop costs a clock read per span rather than a log
+write per row.
+"""
+import time
+from contextlib import contextmanager
+
+
+class StageTimer:
+    """
+    Wall time per named stage, accumulated across repeated spans (e.g. one
+    per chunk of a sheet).
+    """
+    def __init__(self):
+        self.seconds = {}
+
+    @contextmanager
+    def span(self, stage):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.seconds[stage] = self.seconds.get(stage, 0.0) + time.perf_counter() - started
+
+    def add(self, stage, seconds):
+        """
+        Account time measured outside a span, e.g. across a generator's yields.
+        """
+        self.seconds[stage] = self.seconds.get(stage, 0.0) + seconds
+
+    def total(self, *stages):
+        return sum(self.seconds.get(stage, 0.0) for stage in stages)
+
+    def format(self):
+        return ', '.join(f'{stage} {seconds:.3f}s' for stage, seconds in self.seconds.items())
+
+    def log(self, logger, level, message, *args):
+        """
+        Log `message` followed by the stage timings; they are also attached
+        to the record as `timings` for structured handlers.
+        """
+        if logger.isEnabledFor(level):
+            logger.log(level, message + ' (%s)', *args, self.format(),
+                       extra={'timings': {stage: round(s, 4) for stage, s in self.seconds.items()}})
+
+
+class WarningLimiter:
+    """
+    Log the first `limit` occurrences of a repeated warning and only count
+    the rest; flush() reports how many were suppressed.
+    """
+    def __init__(self, logger, limit=10):
+        self.logger = logger
+        self.limit = limit
+        self.count = 0
+
+    def warning(self, message, *args):
+        self.count += 1
+        if self.count <= self.limit:
+            self.logger.warning(message, *args)
+
+    def flush(self, what='warnings'):
+        if self.count > self.limit:
+            self.logger.warning('%d more %s suppressed', self.count - self.limit, what)
+        self.count = 0
@@ -0,0 +1,197 @@
+"""
+In-process runner for ImportJob (imports and purges).
+
+Jobs run on a small thread pool inside the web worker that accepted the
+request, so no external broker is needed. Progress is written to the ImportJob
+row from a separate reporter thread (and therefore a separate DB connection)
+because an import runs in one transaction whose writes stay invisible until
+it commits. The same thread keeps the jobs still waiting in this worker's
+queue fresh, so only jobs whose worker is gone go stale (see
+ImportJob.is_stale).
+"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import DatabaseError, close_old_connections, connection, transaction
+from django.utils import timezone
+
+from .cache import invalidate_active_dataset
+from .ingest import ingest_students
+from .models import Dataset, ImportJob
+from .purge import purge_datasets
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+_queued = set()  # ids of jobs submitted to this worker's pool and not started yet
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.IMPORT_JOB_WORKERS,
+                thread_name_prefix='import-job',
+            )
+    return _executor
+
+
+class _ProgressReporter(threading.Thread):
+    """
+    Periodically copy the running job's progress to its ImportJob row.
+    """
+    def __init__(self, job_id, interval, stage, working_stage):
+        super().__init__(name=f'import-job-{job_id}-progress', daemon=True)
+        self.job_id = job_id
+        self.interval = interval
+        self.stage = stage
+        self.working_stage = working_stage
+        self.rows_processed = 0
+        self._stopped = threading.Event()
+
+    def update(self, rows_processed):
+        self.stage = self.working_stage
+        self.rows_processed = rows_processed
+
+    def stop(self):
+        self._stopped.set()
+        self.join()
+
+    def run(self):
+        try:
+            while not self._stopped.wait(self.interval):
+                try:
+                    now = timezone.now()
+                    ImportJob.objects.filter(pk=self.job_id).update(
+                        stage=self.stage,
+                        rows_processed=self.rows_processed,
+                        updated_at=now,
+                    )
+                    with _executor_lock:
+                        queued = list(_queued)
+                    if queued:
+                        ImportJob.objects.filter(pk__in=queued, stage=ImportJob.STAGE_QUEUED).update(updated_at=now)
+                except DatabaseError:
+                    # Progress is best effort (e.g. SQLite is locked by the import)
+                    pass
+        finally:
+            connection.close()
+
+
+def run_import_job(job_id):
+    """
+    Import the sheet of an ImportJob into a new Dataset and record the outcome.
+    """
+    _dequeue(job_id)
+    close_old_connections()
+    reporter = _ProgressReporter(job_id, settings.IMPORT_JOB_PROGRESS_INTERVAL,
+                                 ImportJob.STAGE_READING, ImportJob.STAGE_INSERTING)
+    try:
+        job = ImportJob.objects.get(pk=job_id)
+        job.stage = ImportJob.STAGE_READING
+        job.started_at = timezone.now()
+        job.save(update_fields=['stage', 'started_at', 'updated_at'])
+        reporter.start()
+
+        try:
+            with transaction.atomic():
+                # The dataset shares the job's stored file rather than copying it
+                dataset = Dataset.objects.create(file=job.file.name, content_hash=job.content_hash, is_active=False)
+                with job.file.open('rb') as file_obj:
+                    result = ingest_students(dataset, file_obj, progress=reporter.update)
+                invalidate_active_dataset()
+        except Exception as e:
+            logger.exception('Import job %s failed', job_id)
+            reporter.stop()
+            job.stage = ImportJob.STAGE_FAILED
+            job.error = str(e)
+            job.file.delete(save=False)
+        else:
+            reporter.stop()
+            job.dataset = dataset
+            job.stage = ImportJob.STAGE_DONE
+            job.rows_processed = result['students_count']
+            job.duplicates = result['duplicates']
+            job.unparsed_dates = result['unparsed_dates']
+
+        job.finished_at = timezone.now()
+        job.save()
+    finally:
+        if reporter.is_alive():
+            reporter.stop()
+        close_old_connections()
+
+
+def run_purge_job(job_id, dataset_ids=None):
+    """
+    Delete datasets (all of them when dataset_ids is None) and record the outcome.
+    """
+    _dequeue(job_id)
+    close_old_connections()
+    reporter = _ProgressReporter(job_id, settings.IMPORT_JOB_PROGRESS_INTERVAL,
+                                 ImportJob.STAGE_DELETING, ImportJob.STAGE_DELETING)
+    try:
+        job = ImportJob.objects.get(pk=job_id)
+        job.stage = ImportJob.STAGE_DELETING
+        job.started_at = timezone.now()
+        job.save(update_fields=['stage', 'started_at', 'updated_at'])
+        reporter.start()
+
+        try:
+            deleted = purge_datasets(dataset_ids, progress=reporter.update)
+        except Exception as e:
+            logger.exception('Purge job %s failed', job_id)
+            reporter.stop()
+            job.stage = ImportJob.STAGE_FAILED
+            job.error = str(e)
+        else:
+            reporter.stop()
+            job.stage = ImportJob.STAGE_DONE
+            job.rows_processed = deleted
+
+        job.finished_at = timezone.now()
+        job.save()
+    finally:
+        if reporter.is_alive():
+            reporter.stop()
+        close_old_connections()
+
+
+def _dequeue(job_id):
+    with _executor_lock:
+        _queued.discard(job_id)
+
+
+def _enqueue(func, job_id, *args):
+    with _executor_lock:
+        _queued.add(job_id)
+    _get_executor().submit(func, job_id, *args)
+
+
+def _submit(func, job_id, *args):
+    """
+    Run func(job_id, *args) on the job pool once the current transaction
+    commits. With IMPORT_JOB_WORKERS = 0 it runs inline instead.
+    """
+    if settings.IMPORT_JOB_WORKERS <= 0:
+        transaction.on_commit(lambda: func(job_id, *args))
+    else:
+        transaction.on_commit(lambda: _enqueue(func, job_id, *args))
+
+
+def submit_import_job(job):
+    """
+    Queue an ImportJob once the transaction that created it has committed.
+    """
+    _submit(run_import_job, job.pk)
+
+
+def submit_purge_job(job, dataset_ids=None):
+    """
+    Queue a purge ImportJob for the given datasets (None for all).
+    """
+    _submit(run_purge_job, job.pk, dataset_ids)
@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.exams.cache import get_active_dataset
+from apps.exams.consistency import check_dataset
+from apps.exams.models import Dataset
+
+
+class Command(BaseCommand):
+    help = (
+        "Check a dataset's students against its stats, snapshots, seating maps and the hall "
+        'ticket schedule. Exits with an error if derived data is inconsistent.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dataset', type=int, help='Dataset id (defaults to the active dataset)')
+        parser.add_argument('--sample', type=int, default=0,
+                            help='Register numbers (or seats) to list per warning')
+
+    def handle(self, *args, **options):
+        if options['dataset']:
+            dataset = Dataset.objects.filter(pk=options['dataset']).first()
+            if dataset is None:
+                raise CommandError(f"Dataset {options['dataset']} not found")
+        else:
+            dataset = get_active_dataset()
+            if dataset is None:
+                raise CommandError('No active dataset found')
+
+        report = check_dataset(dataset, sample_limit=options['sample'])
+        self.stdout.write(f"Dataset {dataset.id}{' (active)' if dataset.is_active else ''}:")
+        for name, value in report['counts'].items():
+            self.stdout.write(f"  {name.replace('_', ' ')}: {'-' if value is None else value}")
+
+        for warning in report['warnings']:
+            self.stdout.write(self.style.WARNING(f'Warning: {warning}'))
+        for name, sample in report['samples'].items():
+            self.stdout.write(f"  {name.replace('_', ' ')}: {', '.join(sample)}")
+        for problem in report['problems']:
+            self.stdout.write(self.style.ERROR(f'Problem: {problem}'))
+
+        if report['problems']:
+            raise CommandError(f"{len(report['problems'])} consistency problems found")
+        self.stdout.write(self.style.SUCCESS('No consistency problems found'))
@@ -0,0 +1,41 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.exams.ingest import load_hall_ticket_schedule
+
+
+class Command(BaseCommand):
+    help = 'Load the hall ticket exam schedule from the HALL_TICKET.xlsx workbook.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--file', help='Workbook path (defaults to settings.HALL_TICKET_EXCEL_PATH)')
+        parser.add_argument('--replace', action='store_true',
+                            help='Update an already loaded schedule in place instead of skipping')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Report what would change without writing anything')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        try:
+            summary = load_hall_ticket_schedule(options['file'], replace=options['replace'],
+                                                dry_run=options['dry_run'])
+        except FileNotFoundError as e:
+            raise CommandError(str(e))
+        elapsed = time.perf_counter() - started
+
+        if not summary['records']:
+            self.stdout.write(self.style.WARNING('No hall ticket records found in the workbook'))
+            return
+        if summary['skipped']:
+            self.stdout.write('Hall ticket schedule already loaded, nothing to do (use --replace to update it)')
+            return
+
+        changes = (f"{summary['created']} created, {summary['updated']} updated, "
+                   f"{summary['removed']} removed, {summary['unchanged']} unchanged")
+        if options['dry_run']:
+            self.stdout.write(f"Dry run: {summary['records']} records would give {changes} ({elapsed:.2f}s)")
+        else:
+            self.stdout.write(self.style.SUCCESS(
+                f"Loaded {summary['records']} hall ticket records: {changes} in {elapsed:.2f}s"
+            ))
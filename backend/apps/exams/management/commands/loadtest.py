@@ -0,0 +1,346 @@
+import json
+import queue
+import random
+import subprocess
+import threading
+import time
+from functools import partial
+from http.client import HTTPConnection
+from urllib.parse import urlsplit
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer, make_server
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.core.wsgi import get_wsgi_application
+from django.db import connection, connections, transaction
+
+from apps.exams.cache import get_active_dataset, invalidate_active_dataset
+from apps.exams.ingest import load_hall_ticket_schedule
+from apps.exams.models import ActiveDataset, HallTicketExam, Student
+from apps.exams.purge import purge_datasets
+from apps.exams.synthetic import seed_dataset
+
+QUERY_COUNT_HEADER = 'X-DB-Queries'
+
+# Metrics compared between runs, and whether higher is better
+COMPARED_METRICS = [
+    ('requests_per_second', True),
+    ('p50_ms', False),
+    ('p95_ms', False),
+    ('p99_ms', False),
+    ('queries_per_request', False),
+]
+
+
+class _PooledWSGIServer(WSGIServer):
+    """
+    WSGI server handing requests to a fixed set of threads, so each thread
+    keeps its database connection across requests as a gunicorn worker
+    would. The connections are closed when the server is closed.
+    """
+    request_queue_size = 256
+
+    def __init__(self, server_address, handler_class, threads):
+        super().__init__(server_address, handler_class)
+        self._requests = queue.Queue()
+        self._threads = [threading.Thread(target=self._serve_requests, daemon=True) for _ in range(threads)]
+        for thread in self._threads:
+            thread.start()
+
+    def _serve_requests(self):
+        try:
+            while True:
+                item = self._requests.get()
+                if item is None:
+                    return
+                request, client_address = item
+                try:
+                    self.finish_request(request, client_address)
+                except Exception:
+                    self.handle_error(request, client_address)
+                finally:
+                    self.shutdown_request(request)
+        finally:
+            connections.close_all()
+
+    def process_request(self, request, client_address):
+        self._requests.put((request, client_address))
+
+    def server_close(self):
+        super().server_close()
+        # Requests already queued are served first
+        for _ in self._threads:
+            self._requests.put(None)
+        for thread in self._threads:
+            thread.join()
+
+
+class _QuietHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def _counting_app(application):
+    """
+    Wrap the Django WSGI app to report the number of database queries of each
+    request in a response header.
+    """
+    def app(environ, start_response):
+        queries = [0]
+
+        def count(execute, sql, params, many, context):
+            queries[0] += 1
+            return execute(sql, params, many, context)
+
+        captured = {}
+
+        def capture(status, headers, exc_info=None):
+            captured['status'], captured['headers'] = status, headers
+
+        with connection.execute_wrapper(count):
+            response = application(environ, capture)
+            try:
+                body = b''.join(response)
+            finally:
+                if hasattr(response, 'close'):
+                    response.close()
+
+        start_response(captured['status'], captured['headers'] + [(QUERY_COUNT_HEADER, str(queries[0]))])
+        return [body]
+    return app
+
+
+def _percentile(ordered, percent):
+    """
+    Nearest-rank percentile of an ascending list.
+    """
+    if not ordered:
+        return None
+    rank = max(1, -(-len(ordered) * percent // 100))
+    return ordered[int(rank) - 1]
+
+
+def _summarize(samples, elapsed):
+    """
+    Per-endpoint figures from (latency seconds, status, queries) samples.
+    """
+    latencies = sorted(latency for latency, _, _ in samples)
+    errors = sum(1 for _, status, _ in samples if status >= 400)
+    queries = [count for _, _, count in samples if count is not None]
+    return {
+        'requests': len(samples),
+        'errors': errors,
+        'requests_per_second': round(len(samples) / elapsed, 1) if elapsed else None,
+        'p50_ms': round(_percentile(latencies, 50) * 1000, 2) if latencies else None,
+        'p95_ms': round(_percentile(latencies, 95) * 1000, 2) if latencies else None,
+        'p99_ms': round(_percentile(latencies, 99) * 1000, 2) if latencies else None,
+        'max_ms': round(latencies[-1] * 1000, 2) if latencies else None,
+        'queries_per_request': round(sum(queries) / len(queries), 2) if queries else None,
+    }
+
+
+def _server_address(url):
+    """
+    (host, port, path prefix) of a --url such as http://127.0.0.1:8000 or
+    localhost/exams; the port defaults to 80.
+    """
+    if '://' not in url:
+        url = f'http://{url}'
+    parts = urlsplit(url)
+    if parts.scheme != 'http' or not parts.hostname:
+        raise CommandError(f'Unsupported --url {url!r}: expected http://host[:port][/path]')
+    try:
+        port = parts.port or 80
+    except ValueError:
+        raise CommandError(f'Invalid port in --url {url!r}')
+    return parts.hostname, port, parts.path.rstrip('/')
+
+
+def _git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = (
+        'Load-test the student login and hall ticket endpoints. Seeds a synthetic '
+        'active dataset into the configured database (DATABASE_URL), starts a local '
+        'threaded server and reports throughput, latency percentiles and DB queries '
+        'per request. The previous active dataset is restored afterwards. Students '
+        'of a real dataset cannot log in meanwhile, so only SQLite databases are '
+        'used unless --allow-database is given.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--students', type=int, default=5000, help='Synthetic students to seed')
+        parser.add_argument('--workers', type=int, default=32, help='Concurrent client threads')
+        parser.add_argument('--requests', type=int, default=100,
+                            help='Requests per worker (one login or hall ticket request each)')
+        parser.add_argument('--hall-ticket-ratio', type=float, default=0.5,
+                            help='Share of requests going to the hall ticket endpoint')
+        parser.add_argument('--seed', type=int, default=0, help='Seed for the data and the request mix')
+        parser.add_argument('--url', help='Target an already running server instead (e.g. '
+                            'http://127.0.0.1:8000); queries per request are not reported then')
+        parser.add_argument('--output', help='Write the results as JSON to this file')
+        parser.add_argument('--compare', help='Results JSON of an earlier run to compare with')
+        parser.add_argument('--keep', action='store_true',
+                            help='Keep the synthetic dataset active after the run')
+        parser.add_argument('--allow-database', action='store_true',
+                            help='Run against a database other than SQLite (never a live one: the '
+                            'synthetic dataset replaces the active dataset for the run)')
+
+    def handle(self, *args, **options):
+        if options['students'] < 1 or options['workers'] < 1 or options['requests'] < 1:
+            raise CommandError('--students, --workers and --requests must be positive')
+        if connection.vendor != 'sqlite' and not options['allow_database']:
+            raise CommandError(
+                f'Refusing to load-test the {connection.vendor} database of DATABASE_URL: the run '
+                'replaces its active dataset. Point DATABASE_URL at a SQLite file, or pass '
+                '--allow-database for a disposable database.'
+            )
+        if options['url']:
+            host, port, prefix = _server_address(options['url'])
+        baseline = None
+        if options['compare']:
+            with open(options['compare']) as f:
+                baseline = json.load(f)
+
+        if not HallTicketExam.objects.exists():
+            try:
+                load_hall_ticket_schedule()
+            except FileNotFoundError:
+                self.stdout.write(self.style.WARNING(
+                    'Hall ticket schedule not loaded; hall ticket requests will answer 503'))
+
+        previous = get_active_dataset()
+        self.stdout.write(f"Seeding {options['students']} synthetic students...")
+        started = time.perf_counter()
+        dataset = seed_dataset(options['students'], seed=options['seed'])
+        self.stdout.write(f'Seeded dataset {dataset.id} in {time.perf_counter() - started:.1f}s')
+
+        server = None
+        try:
+            if not options['url']:
+                server = make_server('127.0.0.1', 0, _counting_app(get_wsgi_application()),
+                                     server_class=partial(_PooledWSGIServer, threads=options['workers']),
+                                     handler_class=_QuietHandler)
+                host, port = server.server_address
+                prefix = ''
+                threading.Thread(target=server.serve_forever, daemon=True).start()
+
+            register_nos = list(
+                Student.objects.filter(dataset=dataset).order_by('register_no')
+                .values_list('register_no', flat=True)
+            )
+            results = self._run(host, port, prefix, register_nos, options)
+        finally:
+            if server is not None:
+                server.shutdown()
+                server.server_close()
+            if not options['keep']:
+                with transaction.atomic():
+                    if previous is not None:
+                        ActiveDataset.toggle(previous.id)
+                    invalidate_active_dataset()
+                purge_datasets([dataset.id])
+
+        results['meta'] = {
+            'revision': _git_revision(),
+            'database': connection.vendor,
+            'students': options['students'],
+            'workers': options['workers'],
+            'requests_per_worker': options['requests'],
+            'hall_ticket_ratio': options['hall_ticket_ratio'],
+            'seed': options['seed'],
+            'server': options['url'] or 'in-process wsgiref (thread pool)',
+        }
+        self._report(results, baseline)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(results, f, indent=2)
+            self.stdout.write(f"Results written to {options['output']}")
+
+    def _run(self, host, port, prefix, register_nos, options):
+        """
+        Drive the endpoints (under the `prefix` path) from `workers` threads,
+        each with its own deterministic request sequence, all starting
+        together.
+        """
+        samples = {'login': [], 'hall_ticket': []}
+        lock = threading.Lock()
+        start = threading.Barrier(options['workers'] + 1)
+
+        def worker(index):
+            rng = random.Random(f"{options['seed']}-{index}")
+            local = {'login': [], 'hall_ticket': []}
+            start.wait()
+            for _ in range(options['requests']):
+                register_no = rng.choice(register_nos)
+                if rng.random() < options['hall_ticket_ratio']:
+                    endpoint, method, path, body = 'hall_ticket', 'GET', f'{prefix}/api/hall-ticket/?register_no={register_no}', None
+                else:
+                    endpoint, method, path = 'login', 'POST', f'{prefix}/api/login/'
+                    body = json.dumps({'username': register_no, 'password': 'Kite@12345'})
+                began = time.perf_counter()
+                client = HTTPConnection(host, port, timeout=60)
+                try:
+                    client.request(method, path, body=body, headers={'Content-Type': 'application/json'})
+                    response = client.getresponse()
+                    response.read()
+                    status, queries = response.status, response.getheader(QUERY_COUNT_HEADER)
+                except OSError:
+                    status, queries = 599, None
+                finally:
+                    client.close()
+                local[endpoint].append((time.perf_counter() - began, status,
+                                        int(queries) if queries is not None else None))
+            with lock:
+                for endpoint, values in local.items():
+                    samples[endpoint].extend(values)
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(options['workers'])]
+        for thread in threads:
+            thread.start()
+        start.wait()
+        began = time.perf_counter()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - began
+
+        results = {endpoint: _summarize(values, elapsed) for endpoint, values in samples.items()}
+        results['total'] = _summarize(samples['login'] + samples['hall_ticket'], elapsed)
+        results['total']['seconds'] = round(elapsed, 3)
+        return results
+
+    def _report(self, results, baseline):
+        self.stdout.write('')
+        header = f"{'endpoint':12} {'requests':>9} {'errors':>7} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'queries':>8}"
+        self.stdout.write(header)
+        self.stdout.write('-' * len(header))
+        for endpoint in ('login', 'hall_ticket', 'total'):
+            row = results[endpoint]
+            self.stdout.write(
+                f"{endpoint:12} {row['requests']:>9} {row['errors']:>7} "
+                + ' '.join(f"{'-' if row[key] is None else row[key]:>8}" for key in
+                           ('requests_per_second', 'p50_ms', 'p95_ms', 'p99_ms', 'queries_per_request'))
+            )
+
+        if not baseline:
+            return
+        self.stdout.write(f"\nCompared with {baseline.get('meta', {}).get('revision') or 'baseline'}:")
+        for endpoint in ('login', 'hall_ticket', 'total'):
+            old, new = baseline.get(endpoint, {}), results[endpoint]
+            changes = []
+            for metric, higher_is_better in COMPARED_METRICS:
+                if not old.get(metric) or new.get(metric) is None:
+                    continue
+                delta = (new[metric] - old[metric]) / old[metric] * 100
+                better = delta > 0 if higher_is_better else delta < 0
+                style = self.style.SUCCESS if better else self.style.ERROR if abs(delta) >= 5 else str
+                changes.append(style(f'{metric} {old[metric]} -> {new[metric]} ({delta:+.1f}%)'))
+            self.stdout.write(f'  {endpoint:12} ' + ', '.join(changes))
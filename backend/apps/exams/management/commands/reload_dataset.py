@@ -0,0 +1,60 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.exams.cache import get_active_dataset
+from apps.exams.delta import reload_students
+from apps.exams.instrumentation import StageTimer
+from apps.exams.models import Dataset
+
+
+class Command(BaseCommand):
+    help = (
+        "Re-parse a dataset's students with the current parsers and write only the rows that "
+        'change, as batched upserts; snapshots, seating maps and stats follow.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dataset', type=int, help='Dataset id (defaults to the active dataset)')
+        parser.add_argument('--source', choices=['file', 'snapshot'], default='file',
+                            help='Re-parse the uploaded file (default), or re-normalize the column '
+                                 'snapshot to refresh only hall/seat numbers and departments')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Report what would change without writing anything')
+        parser.add_argument('--force', action='store_true',
+                            help='Reload the uploaded file even though a delta changed the dataset '
+                                 'since, undoing the delta')
+        parser.add_argument('--batch-size', type=int,
+                            help='Rows per statement (defaults to settings.STUDENT_INSERT_BATCH_SIZE)')
+        parser.add_argument('--sample', type=int, default=10,
+                            help='Register numbers to list per kind of change')
+
+    def handle(self, *args, **options):
+        if options['dataset']:
+            dataset = Dataset.objects.filter(pk=options['dataset']).first()
+            if dataset is None:
+                raise CommandError(f"Dataset {options['dataset']} not found")
+        else:
+            dataset = get_active_dataset()
+            if dataset is None:
+                raise CommandError('No active dataset found')
+
+        timer = StageTimer()
+        try:
+            summary = reload_students(dataset, options['source'], dry_run=options['dry_run'],
+                                      force=options['force'], batch_size=options['batch_size'], sample_limit=options['sample'],
+                                      timer=timer)
+        except (FileNotFoundError, ValueError) as e:
+            raise CommandError(str(e))
+
+        changes = (f"{summary['added']} added, {summary['updated']} updated, "
+                   f"{summary['removed']} removed, {summary['unchanged']} unchanged")
+        for change, register_nos in summary['register_nos'].items():
+            if register_nos:
+                self.stdout.write(f"  {change}: {', '.join(register_nos)}")
+        if summary['duplicates']['count']:
+            self.stdout.write(self.style.WARNING(
+                f"{summary['duplicates']['count']} duplicate register numbers in the sheet were skipped"
+            ))
+        if options['dry_run']:
+            self.stdout.write(f'Dry run on dataset {dataset.id}: {changes} ({timer.format()})')
+        else:
+            self.stdout.write(self.style.SUCCESS(f'Reloaded dataset {dataset.id}: {changes} ({timer.format()})'))
@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.exams.cache import get_active_dataset
+from apps.exams.models import Dataset
+from apps.exams.tickets import write_hall_tickets_zip
+from apps.exams.utils import normalize_department_name
+
+
+class Command(BaseCommand):
+    help = 'Render printable hall ticket PDFs into a ZIP archive served by the admin endpoint.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--department', help='Only this department (defaults to all)')
+        parser.add_argument('--dataset', type=int, help='Dataset id (defaults to the active dataset)')
+        parser.add_argument('--output', help='ZIP file to write (defaults to the archive the admin endpoint serves)')
+        parser.add_argument('--workers', type=int,
+                            help='Rendering processes (defaults to settings.HALL_TICKET_PDF_WORKERS)')
+        parser.add_argument('--batch-size', type=int,
+                            help='Tickets per process task (defaults to settings.HALL_TICKET_PDF_BATCH_SIZE)')
+
+    def handle(self, *args, **options):
+        department = options['department']
+        if department:
+            department = normalize_department_name(department)
+            if not department:
+                raise CommandError(f"Unknown department {options['department']!r}")
+
+        if options['dataset']:
+            dataset = Dataset.objects.filter(pk=options['dataset']).first()
+            if dataset is None:
+                raise CommandError(f"Dataset {options['dataset']} not found")
+        else:
+            dataset = get_active_dataset()
+            if dataset is None:
+                raise CommandError('No active dataset found')
+
+        stats = write_hall_tickets_zip(dataset, department, options['output'], options['workers'],
+                                       options['batch_size'])
+
+        if not stats['tickets']:
+            self.stdout.write(self.style.WARNING('No hall tickets rendered (no students with a scheduled department)'))
+        self.stdout.write(self.style.SUCCESS(
+            f"Rendered {stats['tickets']} hall tickets into {stats['path']} "
+            f"in {stats['seconds']:.2f}s ({stats['tickets_per_second'] or 0:,.0f} tickets/s)"
+        ))
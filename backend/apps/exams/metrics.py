@@ -0,0 +1,313 @@
+"""
+Per-view request metrics in Prometheus exposition format.
+
+RequestMetricsMiddleware records the wall time, number of database queries
+and database time of every request into in-process histograms labelled by
+view. Gunicorn workers are separate processes, so each one writes its
+histograms to METRICS_DIR/<pid>-<started>.json at most once every
+METRICS_FLUSH_SECONDS, and the metrics endpoint (served by whichever worker
+gets the scrape) adds up every file. The next scrape after a worker exits
+adds its counts into METRICS_DIR/retired.json and removes its file, so the
+process count follows the live workers while counters and histograms keep
+growing (a drop would read as a counter reset to Prometheus).
+"""
+import atexit
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+
+from django.conf import settings
+from django.db import connection
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 25, 50, 100, 250, 1000)
+
+# name -> (help, buckets); observed per (view, method)
+HISTOGRAMS = {
+    'http_request_duration_seconds': ('Wall time until the view returned its response', DURATION_BUCKETS),
+    'http_request_db_queries': ('Database queries per request', QUERY_BUCKETS),
+    'http_request_db_seconds': ('Time spent in database queries per request', DURATION_BUCKETS),
+}
+REQUESTS_TOTAL = 'http_requests_total'
+PROCESSES = 'metrics_processes'
+
+# Counts of exited workers, and the lock serializing scrapes that update them
+RETIRED = 'retired.json'
+RETIRED_LOCK = 'retired.lock'
+
+METHODS = {'GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS'}
+
+
+class MetricsRegistry:
+    """
+    Histograms and request counters of this process. Bucket counts are kept
+    per bucket (not cumulative) with the overflow last, as they are merged
+    across processes before rendering.
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self.pid = os.getpid()
+        self.started = int(time.time() * 1000)
+        self.histograms = {}
+        self.counters = {}
+        self.flushed_at = 0.0
+
+    def _check_fork(self):
+        # Workers forked from a preloaded master must not report its state
+        if os.getpid() != self.pid:
+            self._reset()
+
+    def record(self, view, method, status_code, seconds, queries, db_seconds):
+        labels = (('view', view), ('method', method if method in METHODS else 'other'))
+        with self.lock:
+            self._check_fork()
+            for name, value in (
+                ('http_request_duration_seconds', seconds),
+                ('http_request_db_queries', queries),
+                ('http_request_db_seconds', db_seconds),
+            ):
+                buckets = HISTOGRAMS[name][1]
+                entry = self.histograms.get((name, labels))
+                if entry is None:
+                    entry = self.histograms[(name, labels)] = [[0] * (len(buckets) + 1), 0.0]
+                entry[0][bisect_left(buckets, value)] += 1
+                entry[1] += value
+            key = (REQUESTS_TOTAL, labels + (('status', str(status_code)),))
+            self.counters[key] = self.counters.get(key, 0) + 1
+
+    def snapshot(self):
+        with self.lock:
+            self._check_fork()
+            return {
+                'histograms': [[name, list(labels), list(counts), total]
+                               for (name, labels), (counts, total) in self.histograms.items()],
+                'counters': [[name, list(labels), value] for (name, labels), value in self.counters.items()],
+            }
+
+    def path(self):
+        directory = getattr(settings, 'METRICS_DIR', '')
+        if not directory:
+            return None
+        return os.path.join(directory, f'{self.pid}-{self.started}.json')
+
+    def flush(self, force=False):
+        """
+        Write this process's metrics for the other workers to read, unless
+        they were written less than METRICS_FLUSH_SECONDS ago.
+        """
+        now = time.monotonic()
+        if not force and now - self.flushed_at < settings.METRICS_FLUSH_SECONDS:
+            return
+        self.flushed_at = now
+        data = self.snapshot()
+        path = self.path()
+        if path is None:
+            return
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            _write_json(path, data)
+        except OSError:
+            # Metrics must never fail a request
+            pass
+
+
+registry = MetricsRegistry()
+atexit.register(registry.flush, force=True)
+
+
+def _process_exists(pid):
+    if os.name != 'posix':
+        # Signal 0 only probes for a process on POSIX
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # Running, as another user
+        return True
+    return True
+
+
+def _write_json(path, data):
+    temporary = f'{path}.{os.getpid()}.tmp'
+    with open(temporary, 'w') as f:
+        json.dump(data, f)
+    os.replace(temporary, path)
+
+
+def _read_json(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _retire(directory, paths):
+    """
+    Add the metrics files of exited workers at `paths` into the retired
+    counts and remove them. Scrapes in other workers wait on a lock, so
+    each file is added exactly once.
+    """
+    # POSIX only, as is telling that a worker has exited
+    import fcntl
+
+    with open(os.path.join(directory, RETIRED_LOCK), 'a') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        # Another scrape may have retired some of them meanwhile
+        paths = [path for path in paths if os.path.exists(path)]
+        if not paths:
+            return
+        retired_path = os.path.join(directory, RETIRED)
+        snapshots = [_read_json(retired_path) or {}]
+        snapshots.extend(filter(None, map(_read_json, paths)))
+        histograms, counters = _merge(snapshots)
+        _write_json(retired_path, {
+            'histograms': [[name, list(labels), counts, total]
+                           for (name, labels), (counts, total) in histograms.items()],
+            'counters': [[name, list(labels), value] for (name, labels), value in counters.items()],
+        })
+        for path in paths:
+            os.remove(path)
+
+
+def collect():
+    """
+    Metrics of all processes: this one's live state, the files written by
+    the others and the retired counts of exited ones, which the files of
+    processes found gone are added to first.
+    Returns (snapshots, live process count).
+    """
+    snapshots = [registry.snapshot()]
+    processes = 1
+    own_path = registry.path()
+    directory = os.path.dirname(own_path) if own_path else None
+    if not directory or not os.path.isdir(directory):
+        return snapshots, processes
+
+    exited = []
+    for name in os.listdir(directory):
+        path = os.path.join(directory, name)
+        pid = name.split('-', 1)[0]
+        if not name.endswith('.json') or path == own_path or not pid.isdigit():
+            continue
+        if not _process_exists(int(pid)):
+            exited.append(path)
+            continue
+        snapshot = _read_json(path)
+        if snapshot is not None:
+            snapshots.append(snapshot)
+            processes += 1
+    if exited:
+        try:
+            _retire(directory, exited)
+        except OSError:
+            # Read them as they are; the next scrape retires them
+            snapshots.extend(filter(None, map(_read_json, exited)))
+    retired = _read_json(os.path.join(directory, RETIRED))
+    if retired is not None:
+        snapshots.append(retired)
+    return snapshots, processes
+
+
+def _labels(pairs):
+    return ','.join(
+        '{}="{}"'.format(key, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for key, value in pairs
+    )
+
+
+def _merge(snapshots):
+    """
+    Add up snapshots into ({(name, labels): [counts, total]},
+    {(name, labels): value}).
+    """
+    histograms, counters = {}, {}
+    for snapshot in snapshots:
+        for name, labels, counts, total in snapshot.get('histograms', []):
+            if name not in HISTOGRAMS or len(counts) != len(HISTOGRAMS[name][1]) + 1:
+                continue
+            key = (name, tuple(tuple(pair) for pair in labels))
+            merged = histograms.setdefault(key, [[0] * len(counts), 0.0])
+            merged[0] = [a + b for a, b in zip(merged[0], counts)]
+            merged[1] += total
+        for name, labels, value in snapshot.get('counters', []):
+            key = (name, tuple(tuple(pair) for pair in labels))
+            counters[key] = counters.get(key, 0) + value
+    return histograms, counters
+
+
+def render_metrics():
+    """
+    Merged metrics of all workers in the Prometheus text format.
+    """
+    snapshots, processes = collect()
+    histograms, counters = _merge(snapshots)
+
+    lines = []
+    for name, (help_text, buckets) in HISTOGRAMS.items():
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} histogram')
+        for (metric, labels), (counts, total) in sorted(histograms.items()):
+            if metric != name:
+                continue
+            cumulative = 0
+            for bound, count in zip([*buckets, '+Inf'], counts):
+                cumulative += count
+                lines.append(f'{name}_bucket{{{_labels(labels + (("le", bound),))}}} {cumulative}')
+            lines.append(f'{name}_sum{{{_labels(labels)}}} {total:.6f}')
+            lines.append(f'{name}_count{{{_labels(labels)}}} {cumulative}')
+
+    lines.append(f'# HELP {REQUESTS_TOTAL} Requests by view, method and status code')
+    lines.append(f'# TYPE {REQUESTS_TOTAL} counter')
+    for (name, labels), value in sorted(counters.items()):
+        lines.append(f'{name}{{{_labels(labels)}}} {value}')
+
+    lines.append(f'# HELP {PROCESSES} Worker processes whose metrics are included')
+    lines.append(f'# TYPE {PROCESSES} gauge')
+    lines.append(f'{PROCESSES} {processes}')
+    return '\n'.join(lines) + '\n'
+
+
+def _view_name(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unresolved'
+    view = getattr(match.func, 'view_class', match.func)
+    return getattr(view, '__name__', match.view_name)
+
+
+class RequestMetricsMiddleware:
+    """
+    Time each request and count its database queries. Streaming responses
+    (e.g. the hall ticket ZIP) are timed until the view returned, not until
+    the last chunk was sent.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        database = [0, 0.0]
+
+        def timed(execute, sql, params, many, context):
+            started = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                database[0] += 1
+                database[1] += time.perf_counter() - started
+
+        started = time.perf_counter()
+        with connection.execute_wrapper(timed):
+            response = self.get_response(request)
+        elapsed = time.perf_counter() - started
+
+        registry.record(_view_name(request), request.method, response.status_code, elapsed, *database)
+        registry.flush()
+        return response
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.9 on 2026-10-18 14:00
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def remove_duplicate_students(apps, schema_editor):
+    """
+    Drop repeated (dataset, register_no) rows so the unique constraint can be
+    created. The first uploaded row is kept, matching the upload behaviour;
+    login could not use duplicated register numbers anyway.
+    """
+    Student = apps.get_model('exams', 'Student')
+    duplicates = (
+        Student.objects.values('dataset_id', 'register_no')
+        .annotate(first_id=Min('id'), rows=Count('id'))
+        .filter(rows__gt=1)
+    )
+    for dup in duplicates.iterator():
+        Student.objects.filter(
+            dataset_id=dup['dataset_id'], register_no=dup['register_no']
+        ).exclude(id=dup['first_id']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exams', '0003_alter_hallticketexam_course_code_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_students, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='student',
+            constraint=models.UniqueConstraint(fields=('dataset', 'register_no'), name='unique_student_register_no_per_dataset'),
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.9 on 2026-10-18 14:08
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def create_active_pointer(apps, schema_editor):
+    """
+    Point the singleton at the currently active dataset. If earlier races left
+    several datasets active, keep the most recently uploaded one.
+    """
+    Dataset = apps.get_model('exams', 'Dataset')
+    ActiveDataset = apps.get_model('exams', 'ActiveDataset')
+
+    active = Dataset.objects.filter(is_active=True).order_by('-uploaded_at', '-id').first()
+    if active is not None:
+        Dataset.objects.filter(is_active=True).exclude(pk=active.pk).update(is_active=False)
+    ActiveDataset.objects.update_or_create(id=1, defaults={'dataset': active})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exams', '0006_importjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ActiveDataset',
+            fields=[
+                ('id', models.PositiveSmallIntegerField(default=1, primary_key=True, serialize=False)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('dataset', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='exams.dataset')),
+            ],
+            options={
+                'constraints': [models.CheckConstraint(condition=models.Q(('id', 1)), name='active_dataset_singleton')],
+            },
+        ),
+        migrations.RunPython(create_active_pointer, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='dataset',
+            constraint=models.UniqueConstraint(condition=models.Q(('is_active', True)), fields=('is_active',), name='single_active_dataset'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.9 on 2026-10-18 14:09
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exams', '0007_activedataset'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StudentSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('register_no', models.CharField(max_length=50)),
+                ('password', models.CharField(max_length=100)),
+                ('login_json', models.TextField()),
+                ('ticket_json', models.TextField()),
+                ('dataset', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='snapshots', to='exams.dataset')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('dataset', 'register_no'), name='unique_snapshot_register_no_per_dataset')],
+            },
+        ),
+    ]
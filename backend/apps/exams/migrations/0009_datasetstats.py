@@ -0,0 +1,59 @@
+# Generated by Django 5.2.9 on 2026-10-18 14:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Max, Min, Q
+
+
+def backfill_stats(apps, schema_editor):
+    """
+    Summarize datasets uploaded before stats were recorded, in one grouped
+    query. Parse time is unknown for them and left at 0.
+    """
+    Student = apps.get_model('exams', 'Student')
+    DatasetStats = apps.get_model('exams', 'DatasetStats')
+
+    summaries = (
+        Student.objects.values('dataset_id')
+        .annotate(
+            rows=Count('id'),
+            halls=Count('hall_no', distinct=True, filter=~Q(hall_no='')),
+            first=Min('exam_date'),
+            last=Max('exam_date'),
+        )
+        .order_by()
+    )
+    DatasetStats.objects.bulk_create([
+        DatasetStats(
+            dataset_id=row['dataset_id'],
+            row_count=row['rows'],
+            distinct_students=row['rows'],
+            distinct_halls=row['halls'],
+            first_exam_date=row['first'],
+            last_exam_date=row['last'],
+        )
+        for row in summaries
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exams', '0008_studentsnapshot'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DatasetStats',
+            fields=[
+                ('dataset', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='exams.dataset')),
+                ('row_count', models.PositiveIntegerField(default=0)),
+                ('distinct_students', models.PositiveIntegerField(default=0)),
+                ('distinct_halls', models.PositiveIntegerField(default=0)),
+                ('first_exam_date', models.DateField(blank=True, null=True)),
+                ('last_exam_date', models.DateField(blank=True, null=True)),
+                ('parse_seconds', models.FloatField(default=0)),
+            ],
+        ),
+        migrations.RunPython(backfill_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.9 on 2026-10-18 14:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exams', '0009_datasetstats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='importjob',
+            name='kind',
+            field=models.CharField(choices=[('import', 'Import'), ('purge', 'Purge')], default='import', max_length=10),
+        ),
+        migrations.AlterField(
+            model_name='importjob',
+            name='file',
+            field=models.FileField(blank=True, upload_to='datasets/'),
+        ),
+        migrations.AlterField(
+            model_name='importjob',
+            name='stage',
+            field=models.CharField(choices=[('queued', 'Queued'), ('reading', 'Reading file'), ('inserting', 'Inserting students'), ('deleting', 'Deleting students'), ('done', 'Done'), ('failed', 'Failed')], default='queued', max_length=20),
+        ),
+    ]
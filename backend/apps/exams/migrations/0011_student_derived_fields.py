@@ -0,0 +1,108 @@
+# Generated by Django 5.2.9 on 2026-10-18 14:14
+
+import re
+
+from django.db import migrations, models
+
+BATCH_SIZE = 2000
+
+# Frozen copies of apps.exams.utils as of this migration, so later changes
+# there don't change what it backfills
+MAX_INT_FIELD = 2147483647
+DEPARTMENT_CODE_MAP = {
+    'UAM': 'AI&ML',
+    'UAD': 'AI&DS',
+    'UCS': 'CSE',
+    'UEC': 'ECE',
+    'UME': 'MECH',
+    'UIT': 'IT',
+    'URA': 'R&A',
+    'UCB': 'CSBS',
+    'UCY': 'CYS',
+}
+DEPARTMENT_CODE_PATTERN = re.compile(r'^\s*\d*(' + '|'.join(DEPARTMENT_CODE_MAP) + ')', re.IGNORECASE)
+
+
+def _department(register_no):
+    """
+    Department of a register number from the code after its leading digits ('' if unknown).
+    """
+    match = DEPARTMENT_CODE_PATTERN.match(str(register_no or ''))
+    return DEPARTMENT_CODE_MAP[match.group(1).upper()] if match else ''
+
+
+def _clean_number(value):
+    """
+    Canonical text and integer value of a hall/seat number ("201.0" -> "201", 201).
+    """
+    value = str(value).strip()
+    try:
+        number = float(value)
+    except ValueError:
+        return value, None
+    if not number.is_integer() or abs(number) > MAX_INT_FIELD:
+        return value, None
+    return str(int(number)), int(number)
+
+
+def backfill_students(apps, schema_editor):
+    """
+    Derive hall/seat integers and departments for rows uploaded before they
+    were stored, normalizing decimal hall/seat numbers on the way.
+    """
+    Student = apps.get_model('exams', 'Student')
+    StudentSnapshot = apps.get_model('exams', 'StudentSnapshot')
+
+    for model, fields in ((Student, ['hall_no', 'seat_no', 'hall_no_int', 'seat_no_int', 'department']),
+                          (StudentSnapshot, ['department'])):
+        batch = []
+        for row in model.objects.order_by('pk').iterator(chunk_size=BATCH_SIZE):
+            if model is Student:
+                row.hall_no, row.hall_no_int = _clean_number(row.hall_no)
+                row.seat_no, row.seat_no_int = _clean_number(row.seat_no)
+            row.department = _department(row.register_no)
+            batch.append(row)
+            if len(batch) >= BATCH_SIZE:
+                model.objects.bulk_update(batch, fields)
+                batch = []
+        if batch:
+            model.objects.bulk_update(batch, fields)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exams', '0010_importjob_kind'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='student',
+            name='department',
+            field=models.CharField(blank=True, default='', max_length=50),
+        ),
+        migrations.AddField(
+            model_name='student',
+            name='hall_no_int',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='student',
+            name='seat_no_int',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='studentsnapshot',
+            name='department',
+            field=models.CharField(blank=True, default='', max_length=50),
+        ),
+        migrations.AddIndex(
+            model_name='student',
+            index=models.Index(fields=['dataset', 'department'], name='student_dataset_department'),
+        ),
+        migrations.AddIndex(
+            model_name='student',
+            index=models.Index(fields=['dataset', 'hall_no_int', 'seat_no_int'], name='student_dataset_hall_seat'),
+        ),
+        migrations.RunPython(backfill_students, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.9 on 2026-10-18 14:17
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exams', '0011_student_derived_fields'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HallSeating',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('exam_date', models.DateField(blank=True, null=True)),
+                ('session', models.CharField(max_length=50)),
+                ('hall_no', models.CharField(max_length=50)),
+                ('block', models.CharField(max_length=50)),
+                ('floor', models.CharField(max_length=50)),
+                ('occupancy', models.PositiveIntegerField()),
+                ('seats_json', models.TextField()),
+                ('dataset', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='hall_seatings', to='exams.dataset')),
+            ],
+            options={
+                'ordering': ['exam_date', 'session', 'hall_no'],
+                'constraints': [models.UniqueConstraint(fields=('dataset', 'exam_date', 'session', 'hall_no'), name='unique_hall_seating_per_dataset')],
+            },
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.2.9 on 2026-10-18 14:31
+
+import hashlib
+
+from django.db import migrations, models
+
+
+def hash_stored_files(apps, schema_editor):
+    """
+    Hash the files of existing datasets so re-uploads of them are recognised;
+    datasets whose file is gone keep an empty hash.
+    """
+    Dataset = apps.get_model('exams', 'Dataset')
+    for dataset in Dataset.objects.filter(content_hash=''):
+        digest = hashlib.sha256()
+        try:
+            with dataset.file.open('rb') as f:
+                for chunk in f.chunks():
+                    digest.update(chunk)
+        except (OSError, ValueError):
+            continue
+        dataset.content_hash = digest.hexdigest()
+        dataset.save(update_fields=['content_hash'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exams', '0012_hallseating'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dataset',
+            name='content_hash',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='importjob',
+            name='content_hash',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='importjob',
+            name='idempotency_key',
+            field=models.CharField(blank=True, max_length=100, null=True, unique=True),
+        ),
+        migrations.RunPython(hash_stored_files, migrations.RunPython.noop),
+    ]
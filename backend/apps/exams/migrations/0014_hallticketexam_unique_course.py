@@ -0,0 +1,37 @@
+# Generated by Django 5.2.9 on 2026-10-18 16:05
+
+from django.db import migrations, models
+from django.db.models import Count, Max
+
+
+def remove_duplicate_exams(apps, schema_editor):
+    """
+    Drop repeated (department, semester, course_code) schedule rows so the
+    unique constraint can be created. The most recently loaded row is kept,
+    as a reload of the workbook would have replaced the older ones.
+    """
+    HallTicketExam = apps.get_model('exams', 'HallTicketExam')
+    duplicates = (
+        HallTicketExam.objects.values('department', 'semester', 'course_code')
+        .annotate(last_id=Max('id'), rows=Count('id'))
+        .filter(rows__gt=1)
+    )
+    for dup in duplicates.iterator():
+        HallTicketExam.objects.filter(
+            department=dup['department'], semester=dup['semester'], course_code=dup['course_code']
+        ).exclude(id=dup['last_id']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exams', '0013_upload_content_hash'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_exams, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='hallticketexam',
+            constraint=models.UniqueConstraint(fields=('department', 'semester', 'course_code'), name='unique_exam_per_department_semester'),
+        ),
+    ]
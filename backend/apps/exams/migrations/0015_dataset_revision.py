@@ -0,0 +1,33 @@
+# Generated by Django 5.2.9 on 2026-10-18 14:54
+
+from django.db import migrations, models
+
+
+def mark_built_snapshots(apps, schema_editor):
+    """
+    Snapshots built before revisions existed describe revision 0: students
+    never changed after import without their snapshots being refreshed.
+    """
+    Dataset = apps.get_model('exams', 'Dataset')
+    Dataset.objects.filter(snapshots__isnull=False).distinct().update(snapshots_revision=0)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exams', '0014_hallticketexam_unique_course'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dataset',
+            name='revision',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='dataset',
+            name='snapshots_revision',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.RunPython(mark_built_snapshots, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.9 on 2026-10-18 17:40
+
+from django.db import migrations
+
+INNOVATION_BLOCK = 'Innovation Block (IT Tower)'
+# Innovation Block floors missing from the seating maps built so far
+FLOORS = [
+    (1000, 1999, 'First Floor'),
+    (2000, 2999, 'Second Floor'),
+]
+
+
+def fix_floors(apps, schema_editor):
+    """
+    Seating maps of Innovation Block halls 1000-2999 were built with an
+    'Unknown' floor; give them the floor the student page shows.
+    """
+    HallSeating = apps.get_model('exams', 'HallSeating')
+
+    halls = HallSeating.objects.filter(block=INNOVATION_BLOCK, floor='Unknown')
+    for hall_no in set(halls.values_list('hall_no', flat=True)):
+        try:
+            number = int(hall_no)
+        except ValueError:
+            continue
+        for first, last, floor in FLOORS:
+            if first <= number <= last:
+                halls.filter(hall_no=hall_no).update(floor=floor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exams', '0015_dataset_revision'),
+    ]
+
+    operations = [
+        migrations.RunPython(fix_floors, migrations.RunPython.noop),
+    ]
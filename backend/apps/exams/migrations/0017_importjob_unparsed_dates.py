@@ -0,0 +1,18 @@
+# Generated by Django 5.2.9 on 2026-10-18 15:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exams', '0016_hallseating_innovation_floors'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='importjob',
+            name='unparsed_dates',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -1,13 +1,112 @@
+from datetime import timedelta
+
+from django.conf import settings
 from django.db import models
+from django.utils import timezone
 
 class Dataset(models.Model):
     file = models.FileField(upload_to='datasets/')
     uploaded_at = models.DateTimeField(auto_now_add=True)
+    # SHA-256 of the uploaded file, so re-uploading the same export is a no-op
+    content_hash = models.CharField(max_length=64, blank=True, default='', db_index=True)
+    # Mirrors ActiveDataset for listings; change it only through ActiveDataset.toggle()
     is_active = models.BooleanField(default=False)
+    # Bumped whenever the students change after the import (deltas, reloads)
+    revision = models.PositiveIntegerField(default=0)
+    # Revision the student snapshots and hall seatings were built from (None: not built)
+    snapshots_revision = models.PositiveIntegerField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['is_active'],
+                condition=models.Q(is_active=True),
+                name='single_active_dataset',
+            ),
+        ]
 
     def __str__(self):
         return f"Dataset {self.id} - {self.uploaded_at.strftime('%Y-%m-%d %H:%M')}"
 
+class DatasetStats(models.Model):
+    """
+    Summary of a dataset, written once at ingest so listings don't have to
+    count or scan its students.
+    """
+    dataset = models.OneToOneField(Dataset, primary_key=True, on_delete=models.CASCADE, related_name='stats')
+    row_count = models.PositiveIntegerField(default=0)          # rows read, including dropped duplicates
+    distinct_students = models.PositiveIntegerField(default=0)  # students stored
+    distinct_halls = models.PositiveIntegerField(default=0)
+    first_exam_date = models.DateField(null=True, blank=True)
+    last_exam_date = models.DateField(null=True, blank=True)
+    parse_seconds = models.FloatField(default=0)                # reading and normalizing, excluding inserts
+
+    def __str__(self):
+        return f"Stats for dataset {self.dataset_id}"
+
+class ActiveDataset(models.Model):
+    """
+    Singleton pointer to the dataset students currently see.
+    Activation locks this one row and swaps it, so concurrent toggles are
+    serialized and readers see either the old or the new dataset.
+    """
+    SINGLETON_ID = 1
+
+    id = models.PositiveSmallIntegerField(primary_key=True, default=SINGLETON_ID)
+    dataset = models.ForeignKey(Dataset, null=True, blank=True, on_delete=models.SET_NULL, related_name='+')
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.CheckConstraint(condition=models.Q(id=1), name='active_dataset_singleton'),
+        ]
+
+    @classmethod
+    def toggle(cls, dataset_id):
+        """
+        Activate a dataset, or deactivate it if it is already active.
+        Must run inside a transaction. Returns the dataset with its new
+        is_active value; raises Dataset.DoesNotExist for unknown ids.
+        """
+        pointer, _ = cls.objects.get_or_create(id=cls.SINGLETON_ID)
+        pointer = cls.objects.select_for_update().get(id=cls.SINGLETON_ID)
+        dataset = Dataset.objects.get(pk=dataset_id)
+
+        # Only the previous and the new dataset rows are touched; the old one
+        # is cleared first so the single-active constraint always holds
+        if pointer.dataset_id is not None:
+            Dataset.objects.filter(pk=pointer.dataset_id).update(is_active=False)
+
+        if pointer.dataset_id == dataset.id:
+            pointer.dataset = None
+            dataset.is_active = False
+        else:
+            Dataset.objects.filter(pk=dataset.id).update(is_active=True)
+            pointer.dataset = dataset
+            dataset.is_active = True
+
+        pointer.save(update_fields=['dataset', 'updated_at'])
+        return dataset
+
+    @classmethod
+    def deactivate(cls, dataset_ids):
+        """
+        Take the active dataset offline if it is one of dataset_ids.
+        Must run inside a transaction. Returns True if it was deactivated.
+        """
+        pointer, _ = cls.objects.get_or_create(id=cls.SINGLETON_ID)
+        pointer = cls.objects.select_for_update().get(id=cls.SINGLETON_ID)
+        if pointer.dataset_id is None or pointer.dataset_id not in dataset_ids:
+            return False
+
+        Dataset.objects.filter(pk=pointer.dataset_id).update(is_active=False)
+        pointer.dataset = None
+        pointer.save(update_fields=['dataset', 'updated_at'])
+        return True
+
+    def __str__(self):
+        return f"Active dataset: {self.dataset_id}"
+
 class Student(models.Model):
     dataset = models.ForeignKey(Dataset, on_delete=models.CASCADE, related_name='students')
     register_no = models.CharField(max_length=50)
@@ -19,19 +118,81 @@ class Student(models.Model):
     hall_no = models.CharField(max_length=50)
     seat_no = models.CharField(max_length=50)
     password = models.CharField(max_length=100, default='Kite@12345')
+    # Derived at ingest: numeric hall/seat (None if not a number) and the
+    # department identified from the register number ('' if unknown)
+    hall_no_int = models.IntegerField(null=True, blank=True)
+    seat_no_int = models.IntegerField(null=True, blank=True)
+    department = models.CharField(max_length=50, blank=True, default='')
 
     class Meta:
-        # Constraint to ensure unique register_no per dataset if needed, 
-        # or globally if we assume one active exam at a time.
-        # User said: "If the admin has Deactivated the dataset, show 'Pending for admin access'".
-        # This implies multiple datasets can exist but only one is active. 
-        # So uniqueness should be per dataset? Or just rely on the active dataset filter.
-        # Let's keep it simple.
-        pass
+        # Multiple datasets can be retained but only one is active, so a
+        # register number is unique per dataset. The constraint's composite
+        # index on (dataset, register_no) also serves the login and hall
+        # ticket lookups, which always filter on both columns.
+        constraints = [
+            models.UniqueConstraint(
+                fields=['dataset', 'register_no'],
+                name='unique_student_register_no_per_dataset',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['dataset', 'department'], name='student_dataset_department'),
+            models.Index(fields=['dataset', 'hall_no_int', 'seat_no_int'], name='student_dataset_hall_seat'),
+        ]
 
     def __str__(self):
         return f"{self.register_no} - {self.name}"
 
+class StudentSnapshot(models.Model):
+    """
+    Ready-to-serve login and hall ticket data for one student, built when a
+    dataset is activated so the student endpoints only do a point lookup and
+    return the stored JSON.
+    """
+    dataset = models.ForeignKey(Dataset, on_delete=models.CASCADE, related_name='snapshots')
+    register_no = models.CharField(max_length=50)
+    password = models.CharField(max_length=100)
+    department = models.CharField(max_length=50, blank=True, default='')
+    login_json = models.TextField()   # LoginView response body
+    ticket_json = models.TextField()  # 'student' object of the HallTicketView response
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['dataset', 'register_no'],
+                name='unique_snapshot_register_no_per_dataset',
+            ),
+        ]
+
+    def __str__(self):
+        return f"Snapshot {self.register_no} (dataset {self.dataset_id})"
+
+class HallSeating(models.Model):
+    """
+    Seating of one exam hall for one date and session, built when a dataset is
+    activated so hall rosters are served without scanning Student.
+    """
+    dataset = models.ForeignKey(Dataset, on_delete=models.CASCADE, related_name='hall_seatings')
+    exam_date = models.DateField(null=True, blank=True)
+    session = models.CharField(max_length=50)
+    hall_no = models.CharField(max_length=50)
+    block = models.CharField(max_length=50)
+    floor = models.CharField(max_length=50)
+    occupancy = models.PositiveIntegerField()
+    seats_json = models.TextField()  # Seat grid, ordered by seat number
+
+    class Meta:
+        ordering = ['exam_date', 'session', 'hall_no']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['dataset', 'exam_date', 'session', 'hall_no'],
+                name='unique_hall_seating_per_dataset',
+            ),
+        ]
+
+    def __str__(self):
+        return f"Hall {self.hall_no} {self.exam_date} {self.session} (dataset {self.dataset_id})"
+
 class HallTicketExam(models.Model):
     """
     Stores exam schedule data for hall tickets.
@@ -47,8 +208,98 @@ class HallTicketExam(models.Model):
     
     class Meta:
         ordering = ['exam_date', 'session']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['department', 'semester', 'course_code'],
+                name='unique_exam_per_department_semester',
+            ),
+        ]
         verbose_name = 'Hall Ticket Exam'
         verbose_name_plural = 'Hall Ticket Exams'
     
     def __str__(self):
         return f"{self.department} - Sem {self.semester} - {self.course_code}"
+
+class ImportJob(models.Model):
+    """
+    Background job on student data: importing an uploaded sheet, or purging
+    datasets.
+    The upload request only stores the file and queues the job; the Dataset
+    is created when the job finishes, so a half-imported dataset is never
+    visible to admins or students.
+    """
+    KIND_IMPORT = 'import'
+    KIND_PURGE = 'purge'
+    KIND_CHOICES = [
+        (KIND_IMPORT, 'Import'),
+        (KIND_PURGE, 'Purge'),
+    ]
+
+    STAGE_QUEUED = 'queued'
+    STAGE_READING = 'reading'
+    STAGE_INSERTING = 'inserting'
+    STAGE_DELETING = 'deleting'
+    STAGE_DONE = 'done'
+    STAGE_FAILED = 'failed'
+    STAGE_CHOICES = [
+        (STAGE_QUEUED, 'Queued'),
+        (STAGE_READING, 'Reading file'),
+        (STAGE_INSERTING, 'Inserting students'),
+        (STAGE_DELETING, 'Deleting students'),
+        (STAGE_DONE, 'Done'),
+        (STAGE_FAILED, 'Failed'),
+    ]
+
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES, default=KIND_IMPORT)
+    file = models.FileField(upload_to='datasets/', blank=True)
+    dataset = models.ForeignKey(Dataset, null=True, blank=True, on_delete=models.SET_NULL, related_name='import_jobs')
+    stage = models.CharField(max_length=20, choices=STAGE_CHOICES, default=STAGE_QUEUED)
+    rows_processed = models.PositiveIntegerField(default=0)
+    duplicates = models.JSONField(default=dict, blank=True)
+    unparsed_dates = models.JSONField(default=dict, blank=True)  # {'count': rows, 'values': [first few]}
+    error = models.TextField(blank=True)
+    content_hash = models.CharField(max_length=64, blank=True, default='', db_index=True)
+    # Client-chosen Idempotency-Key of the upload request, so retries return this job
+    idempotency_key = models.CharField(max_length=100, null=True, blank=True, unique=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    @property
+    def is_finished(self):
+        return self.stage in (self.STAGE_DONE, self.STAGE_FAILED)
+
+    @property
+    def is_stale(self):
+        """
+        Unfinished, but the row went IMPORT_JOB_STALE_SECONDS without an
+        update: the worker running or queueing the job is gone (restart or
+        crash), as running jobs and jobs waiting in a live worker's queue
+        are refreshed every IMPORT_JOB_PROGRESS_INTERVAL.
+        """
+        stale_after = timezone.now() - timedelta(seconds=settings.IMPORT_JOB_STALE_SECONDS)
+        return not self.is_finished and self.updated_at < stale_after
+
+    @property
+    def rows_per_second(self):
+        if not self.started_at:
+            return 0.0
+        end = self.finished_at or timezone.now()
+        elapsed = (end - self.started_at).total_seconds()
+        return round(self.rows_processed / elapsed, 1) if elapsed > 0 else 0.0
+
+    def __str__(self):
+        return f"Import {self.id} - {self.stage}"
+
+class CacheVersion(models.Model):
+    """
+    Version counters shared by every worker process.
+    A counter is bumped whenever the data it guards changes, so process-local
+    caches can revalidate with a single primary-key lookup.
+    """
+    name = models.CharField(max_length=50, primary_key=True)
+    version = models.PositiveBigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.name} v{self.version}"
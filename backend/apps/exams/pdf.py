@@ -0,0 +1,289 @@
+"""
+Minimal PDF writer for printable hall tickets.
+
+Tickets follow the layout of the student hall ticket page (one A4 page per
+semester) using the standard Helvetica fonts, so no font files or PDF library
+are needed. Everything that is the same for many tickets is rendered and
+compressed once by HallTicketTemplate: the page frame is shared by every
+ticket and the schedule table by every student of a department. Each page
+then lists those shared content streams and adds a small one with the
+student's name and register number.
+
+This module has no Django dependencies so process pool workers can import it
+cheaply.
+"""
+import zlib
+
+PAGE_WIDTH = 595   # A4, in points
+PAGE_HEIGHT = 842
+LEFT = 48
+RIGHT = PAGE_WIDTH - LEFT
+
+# Department code to full name, as printed on the ticket
+DEPARTMENT_FULL_NAMES = {
+    'AI&ML': 'B.E. Computer Science and Engineering\n(Artificial Intelligence and Machine Learning)',
+    'AI&DS': 'B.E. Computer Science and Engineering\n(Artificial Intelligence and Data Science)',
+    'CSE': 'B.E. Computer Science and Engineering',
+    'ECE': 'B.E. Electronics and Communication Engineering',
+    'IT': 'B.Tech. Information Technology',
+    'MECH': 'B.E. Mechanical Engineering',
+    'R&A': 'B.E. Robotics and Automation',
+    'CSBS': 'B.E. Computer Science and Business Systems',
+    'CYS': 'B.E. Cyber Security',
+}
+
+INSTRUCTIONS = [
+    '1. In case of candidates who have been Readmitted/Transferred, this Hall Ticket is valid only for the',
+    '    current semester examinations.',
+    '2. Any discrepancy in the Name / Date of Birth and missing of Photograph or incorrect Photograph, if any',
+    '    is to be updated to the COE office for the correction.',
+    '3. Instructions printed overleaf are to be followed strictly.',
+]
+
+# Exam schedule table: (header, left edge, width)
+COLUMNS = [
+    ('S.No', 48, 36),
+    ('Course Code', 84, 80),
+    ('Course Title', 164, 215),
+    ('Exam Date', 379, 90),
+    ('Session', 469, 78),
+]
+TABLE_TOP = 570
+HEADER_HEIGHT = 20
+ROW_HEIGHT = 18
+ROWS_PER_PAGE = 18
+
+BLUE = '0.118 0.227 0.541'   # Tailwind blue-900
+
+# Glyph widths (1/1000 em) of ASCII 32-126 in the standard fonts
+_HELVETICA_WIDTHS = [int(w) for w in (
+    '278 278 355 556 556 889 667 191 333 333 389 584 278 333 278 278 556 556 556 556 556 556 556 556 '
+    '556 556 278 278 584 584 584 556 1015 667 667 722 722 667 611 778 722 278 500 667 556 833 722 778 '
+    '667 778 722 667 611 722 667 944 667 667 611 278 278 278 469 556 333 556 556 500 556 556 278 556 '
+    '556 222 222 500 222 833 556 556 556 556 333 500 278 556 500 722 500 500 500 334 260 334 584'
+).split()]
+_HELVETICA_BOLD_WIDTHS = [int(w) for w in (
+    '278 333 474 556 556 889 722 238 333 333 389 584 278 333 278 278 556 556 556 556 556 556 556 556 '
+    '556 556 333 333 584 584 584 611 975 722 722 722 722 667 611 778 722 278 556 722 611 833 722 778 '
+    '667 778 722 667 611 722 667 944 667 667 611 333 278 333 584 556 333 556 611 556 611 556 333 611 '
+    '611 278 278 556 278 889 611 611 611 611 389 556 333 611 556 778 556 556 500 389 280 389 584'
+).split()]
+
+# Font resource name -> (PDF base font, glyph widths)
+FONTS = {
+    'F1': ('Helvetica', _HELVETICA_WIDTHS),
+    'F2': ('Helvetica-Bold', _HELVETICA_BOLD_WIDTHS),
+    'F3': ('Helvetica-BoldOblique', _HELVETICA_BOLD_WIDTHS),
+}
+
+
+def text_width(text, font, size):
+    """
+    Width of `text` in points; characters outside ASCII count as a digit.
+    """
+    widths = FONTS[font][1]
+    total = 0
+    for char in text:
+        code = ord(char) - 32
+        total += widths[code] if 0 <= code < len(widths) else 556
+    return total * size / 1000
+
+
+def fit_text(text, font, size, width):
+    """
+    Truncate `text` with '...' so it fits in `width` points.
+    """
+    if text_width(text, font, size) <= width:
+        return text
+    while text and text_width(text + '...', font, size) > width:
+        text = text[:-1]
+    return text + '...'
+
+
+def _escape(text):
+    """
+    PDF literal string for `text` (WinAnsi; unsupported characters become '?').
+    """
+    data = str(text).encode('cp1252', errors='replace')
+    return data.replace(b'\\', b'\\\\').replace(b'(', b'\\(').replace(b')', b'\\)')
+
+
+class _Canvas:
+    """
+    Accumulates content stream operators.
+    """
+    def __init__(self):
+        self.ops = [b'q']
+
+    def text(self, x, y, text, font='F1', size=10, color='0 0 0'):
+        self.ops.append(
+            b'BT /%s %g Tf %s rg %g %g Td (%s) Tj ET'
+            % (font.encode(), size, color.encode(), x, y, _escape(text))
+        )
+
+    def centered(self, y, text, font='F1', size=10, color='0 0 0'):
+        self.text((PAGE_WIDTH - text_width(text, font, size)) / 2, y, text, font, size, color)
+
+    def rect(self, x, y, width, height, fill=None, stroke='0 0 0', line_width=1):
+        if fill:
+            self.ops.append(b'%s rg %g %g %g %g re f' % (fill.encode(), x, y, width, height))
+        if stroke:
+            self.ops.append(b'%s RG %g w %g %g %g %g re S' % (stroke.encode(), line_width, x, y, width, height))
+
+    def line(self, x1, y1, x2, y2, stroke='0 0 0', line_width=1):
+        self.ops.append(b'%s RG %g w %g %g m %g %g l S' % (stroke.encode(), line_width, x1, y1, x2, y2))
+
+    def stream_body(self, compress=True):
+        """
+        Object body of the content stream.
+        """
+        data = b'\n'.join(self.ops + [b'Q'])
+        if compress:
+            data = zlib.compress(data)
+            return b'<< /Length %d /Filter /FlateDecode >>\nstream\n%s\nendstream' % (len(data), data)
+        return b'<< /Length %d >>\nstream\n%s\nendstream' % (len(data), data)
+
+
+def _frame_stream(title):
+    """
+    Everything printed identically on every page: border, institute header,
+    examination title, student detail boxes and labels, table header,
+    session timings and instructions.
+    """
+    canvas = _Canvas()
+    canvas.rect(36, 36, PAGE_WIDTH - 72, PAGE_HEIGHT - 72, stroke=BLUE, line_width=3)
+
+    canvas.centered(780, 'KGiSL Institute of Technology', 'F3', 18, BLUE)
+    canvas.centered(765, 'Affiliated to Anna University, Approved by AICTE, Recognised by UGC,', 'F1', 8)
+    canvas.centered(755, 'Accredited by NAAC & NBA', 'F1', 8)
+    canvas.centered(745, '365, KGiSL Campus, Thudiyalur Road, Saravanampatti, Coimbatore-641035', 'F1', 8)
+    canvas.line(90, 737, PAGE_WIDTH - 90, 737, stroke='0.8 0.8 0.8')
+    canvas.centered(724, 'OFFICE OF THE CONTROLLER OF EXAMINATIONS', 'F2', 10)
+
+    canvas.rect(LEFT, 690, RIGHT - LEFT, 22, fill=BLUE, stroke=None)
+    canvas.centered(697, title, 'F2', 10, '1 1 1')
+
+    for x, y, label in ((LEFT, 636, 'NAME OF THE CANDIDATE:'), (302, 636, 'REGISTER NUMBER:'),
+                        (LEFT, 586, 'DEPARTMENT:'), (302, 586, 'SEMESTER:')):
+        canvas.rect(x, y, 245, 44, stroke='0.7 0.7 0.7')
+        canvas.text(x + 8, y + 31, label, 'F2', 8)
+
+    canvas.rect(LEFT, TABLE_TOP - HEADER_HEIGHT, RIGHT - LEFT, HEADER_HEIGHT, fill=BLUE, stroke=None)
+    for header, x, _ in COLUMNS:
+        canvas.text(x + 6, TABLE_TOP - 14, header, 'F2', 9, '1 1 1')
+
+    canvas.rect(LEFT, 150, RIGHT - LEFT, 50, fill='0.996 0.988 0.91', stroke='0.79 0.54 0.02', line_width=2)
+    canvas.centered(186, 'SESSION TIMINGS', 'F2', 11, '0.44 0.25 0.07')
+    canvas.centered(171, 'FN : 09:00 AM TO 12:00 PM', 'F2', 9)
+    canvas.centered(159, 'AN : 01:00 PM TO 04:00 PM', 'F2', 9)
+
+    canvas.line(LEFT, 138, RIGHT, 138, stroke='0.8 0.8 0.8', line_width=2)
+    for index, line in enumerate(INSTRUCTIONS):
+        canvas.text(LEFT, 126 - index * 11, line, 'F1', 7.5, '0.3 0.3 0.3')
+    return canvas.stream_body()
+
+
+def _schedule_stream(department, semester, exams, first_row):
+    """
+    Department, semester and exam table rows of one page, shared by every
+    student of the department.
+    """
+    canvas = _Canvas()
+    full_name = DEPARTMENT_FULL_NAMES.get(department, department).split('\n')
+    for index, line in enumerate(full_name[:2]):
+        canvas.text(LEFT + 8, 612 - index * 11, fit_text(line, 'F2', 8.5, 229), 'F2', 8.5)
+    canvas.text(310, 600, semester, 'F2', 11)
+
+    y = TABLE_TOP - HEADER_HEIGHT
+    for offset, exam in enumerate(exams):
+        top = y - offset * ROW_HEIGHT
+        shade = '1 1 1' if offset % 2 == 0 else '0.976 0.98 0.984'
+        canvas.rect(LEFT, top - ROW_HEIGHT, RIGHT - LEFT, ROW_HEIGHT, fill=shade, stroke='0.6 0.6 0.6', line_width=0.5)
+        values = [str(first_row + offset + 1), exam['course_code'], exam['course_title'],
+                  exam['exam_date'], exam['session']]
+        for (_, x, width), value, font in zip(COLUMNS, values, ('F1', 'F2', 'F1', 'F1', 'F2')):
+            canvas.text(x + 6, top - 12.5, fit_text(str(value), font, 8.5, width - 10), font, 8.5)
+    return canvas.stream_body()
+
+
+def _student_stream(register_no, name):
+    canvas = _Canvas()
+    canvas.text(LEFT + 8, 646, fit_text(name, 'F2', 12, 229), 'F2', 12)
+    canvas.text(310, 646, register_no, 'F2', 12)
+    return canvas.stream_body(compress=False)
+
+
+class HallTicketTemplate:
+    """
+    Renders hall ticket PDFs for students of the given department schedules
+    ({department: {semester: [exam, ...]}}, as served by the hall ticket
+    endpoint) under the given examination title. Shared page content is
+    rendered once, at construction.
+    """
+    # Objects every ticket starts with: catalog, page tree, fonts, frame stream
+    CATALOG, PAGES, FRAME = 1, 2, 6
+
+    def __init__(self, schedules, title):
+        self._frame = _frame_stream(title)
+        self._fonts = [
+            b'<< /Type /Font /Subtype /Type1 /BaseFont /%s /Encoding /WinAnsiEncoding >>' % base.encode()
+            for base, _ in FONTS.values()
+        ]
+        self._pages = {}  # department -> list of page schedule streams
+        for department, semesters in schedules.items():
+            pages = []
+            for semester, exams in semesters.items():
+                for start in range(0, max(len(exams), 1), ROWS_PER_PAGE):
+                    pages.append(_schedule_stream(department, semester, exams[start:start + ROWS_PER_PAGE], start))
+            if pages:
+                self._pages[department] = pages
+
+    def has_department(self, department):
+        return department in self._pages
+
+    def render(self, register_no, name, department):
+        """
+        PDF bytes of one student's hall ticket, or None when the department
+        has no exams.
+        """
+        pages = self._pages.get(department)
+        if not pages:
+            return None
+
+        student = _student_stream(register_no, name)
+        font_refs = b' '.join(b'/%s %d 0 R' % (font.encode(), 3 + index) for index, font in enumerate(FONTS))
+        objects = [None, None] + self._fonts + [self._frame, student]
+        student_ref = len(objects)
+        page_refs = []
+        for schedule in pages:
+            objects.append(schedule)
+            objects.append(
+                b'<< /Type /Page /Parent %d 0 R /MediaBox [0 0 %d %d] /Contents [%d 0 R %d 0 R %d 0 R] '
+                b'/Resources << /Font << %s >> >> >>'
+                % (self.PAGES, PAGE_WIDTH, PAGE_HEIGHT, self.FRAME, len(objects), student_ref, font_refs)
+            )
+            page_refs.append(len(objects))
+        objects[0] = b'<< /Type /Catalog /Pages %d 0 R >>' % self.PAGES
+        objects[1] = b'<< /Type /Pages /Kids [%s] /Count %d >>' % (
+            b' '.join(b'%d 0 R' % ref for ref in page_refs), len(page_refs)
+        )
+        return _assemble(objects)
+
+
+def _assemble(objects):
+    """
+    Serialize numbered object bodies (1-based, in order) with the xref table.
+    """
+    out = [b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n']
+    offsets = []
+    position = len(out[0])
+    for number, body in enumerate(objects, 1):
+        chunk = b'%d 0 obj\n%s\nendobj\n' % (number, body)
+        offsets.append(position)
+        out.append(chunk)
+        position += len(chunk)
+
+    out.append(b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1))
+    out.extend(b'%010d 00000 n \n' % offset for offset in offsets)
+    out.append(b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (len(objects) + 1, position))
+    return b''.join(out)
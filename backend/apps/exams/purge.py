@@ -0,0 +1,74 @@
+"""
+Bulk removal of datasets and their students.
+
+Deleting a Dataset through the ORM makes Django's cascade collector walk
+every related Student row inside one long transaction. Here the children are
+removed set-wise first, in bounded batches that each commit on their own, so
+locks stay short while students keep logging in. Only rows of the datasets
+chosen up front are touched: an import committing meanwhile keeps its
+students.
+"""
+from django.conf import settings
+from django.db import transaction
+
+from .cache import invalidate_active_dataset
+from .columnar import delete_column_snapshot
+from .models import ActiveDataset, Dataset, Student, StudentSnapshot
+from .tickets import delete_hall_ticket_archives
+
+
+def _delete_in_batches(model, dataset_ids, batch_size, progress=None, done=0):
+    """
+    Delete a model's rows belonging to dataset_ids, batch_size rows per
+    transaction. Returns the running total of deleted rows.
+    """
+    while True:
+        with transaction.atomic():
+            pks = list(
+                model.objects.filter(dataset_id__in=dataset_ids)
+                .values_list('pk', flat=True)[:batch_size]
+            )
+            if not pks:
+                return done
+            # These models have no dependents, so this is a single DELETE
+            model.objects.filter(pk__in=pks).delete()
+        done += len(pks)
+        if progress:
+            progress(done)
+
+
+def purge_datasets(dataset_ids=None, batch_size=None, progress=None):
+    """
+    Delete the given datasets (all datasets when dataset_ids is None)
+    together with their students, snapshots, stats, column snapshots and
+    hall ticket archives.
+
+    The active dataset is taken offline first. If given, progress(rows) is
+    called with the number of student rows deleted so far.
+    Returns the number of student rows deleted.
+    """
+    batch_size = batch_size or settings.PURGE_BATCH_SIZE
+
+    datasets = Dataset.objects.all() if dataset_ids is None else Dataset.objects.filter(pk__in=dataset_ids)
+    datasets = list(datasets.only('pk', 'file'))
+    dataset_ids = [dataset.pk for dataset in datasets]
+    if not dataset_ids:
+        return 0
+
+    with transaction.atomic():
+        if ActiveDataset.deactivate(dataset_ids):
+            invalidate_active_dataset()
+
+    _delete_in_batches(StudentSnapshot, dataset_ids, batch_size)
+    deleted = _delete_in_batches(Student, dataset_ids, batch_size, progress)
+
+    with transaction.atomic():
+        # Only small per-dataset rows are left for the cascade collector
+        Dataset.objects.filter(pk__in=dataset_ids).delete()
+        invalidate_active_dataset()
+
+    for dataset in datasets:
+        delete_column_snapshot(dataset)
+        delete_hall_ticket_archives(dataset)
+
+    return deleted
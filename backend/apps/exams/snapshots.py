@@ -0,0 +1,114 @@
+"""
+Per-student snapshots of the login and hall ticket responses.
+
+Activating a dataset materializes one StudentSnapshot per student, so the
+student endpoints skip per-request cleanup and formatting and serve stored
+JSON. Datasets without snapshots (activated before snapshots existed) fall
+back to building the same payload from the Student row.
+"""
+import json
+
+from django.conf import settings
+from django.db import transaction
+
+from .models import Student, StudentSnapshot
+
+
+def dump_json(data):
+    """
+    Serialize like DRF's JSONRenderer (compact, UTF-8) so stored payloads are
+    byte-for-byte what the views used to render.
+    """
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':'))
+
+
+def login_payload(student):
+    """
+    Body of a successful student login.
+    """
+    return {
+        'role': 'student',
+        'name': student.name,
+        'register_no': student.register_no,
+        'course_code': student.course_code,
+        'course_title': student.course_title,
+        'exam_date': student.exam_date.strftime('%Y-%m-%d') if student.exam_date else None,
+        'session': student.session,
+        'hall_no': student.hall_no,  # Normalized at upload (no decimals)
+        'seat_no': student.seat_no
+    }
+
+
+def ticket_student_payload(student):
+    """
+    'student' object of the hall ticket response.
+    """
+    return {
+        'name': student.name,
+        'register_no': student.register_no,
+        'department': student.department or None
+    }
+
+
+def student_snapshot(student):
+    """
+    Unsaved StudentSnapshot of a Student row.
+    """
+    return StudentSnapshot(
+        dataset_id=student.dataset_id,
+        register_no=student.register_no,
+        password=student.password,
+        department=student.department,
+        login_json=dump_json(login_payload(student)),
+        ticket_json=dump_json(ticket_student_payload(student)),
+    )
+
+
+def build_student_snapshots(dataset, batch_size=None):
+    """
+    Materialize snapshots for every student of a dataset, replacing any
+    built before. Returns the number of snapshots created.
+    """
+    batch_size = batch_size or settings.STUDENT_INSERT_BATCH_SIZE
+
+    created = 0
+    batch = []
+    with transaction.atomic():
+        StudentSnapshot.objects.filter(dataset=dataset).delete()
+        for student in Student.objects.filter(dataset=dataset).iterator(chunk_size=batch_size):
+            batch.append(student_snapshot(student))
+            if len(batch) >= batch_size:
+                StudentSnapshot.objects.bulk_create(batch)
+                created += len(batch)
+                batch = []
+        if batch:
+            StudentSnapshot.objects.bulk_create(batch)
+            created += len(batch)
+    return created
+
+
+def refresh_student_snapshots(dataset, register_nos, batch_size=None):
+    """
+    Rebuild the snapshots of some students of a dataset after their rows
+    changed: snapshots of students no longer in the dataset are dropped.
+    Does nothing for datasets without snapshots (built at activation).
+    Returns the number of snapshots written.
+    """
+    batch_size = batch_size or settings.STUDENT_INSERT_BATCH_SIZE
+    register_nos = list(register_nos)
+
+    if not register_nos or not StudentSnapshot.objects.filter(dataset=dataset).exists():
+        return 0
+
+    created = 0
+    with transaction.atomic():
+        for start in range(0, len(register_nos), batch_size):
+            chunk = register_nos[start:start + batch_size]
+            StudentSnapshot.objects.filter(dataset=dataset, register_no__in=chunk).delete()
+            snapshots = [
+                student_snapshot(student)
+                for student in Student.objects.filter(dataset=dataset, register_no__in=chunk)
+            ]
+            StudentSnapshot.objects.bulk_create(snapshots)
+            created += len(snapshots)
+    return created
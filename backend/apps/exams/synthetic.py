@@ -0,0 +1,195 @@
+"""
+Synthetic student data for load tests and parser benchmarks.
+
+Students are generated deterministically from a seed, so runs on different
+commits see the same data: register numbers cycle through the department
+codes, exams are spread over consecutive days in FN/AN sessions and each
+session fills real-looking halls (Academic Block 1xx-6xx, Innovation Block
+3xxx-5xxx) 30 seats at a time.
+
+write_student_sheet() saves such students as an upload would arrive: as
+.xlsx, legacy .xls (needs the optional xlwt package) or an HTML table saved
+with an .xls name, with header spellings varying between sheets.
+"""
+import html
+import random
+import string
+from datetime import date, timedelta
+
+import pandas as pd
+from django.conf import settings
+from django.db import transaction
+
+from .cache import invalidate_active_dataset
+from .halls import build_hall_seatings
+from .ingest import build_students
+from .models import ActiveDataset, Dataset, DatasetStats, Student
+from .snapshots import build_student_snapshots
+from .utils import DEPARTMENT_CODE_MAP, STUDENT_FIELDS, normalize_student_frame
+
+FIRST_NAMES = [
+    'Aarav', 'Abinaya', 'Arjun', 'Deepika', 'Dharun', 'Gokul', 'Harini', 'Janani',
+    'Karthik', 'Keerthana', 'Madhan', 'Meena', 'Naveen', 'Nivetha', 'Pranav', 'Priya',
+    'Rahul', 'Sanjay', 'Shalini', 'Sowmya', 'Surya', 'Swetha', 'Vignesh', 'Yazhini',
+]
+
+COURSES = [
+    ('24UCS171', 'Python Programming'),
+    ('24UCS161', 'Computational Thinking'),
+    ('24UMA161', 'Calculus and Matrix Algebra'),
+    ('24UCH171', 'Engineering Chemistry'),
+    ('24UEN171', 'Communicative English for Engineers and Professionals'),
+    ('24UPY171', 'Physics for Engineering and Technology'),
+    ('24UTA161', 'Heritage of Tamils'),
+]
+
+# Header spellings seen in exported student sheets, per field
+HEADER_VARIANTS = {
+    'register_no': ['Registerno', 'Register No', 'REGISTER NUMBER', 'Reg No', 'Roll No'],
+    'name': ['StudentName', 'Student Name', 'Name', 'NAME OF THE STUDENT'],
+    'course_code': ['Coursecode', 'Course Code', 'Subject Code', 'Sub Code'],
+    'course_title': ['CourseTitle', 'Course Title', 'Subject Title'],
+    'exam_date': ['ExamDate', 'Exam Date', 'Date'],
+    'session': ['ExamSession', 'Session', 'Exam Session'],
+    'hall_no': ['ExamHallNumber', 'Hall No', 'Exam Hall', 'Room'],
+    'seat_no': ['ExamSeatNumber', 'Seat No', 'Seat Number'],
+}
+
+SHEET_FORMATS = ['xlsx', 'xls', 'html']
+
+SEATS_PER_HALL = 30
+HALLS = (
+    [floor * 100 + room for floor in range(1, 7) for room in range(1, 21)]
+    + [block * 1000 + room for block in range(3, 6) for room in range(1, 41)]
+)
+
+
+def synthetic_students(count, seed=0, first_exam_date=date(2025, 12, 19), exam_days=10):
+    """
+    DataFrame of `count` students with the STUDENT_FIELDS columns, as
+    normalize_student_frame would return them (exam_date as datetime.date).
+    """
+    rng = random.Random(seed)
+    codes = list(DEPARTMENT_CODE_MAP)
+    slots = exam_days * 2
+
+    rows = []
+    for i in range(count):
+        serial = i // len(codes)
+        slot, position = i % slots, i // slots
+        course_code, course_title = rng.choice(COURSES)
+        seat = position % SEATS_PER_HALL + 1 + SEATS_PER_HALL * (position // (SEATS_PER_HALL * len(HALLS)))
+        rows.append((
+            f'7117{20 + serial // 1000:02d}{codes[i % len(codes)]}{serial % 1000:03d}',
+            f'{rng.choice(FIRST_NAMES)} {rng.choice(string.ascii_uppercase)}',
+            course_code,
+            course_title,
+            first_exam_date + timedelta(days=slot // 2),
+            'FN' if slot % 2 == 0 else 'AN',
+            str(HALLS[(position // SEATS_PER_HALL) % len(HALLS)]),
+            str(seat),
+        ))
+    return pd.DataFrame(rows, columns=STUDENT_FIELDS)
+
+
+def seed_dataset(count, seed=0, activate=True, batch_size=None):
+    """
+    Create a dataset of `count` synthetic students, with stats, snapshots and
+    hall seatings as an upload followed by activation would. Returns the
+    Dataset. The dataset has no file on disk.
+    """
+    batch_size = batch_size or settings.STUDENT_INSERT_BATCH_SIZE
+    students = normalize_student_frame(synthetic_students(count, seed))
+
+    with transaction.atomic():
+        dataset = Dataset.objects.create(file=f'datasets/synthetic-{count}-{seed}.xlsx')
+        Student.objects.bulk_create(build_students(dataset, students), batch_size=batch_size)
+        DatasetStats.objects.create(
+            dataset=dataset,
+            row_count=count,
+            distinct_students=count,
+            distinct_halls=students['hall_no'].nunique(),
+            first_exam_date=students['exam_date'].min() if count else None,
+            last_exam_date=students['exam_date'].max() if count else None,
+        )
+
+    build_student_snapshots(dataset)
+    build_hall_seatings(dataset)
+    Dataset.objects.filter(pk=dataset.pk).update(snapshots_revision=dataset.revision)
+    if activate:
+        with transaction.atomic():
+            dataset = ActiveDataset.toggle(dataset.id)
+            invalidate_active_dataset()
+    return dataset
+
+
+def _sheet_rows(count, seed):
+    """
+    Header and rows of a synthetic student sheet. Hall and seat numbers are
+    numeric cells, as spreadsheet exports store them.
+    """
+    rng = random.Random(seed)
+    header = [rng.choice(HEADER_VARIANTS[field]) for field in STUDENT_FIELDS]
+    students = synthetic_students(count, seed)
+    rows = (
+        (register_no, name, course_code, course_title, exam_date, session, int(hall_no), int(seat_no))
+        for register_no, name, course_code, course_title, exam_date, session, hall_no, seat_no
+        in students.itertuples(index=False, name=None)
+    )
+    return header, rows
+
+
+def _write_xlsx(path, header, rows):
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet('Students')
+    sheet.append(header)
+    for row in rows:
+        sheet.append(row)
+    workbook.save(path)
+
+
+def _write_xls(path, header, rows):
+    try:
+        import xlwt
+    except ImportError:
+        raise RuntimeError('Writing .xls sheets needs the xlwt package (pip install xlwt)')
+
+    workbook = xlwt.Workbook()
+    sheet = workbook.add_sheet('Students')
+    date_style = xlwt.easyxf(num_format_str='YYYY-MM-DD')
+    for col, value in enumerate(header):
+        sheet.write(0, col, value)
+    for row_index, row in enumerate(rows, 1):
+        if row_index > 65535:
+            raise RuntimeError('.xls sheets hold at most 65535 data rows')
+        for col, value in enumerate(row):
+            if isinstance(value, date):
+                sheet.write(row_index, col, value, date_style)
+            else:
+                sheet.write(row_index, col, value)
+    workbook.save(path)
+
+
+def _write_html(path, header, rows):
+    # Exported by web portals as an HTML table with an .xls extension
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('<html><head><meta charset="utf-8"></head><body><table border="1">\n<tr>')
+        f.write(''.join(f'<th>{html.escape(value)}</th>' for value in header))
+        f.write('</tr>\n')
+        for row in rows:
+            f.write('<tr>' + ''.join(f'<td>{html.escape(str(value))}</td>' for value in row) + '</tr>\n')
+        f.write('</table></body></html>\n')
+
+
+def write_student_sheet(path, count, sheet_format='xlsx', seed=0):
+    """
+    Write a sheet of `count` synthetic students to `path` in one of
+    SHEET_FORMATS, with header spellings picked from HEADER_VARIANTS by seed.
+    """
+    writers = {'xlsx': _write_xlsx, 'xls': _write_xls, 'html': _write_html}
+    if sheet_format not in writers:
+        raise ValueError(f'Unknown sheet format {sheet_format!r}; expected one of {SHEET_FORMATS}')
+    header, rows = _sheet_rows(count, seed)
+    writers[sheet_format](path, header, rows)
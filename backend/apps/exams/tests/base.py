@@ -0,0 +1,85 @@
+"""
+Shared fixtures for the exams tests.
+
+ExamsTestCase seeds a small active dataset and a hall ticket schedule and
+gives every test a throwaway MEDIA_ROOT, so behaviour tests stay fast;
+the query and latency budgets run on the larger fixture of BudgetTestCase
+(see test_budgets.py).
+"""
+import math
+import shutil
+import tempfile
+from datetime import date
+
+from django.conf import settings
+from django.db import connection
+from django.test import TestCase, override_settings
+
+from ..cache import clear_local_caches
+from ..ingest import build_students
+from ..models import Dataset, HallTicketExam, Student
+from ..synthetic import seed_dataset, synthetic_students
+from ..utils import normalize_student_frame
+
+PASSWORD = 'Kite@12345'
+
+
+def create_unactivated_dataset(count, seed=0):
+    """
+    A dataset with students only, as an upload leaves it before activation.
+    """
+    dataset = Dataset.objects.create(file=f'datasets/unactivated-{count}-{seed}.xlsx')
+    students = normalize_student_frame(synthetic_students(count, seed))
+    Student.objects.bulk_create(build_students(dataset, students), batch_size=1000)
+    return dataset
+
+
+def insert_batches(model, rows):
+    """
+    Most INSERT statements needed for `rows` objects written in batches of
+    STUDENT_INSERT_BATCH_SIZE; backends such as SQLite split each batch
+    further to stay under their parameter limit.
+    """
+    batch_size = settings.STUDENT_INSERT_BATCH_SIZE
+    fields = [field for field in model._meta.concrete_fields if not field.primary_key]
+    backend_size = connection.ops.bulk_batch_size(fields, [None] * batch_size)
+    return math.ceil(rows / batch_size) * math.ceil(batch_size / min(batch_size, backend_size))
+
+
+@override_settings(CACHE_REVALIDATE_SECONDS=600, METRICS_DIR='', IMPORT_JOB_WORKERS=0)
+class ExamsTestCase(TestCase):
+    # Synthetic students in the active dataset
+    fixture_students = 200
+
+    @classmethod
+    def setUpTestData(cls):
+        HallTicketExam.objects.bulk_create([
+            HallTicketExam(department=department, semester='I', course_code=code, course_title=title,
+                           exam_date=date(2025, 12, 19 + day), session='FN')
+            for department in ('AI&ML', 'CSE', 'IT')
+            for day, (code, title) in enumerate([('24UCS171', 'Python Programming'),
+                                                 ('24UMA161', 'Calculus and Matrix Algebra')])
+        ])
+        cls.dataset = seed_dataset(cls.fixture_students)
+        cls.register_no = (
+            Student.objects.filter(dataset=cls.dataset, department='AI&ML')
+            .values_list('register_no', flat=True).first()
+        )
+
+    def setUp(self):
+        # Caches are per process; start every test cold
+        clear_local_caches()
+        self.addCleanup(clear_local_caches)
+        # Uploads and column snapshots go to a throwaway media root
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        media = override_settings(MEDIA_ROOT=self.directory)
+        media.enable()
+        self.addCleanup(media.disable)
+
+    def login(self, register_no=None, password=PASSWORD):
+        return self.client.post('/api/login/', {'username': register_no or self.register_no, 'password': password},
+                                content_type='application/json')
+
+    def hall_ticket(self):
+        return self.client.get(f'/api/hall-ticket/?register_no={self.register_no}')
@@ -0,0 +1,47 @@
+"""
+Dataset activation and the snapshots and seating maps it builds.
+"""
+from django.db.models import F
+
+from ..models import Dataset, HallSeating, Student, StudentSnapshot
+from .base import ExamsTestCase, create_unactivated_dataset
+
+
+class ActivationTests(ExamsTestCase):
+    def setUp(self):
+        super().setUp()
+        self.other = create_unactivated_dataset(100, seed=1)
+        self.other_register_no = (
+            Student.objects.filter(dataset=self.other).order_by('pk').values_list('register_no', flat=True).first()
+        )
+
+    def toggle(self, dataset):
+        response = self.client.post(f'/api/datasets/{dataset.id}/toggle/')
+        self.assertEqual(response.status_code, 200)
+        return response.json()['is_active']
+
+    def test_activation_builds_snapshots_once(self):
+        self.assertTrue(self.toggle(self.other))
+        self.assertEqual(StudentSnapshot.objects.filter(dataset=self.other).count(), 100)
+        self.assertEqual(Dataset.objects.get(pk=self.other.pk).snapshots_revision, 0)
+        built = set(StudentSnapshot.objects.filter(dataset=self.other).values_list('pk', flat=True))
+
+        # Re-activating an unchanged dataset reuses them
+        self.assertFalse(self.toggle(self.other))
+        self.assertTrue(self.toggle(self.other))
+        self.assertEqual(set(StudentSnapshot.objects.filter(dataset=self.other).values_list('pk', flat=True)), built)
+
+    def test_reactivation_rebuilds_snapshots_of_changed_students(self):
+        self.toggle(self.other)
+        self.toggle(self.other)
+        # Students changed while inactive without their snapshots following
+        Student.objects.filter(dataset=self.other, register_no=self.other_register_no).update(seat_no='77')
+        Dataset.objects.filter(pk=self.other.pk).update(revision=F('revision') + 1)
+
+        self.assertTrue(self.toggle(self.other))
+        self.assertEqual(self.login(self.other_register_no).json()['seat_no'], '77')
+        self.assertEqual(StudentSnapshot.objects.filter(dataset=self.other).count(), 100)
+        seated = Student.objects.filter(dataset=self.other).exclude(hall_no='').count()
+        self.assertEqual(sum(HallSeating.objects.filter(dataset=self.other).values_list('occupancy', flat=True)),
+                         seated)
+        self.assertEqual(Dataset.objects.get(pk=self.other.pk).snapshots_revision, 1)
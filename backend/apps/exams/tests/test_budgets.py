@@ -0,0 +1,233 @@
+"""
+Query-count and latency budgets for the API views.
+
+Each endpoint may run a fixed number of database queries against a seeded
+active dataset, so an N+1 loop or a cache that stopped caching fails here
+instead of on exam day. Wall-time budgets are coarse (several times what a
+laptop needs on the fixture) so that they only catch a view that became
+slower by an order of magnitude; PERF_BUDGET_SCALE scales them for a slow
+CI machine, and PERF_BUDGETS=0 skips them where timings mean nothing (e.g.
+under a profiler or coverage).
+"""
+import os
+import statistics
+import time
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from ..cache import invalidate_active_dataset
+from ..models import Dataset, DatasetStats, HallSeating, ImportJob, Student, StudentSnapshot
+from ..synthetic import write_student_sheet
+from .base import ExamsTestCase, create_unactivated_dataset, insert_batches
+
+CHECK_LATENCY = os.environ.get('PERF_BUDGETS', '1') != '0'
+LATENCY_SCALE = float(os.environ.get('PERF_BUDGET_SCALE', '1'))
+
+# Steady-state queries per request, once the per-worker caches are warm
+QUERY_BUDGETS = {
+    'login': 1,
+    'hall_ticket': 1,
+    'dataset_list': 2,
+    'hall_list': 0,
+    'hall_seating': 1,
+    'job_status': 1,
+}
+# Activating a dataset (dataset lock, snapshots, seating maps, pointer swap)
+# and a whole upload (job row, parse, stats), besides one INSERT per batch of rows
+TOGGLE_QUERY_BUDGET = 22
+UPLOAD_QUERY_BUDGET = 15
+
+# Median seconds per request, and seconds for the bulk operations
+LATENCY_BUDGETS = {
+    'login': 0.02,
+    'hall_ticket': 0.02,
+    'dataset_list': 0.05,
+    'hall_list': 0.02,
+    'toggle': 5.0,
+    'upload': 10.0,
+}
+
+
+class BudgetTestCase(ExamsTestCase):
+    fixture_students = 2000
+
+    def assertQueryBudget(self, budget, request):
+        """
+        Warm the caches with one request, then check the next one stays
+        within the budget. Returns the response.
+        """
+        request()
+        with CaptureQueriesContext(connection) as queries:
+            response = request()
+        self.assertLessEqual(
+            len(queries), budget,
+            f'{len(queries)} queries, budget {budget}:\n' + '\n'.join(q['sql'] for q in queries)
+        )
+        return response
+
+    def assertLatencyBudget(self, budget, request, repeat=30):
+        """
+        Median wall time of `repeat` warm requests must stay within the
+        budget (scaled by PERF_BUDGET_SCALE).
+        """
+        if not CHECK_LATENCY:
+            self.skipTest('wall-time budgets are off with PERF_BUDGETS=0')
+        request()
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            request()
+            timings.append(time.perf_counter() - started)
+        median = statistics.median(timings)
+        self.assertLessEqual(median, budget * LATENCY_SCALE, f'median {median * 1000:.1f} ms')
+
+    def assertElapsedBudget(self, seconds, budget):
+        """
+        Wall time of one bulk operation, checked unless PERF_BUDGETS=0.
+        """
+        if CHECK_LATENCY:
+            self.assertLessEqual(seconds, budget * LATENCY_SCALE, f'{seconds:.2f}s')
+
+    def assertBulkQueryBudget(self, queries, budget, inserts):
+        """
+        Bulk operations: at most insert_batches() INSERTs into each table of
+        `inserts` (table -> (model, rows)), plus `budget` other queries.
+        """
+        other = len(queries)
+        for table, (model, rows) in inserts.items():
+            count = sum(1 for query in queries if query['sql'].startswith(f'INSERT INTO "{table}"'))
+            self.assertLessEqual(count, insert_batches(model, rows), f'INSERTs into {table}')
+            other -= count
+        self.assertLessEqual(
+            other, budget,
+            f'{other} queries, budget {budget}:\n' + '\n'.join(q['sql'][:200] for q in queries)
+        )
+
+
+class StudentEndpointBudgetTests(BudgetTestCase):
+    def test_login_queries(self):
+        response = self.assertQueryBudget(QUERY_BUDGETS['login'], self.login)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['register_no'], self.register_no)
+
+    def test_cold_login_queries(self):
+        # Version counter, active pointer, snapshot
+        with self.assertNumQueries(3):
+            self.assertEqual(self.login().status_code, 200)
+
+    def test_failed_login_queries(self):
+        # A snapshot miss is final: no second lookup in the students table
+        response = self.assertQueryBudget(QUERY_BUDGETS['login'], lambda: self.login(password='wrong'))
+        self.assertEqual(response.status_code, 401)
+        response = self.assertQueryBudget(QUERY_BUDGETS['login'], lambda: self.login('0000UNKNOWN'))
+        self.assertEqual(response.status_code, 401)
+
+    def test_login_without_current_snapshots_reads_students(self):
+        StudentSnapshot.objects.filter(dataset=self.dataset).delete()
+        Dataset.objects.filter(pk=self.dataset.pk).update(snapshots_revision=None)
+        invalidate_active_dataset()
+        # Snapshot miss, then the students table
+        response = self.assertQueryBudget(2, self.login)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['register_no'], self.register_no)
+        self.assertEqual(self.assertQueryBudget(2, lambda: self.login(password='wrong')).status_code, 401)
+
+    def test_hall_ticket_queries(self):
+        response = self.assertQueryBudget(QUERY_BUDGETS['hall_ticket'], self.hall_ticket)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['student']['department'], 'AI&ML')
+
+    def test_hall_ticket_schedule_cached_per_department(self):
+        self.hall_ticket()
+        other = (
+            Student.objects.filter(dataset=self.dataset, department='AI&ML')
+            .exclude(register_no=self.register_no).values_list('register_no', flat=True).first()
+        )
+        with self.assertNumQueries(QUERY_BUDGETS['hall_ticket']):
+            self.assertEqual(self.client.get(f'/api/hall-ticket/?register_no={other}').status_code, 200)
+
+    def test_login_latency(self):
+        self.assertLatencyBudget(LATENCY_BUDGETS['login'], self.login)
+
+    def test_hall_ticket_latency(self):
+        self.assertLatencyBudget(LATENCY_BUDGETS['hall_ticket'], self.hall_ticket)
+
+
+class HallEndpointBudgetTests(BudgetTestCase):
+    def test_hall_list_queries(self):
+        response = self.assertQueryBudget(QUERY_BUDGETS['hall_list'], lambda: self.client.get('/api/halls/'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()), HallSeating.objects.filter(dataset=self.dataset).count())
+
+    def test_hall_seating_queries(self):
+        response = self.assertQueryBudget(QUERY_BUDGETS['hall_seating'], lambda: self.client.get('/api/halls/101/'))
+        self.assertEqual(response.status_code, 200)
+
+    def test_hall_list_latency(self):
+        self.assertLatencyBudget(LATENCY_BUDGETS['hall_list'], lambda: self.client.get('/api/halls/'))
+
+
+class AdminEndpointBudgetTests(BudgetTestCase):
+    def test_dataset_list_queries(self):
+        response = self.assertQueryBudget(QUERY_BUDGETS['dataset_list'], lambda: self.client.get('/api/datasets/'))
+        self.assertEqual(response.status_code, 200)
+
+    def test_dataset_list_queries_independent_of_dataset_count(self):
+        # Datasets without stats are counted in one grouped query, not one each
+        for _ in range(10):
+            create_unactivated_dataset(20)
+        for i in range(10):
+            dataset = Dataset.objects.create(file=f'datasets/with-stats-{i}.xlsx')
+            DatasetStats.objects.create(dataset=dataset, row_count=0, distinct_students=0, distinct_halls=0)
+
+        response = self.assertQueryBudget(QUERY_BUDGETS['dataset_list'], lambda: self.client.get('/api/datasets/'))
+        self.assertEqual(len(response.json()), 21)
+        response = self.assertQueryBudget(QUERY_BUDGETS['dataset_list'] + 1,
+                                          lambda: self.client.get('/api/datasets/?page=1&page_size=5'))
+        self.assertEqual(response.json()['count'], 21)
+
+    def test_dataset_list_latency(self):
+        self.assertLatencyBudget(LATENCY_BUDGETS['dataset_list'], lambda: self.client.get('/api/datasets/'))
+
+    def test_toggle_queries_and_latency(self):
+        dataset = create_unactivated_dataset(self.fixture_students, seed=1)
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            response = self.client.post(f'/api/datasets/{dataset.id}/toggle/')
+            elapsed = time.perf_counter() - started
+
+        self.assertEqual(response.json()['is_active'], True)
+        self.assertEqual(StudentSnapshot.objects.filter(dataset=dataset).count(), self.fixture_students)
+        self.assertBulkQueryBudget(queries, TOGGLE_QUERY_BUDGET, {
+            StudentSnapshot._meta.db_table: (StudentSnapshot, self.fixture_students),
+            HallSeating._meta.db_table: (HallSeating, HallSeating.objects.filter(dataset=dataset).count()),
+        })
+        self.assertElapsedBudget(elapsed, LATENCY_BUDGETS['toggle'])
+
+        # The new dataset is served at the steady-state cost straight away
+        register_no = Student.objects.filter(dataset=dataset).values_list('register_no', flat=True).first()
+        self.assertQueryBudget(QUERY_BUDGETS['login'], lambda: self.login(register_no))
+
+    def test_upload_queries_and_latency(self):
+        path = os.path.join(self.directory, 'students.xlsx')
+        write_student_sheet(path, self.fixture_students, seed=2)
+
+        with open(path, 'rb') as f:
+            with CaptureQueriesContext(connection) as queries:
+                started = time.perf_counter()
+                # The import job runs inline once the upload commits
+                with self.captureOnCommitCallbacks(execute=True):
+                    response = self.client.post('/api/upload/', {'file': f})
+                elapsed = time.perf_counter() - started
+
+        self.assertEqual(response.status_code, 202)
+        job = ImportJob.objects.get(pk=response.json()['job_id'])
+        self.assertEqual(job.stage, ImportJob.STAGE_DONE, job.error)
+        self.assertEqual(Student.objects.filter(dataset=job.dataset).count(), self.fixture_students)
+        self.assertBulkQueryBudget(queries, UPLOAD_QUERY_BUDGET, {
+            Student._meta.db_table: (Student, self.fixture_students),
+        })
+        self.assertElapsedBudget(elapsed, LATENCY_BUDGETS['upload'])
+
+        self.assertQueryBudget(QUERY_BUDGETS['job_status'], lambda: self.client.get(response.json()['status_url']))
@@ -0,0 +1,435 @@
+"""
+Uploads, deltas, column snapshots and the dataset maintenance commands.
+"""
+import json
+import math
+import os
+import tracemalloc
+from datetime import date
+from io import StringIO
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from ..cache import ACTIVE_DATASET
+from ..columnar import (
+    ColumnSnapshotWriter, build_column_snapshot, delete_column_snapshot, load_student_frame, read_manifest,
+    snapshot_path,
+)
+from ..ingest import load_dataset_students, load_hall_ticket_schedule, read_student_sheet
+from ..models import CacheVersion, Dataset, DatasetStats, HallSeating, HallTicketExam, ImportJob, Student, StudentSnapshot
+from ..purge import purge_datasets
+from ..synthetic import HEADER_VARIANTS, synthetic_students, write_student_sheet
+from ..utils import STUDENT_FIELDS, normalize_student_frame
+from .base import ExamsTestCase
+
+# Applying a small delta: lock, diff, writes, stats, snapshots and seating
+# maps of the changed rows, besides reading the stored rows in batches
+DELTA_QUERY_BUDGET = 30
+
+
+class UploadDeduplicationTests(ExamsTestCase):
+    def setUp(self):
+        super().setUp()
+        self.path = os.path.join(self.directory, 'students.xlsx')
+        write_student_sheet(self.path, 200, seed=3)
+
+    def upload(self, idempotency_key=None):
+        headers = {'HTTP_IDEMPOTENCY_KEY': idempotency_key} if idempotency_key else {}
+        with open(self.path, 'rb') as f, self.captureOnCommitCallbacks(execute=True):
+            return self.client.post('/api/upload/', {'file': f}, **headers)
+
+    def test_identical_file_returns_existing_dataset(self):
+        first = self.upload()
+        job = ImportJob.objects.get(pk=first.json()['job_id'])
+        self.assertEqual(job.stage, ImportJob.STAGE_DONE, job.error)
+        self.assertEqual(len(job.dataset.content_hash), 64)
+
+        students = Student.objects.count()
+        # No job, parse or insert: one lookup by hash
+        with self.assertNumQueries(1):
+            second = self.upload()
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second.json()['duplicate'], True)
+        self.assertEqual(second.json()['dataset_id'], job.dataset_id)
+        self.assertEqual(second.json()['job_id'], job.id)
+        self.assertEqual(ImportJob.objects.count(), 1)
+        self.assertEqual(Student.objects.count(), students)
+
+    def test_identical_file_imported_again_after_its_dataset_was_deleted(self):
+        first = self.upload()
+        ImportJob.objects.get(pk=first.json()['job_id']).dataset.delete()
+        second = self.upload()
+        self.assertEqual(second.status_code, 202)
+        self.assertNotEqual(second.json()['job_id'], first.json()['job_id'])
+        self.assertEqual(ImportJob.objects.get(pk=second.json()['job_id']).stage, ImportJob.STAGE_DONE)
+
+    def test_file_replaced_by_a_delta_is_imported_again(self):
+        first = self.upload()
+        dataset_id = ImportJob.objects.get(pk=first.json()['job_id']).dataset_id
+        # A full corrected sheet replaces every student of the dataset
+        corrected = os.path.join(self.directory, 'corrected.xlsx')
+        write_student_sheet(corrected, 200, seed=5)
+        with open(corrected, 'rb') as f:
+            self.assertEqual(self.client.post(f'/api/datasets/{dataset_id}/delta/', {'file': f}).status_code, 200)
+
+        second = self.upload()
+        self.assertEqual(second.status_code, 202)
+        self.assertNotEqual(second.json()['job_id'], first.json()['job_id'])
+        self.assertNotIn('duplicate', second.json())
+
+        # The corrected sheet is what the dataset holds now
+        self.path = corrected
+        third = self.upload()
+        self.assertEqual(third.status_code, 200)
+        self.assertEqual(third.json()['dataset_id'], dataset_id)
+
+    def test_idempotency_key_replays_first_job(self):
+        first = self.upload('retry-1')
+        ImportJob.objects.get(pk=first.json()['job_id']).dataset.delete()
+        # Same key: the first job is returned even though the file would import again
+        with self.assertNumQueries(1):
+            second = self.upload('retry-1')
+        self.assertEqual(second.status_code, 202)
+        self.assertEqual(second.json()['job_id'], first.json()['job_id'])
+        self.assertEqual(ImportJob.objects.count(), 1)
+
+    def test_idempotency_key_retries_failed_job(self):
+        with mock.patch('apps.exams.jobs.ingest_students', side_effect=ValueError('Unreadable sheet')), \
+                self.assertLogs('apps.exams.jobs', 'ERROR'):
+            first = self.upload('retry-3')
+        failed = ImportJob.objects.get(pk=first.json()['job_id'])
+        self.assertEqual(failed.stage, ImportJob.STAGE_FAILED)
+
+        second = self.upload('retry-3')
+        self.assertEqual(second.status_code, 202)
+        self.assertNotEqual(second.json()['job_id'], failed.id)
+        retried = ImportJob.objects.get(pk=second.json()['job_id'])
+        self.assertEqual(retried.stage, ImportJob.STAGE_DONE, retried.error)
+        self.assertEqual(retried.idempotency_key, 'retry-3')
+        # Further retries get the job that succeeded
+        self.assertEqual(self.upload('retry-3').json()['job_id'], retried.id)
+
+    def test_idempotency_key_reused_for_another_file_is_rejected(self):
+        self.upload('retry-2')
+        write_student_sheet(self.path, 200, seed=4)
+        response = self.upload('retry-2')
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(ImportJob.objects.count(), 1)
+
+
+class DeltaUploadTests(ExamsTestCase):
+    def setUp(self):
+        super().setUp()
+        self.students = synthetic_students(self.fixture_students)
+
+    def post_delta(self, students, **data):
+        path = os.path.join(self.directory, 'delta.xlsx')
+        sheet = students.rename(columns={field: HEADER_VARIANTS[field][0] for field in STUDENT_FIELDS})
+        sheet.to_excel(path, index=False)
+        with open(path, 'rb') as f:
+            return self.client.post(f'/api/datasets/{self.dataset.id}/delta/', {'file': f, **data})
+
+    def corrected_students(self):
+        students = self.students.copy()
+        # Move three students, drop one and add two
+        students.loc[:2, 'seat_no'] = ['91', '92', '93']
+        removed = students.loc[3, 'register_no']
+        students = students.drop(index=3)
+        added = synthetic_students(self.fixture_students + 2).tail(2)
+        return pd.concat([students, added]), removed, added['register_no'].tolist()
+
+    def test_full_sheet_writes_only_the_difference(self):
+        students, removed, added = self.corrected_students()
+        moved = self.students.loc[0, 'register_no']
+        version = CacheVersion.objects.get(name=ACTIVE_DATASET).version
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.post_delta(students)
+        summary = response.json()
+        self.assertEqual(response.status_code, 200, summary)
+        self.assertEqual((summary['added'], summary['updated'], summary['removed'], summary['unchanged']),
+                         (2, 3, 1, self.fixture_students - 4))
+        self.assertEqual(summary['register_nos']['removed'], [removed])
+        self.assertEqual(sorted(summary['register_nos']['added']), sorted(added))
+        # Reading the stored rows for the diff is the only per-row cost
+        self.assertLessEqual(len(queries), DELTA_QUERY_BUDGET + math.ceil(self.fixture_students / settings.STUDENT_INSERT_BATCH_SIZE))
+
+        self.assertEqual(Student.objects.filter(dataset=self.dataset).count(), self.fixture_students + 1)
+        self.assertFalse(Student.objects.filter(dataset=self.dataset, register_no=removed).exists())
+        self.assertEqual(DatasetStats.objects.get(dataset=self.dataset).distinct_students, self.fixture_students + 1)
+        self.assertEqual(CacheVersion.objects.get(name=ACTIVE_DATASET).version, version + 1)
+
+        # Snapshots and seating maps follow the change
+        self.assertEqual(self.login(moved).json()['seat_no'], '91')
+        self.assertEqual(self.login(added[0]).status_code, 200)
+        self.assertEqual(self.login(removed).status_code, 401)
+        self.assertEqual(StudentSnapshot.objects.filter(dataset=self.dataset).count(), self.fixture_students + 1)
+        seats = sum(HallSeating.objects.filter(dataset=self.dataset).values_list('occupancy', flat=True))
+        self.assertEqual(seats, self.fixture_students + 1)
+
+    def test_partial_sheet_keeps_missing_students(self):
+        students, _, _ = self.corrected_students()
+        response = self.post_delta(students.head(10), partial='true')
+        summary = response.json()
+        self.assertEqual((summary['added'], summary['updated'], summary['removed']), (0, 3, 0))
+        self.assertEqual(Student.objects.filter(dataset=self.dataset).count(), self.fixture_students)
+
+    def test_dry_run_writes_nothing(self):
+        students, _, _ = self.corrected_students()
+        response = self.post_delta(students, dry_run='true')
+        self.assertEqual(response.json()['updated'], 3)
+        self.assertEqual(Student.objects.filter(dataset=self.dataset, seat_no='91').count(), 0)
+        self.assertEqual(Student.objects.filter(dataset=self.dataset).count(), self.fixture_students)
+
+    def test_corrupt_sheet_is_a_bad_request(self):
+        path = os.path.join(self.directory, 'corrupt.xlsx')
+        with open(path, 'wb') as f:
+            f.write(b'PK\x03\x04' + b'\x00' * 200)
+        with open(path, 'rb') as f:
+            response = self.client.post(f'/api/datasets/{self.dataset.id}/delta/', {'file': f})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('Could not parse file', response.json()['error'])
+
+    def test_large_sheet_is_refused(self):
+        with self.settings(STUDENT_DELTA_MAX_BYTES=1024):
+            response = self.post_delta(self.students)
+        self.assertEqual(response.status_code, 413)
+        self.assertEqual(Student.objects.filter(dataset=self.dataset, seat_no='91').count(), 0)
+
+    def test_identical_sheet_keeps_caches(self):
+        version = CacheVersion.objects.get(name=ACTIVE_DATASET).version
+        summary = self.post_delta(self.students).json()
+        self.assertEqual(summary['unchanged'], self.fixture_students)
+        self.assertEqual(CacheVersion.objects.get(name=ACTIVE_DATASET).version, version)
+
+
+class ColumnSnapshotTests(ExamsTestCase):
+    def setUp(self):
+        super().setUp()
+        self.path = os.path.join(self.directory, 'students.xlsx')
+        write_student_sheet(self.path, 500, seed=4)
+
+    def import_sheet(self):
+        with open(self.path, 'rb') as f, self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/upload/', {'file': f})
+        return ImportJob.objects.get(pk=response.json()['job_id']).dataset
+
+    def test_snapshot_matches_parsed_sheet(self):
+        dataset = self.import_sheet()
+        self.assertTrue(os.path.isdir(snapshot_path(dataset)))
+
+        with open(self.path, 'rb') as f:
+            parsed, _, _ = read_student_sheet(f)
+        students, source = load_dataset_students(dataset)
+        self.assertEqual(source, 'snapshot')
+        pd.testing.assert_frame_equal(students, parsed.reset_index(drop=True), check_dtype=False)
+        self.assertEqual(students['exam_date'].iloc[0], parsed['exam_date'].iloc[0])
+        self.assertIsInstance(students['hall_no_int'].iloc[0], int)
+
+    def test_missing_snapshot_falls_back_to_file(self):
+        dataset = self.import_sheet()
+        delete_column_snapshot(dataset)
+        students, source = load_dataset_students(dataset)
+        self.assertEqual(source, 'file')
+        self.assertEqual(len(students), 500)
+
+    def test_snapshot_follows_delta_and_purge(self):
+        dataset = self.import_sheet()
+        students = load_student_frame(dataset).head(10).copy()
+        students['seat_no'] = '99'
+        path = os.path.join(self.directory, 'delta.xlsx')
+        students[STUDENT_FIELDS].rename(
+            columns={field: HEADER_VARIANTS[field][0] for field in STUDENT_FIELDS}
+        ).to_excel(path, index=False)
+        with open(path, 'rb') as f:
+            self.client.post(f'/api/datasets/{dataset.id}/delta/', {'file': f, 'partial': 'true'})
+
+        dataset.refresh_from_db()
+        self.assertEqual(read_manifest(dataset)['revision'], dataset.revision)
+        stored = load_student_frame(dataset)
+        self.assertEqual(len(stored), 500)
+        self.assertEqual((stored['seat_no'] == '99').sum(), 10)
+
+        purge_datasets([dataset.id])
+        self.assertFalse(os.path.exists(snapshot_path(dataset)))
+
+    def test_stale_snapshot_is_refused(self):
+        dataset = self.import_sheet()
+        self.assertEqual(read_manifest(dataset)['revision'], 0)
+        # A change whose rewrite never landed
+        dataset.revision += 1
+        dataset.save(update_fields=['revision'])
+        self.assertIsNone(read_manifest(dataset))
+        self.assertIsNone(load_student_frame(dataset))
+        with self.assertRaisesMessage(CommandError, 'no up-to-date column snapshot'):
+            call_command('reload_dataset', dataset=dataset.id, source='snapshot', stdout=StringIO())
+
+        self.assertTrue(build_column_snapshot(dataset))
+        self.assertEqual(read_manifest(dataset)['revision'], 1)
+
+    def test_failed_rewrite_removes_snapshot(self):
+        dataset = self.import_sheet()
+        with mock.patch('apps.exams.columnar.np.save', side_effect=OSError('disk full')), \
+                self.assertLogs('apps.exams.columnar', 'ERROR'):
+            self.assertFalse(build_column_snapshot(dataset))
+        self.assertFalse(os.path.exists(snapshot_path(dataset)))
+        # No temporary directory is left behind either
+        self.assertFalse([name for name in os.listdir(os.path.dirname(snapshot_path(dataset)))
+                          if name.endswith('.tmp')])
+
+    def test_writer_merges_chunks_without_keeping_them(self):
+        chunks = []
+        for number in range(6):
+            students = normalize_student_frame(synthetic_students(2000, seed=number))
+            students['register_no'] += f'-{number}'
+            chunks.append(students)
+
+        writer = ColumnSnapshotWriter()
+        self.addCleanup(writer.close)
+        tracemalloc.start()
+        self.addCleanup(tracemalloc.stop)
+        writer.append(chunks[0])
+        before = tracemalloc.get_traced_memory()[0]
+        for students in chunks[1:]:
+            writer.append(students)
+        # 10000 more distinct register numbers and names, none of them kept
+        self.assertLess(tracemalloc.get_traced_memory()[0] - before, 100_000)
+        tracemalloc.stop()
+
+        directory = os.path.join(self.directory, 'students.columns')
+        self.assertTrue(writer.write(directory))
+        expected = pd.concat(chunks, ignore_index=True)
+        for field in ('register_no', 'name', 'hall_no'):
+            values = np.load(os.path.join(directory, f'{field}.values.npy'))
+            codes = np.load(os.path.join(directory, f'{field}.codes.npy'))
+            self.assertEqual(len(values), expected[field].nunique())
+            self.assertEqual(values[codes].tolist(), expected[field].tolist())
+        self.assertEqual(np.load(os.path.join(directory, 'exam_date.npy')).astype(object).tolist(),
+                         expected['exam_date'].tolist())
+
+    def test_older_rewrite_keeps_newer_snapshot(self):
+        dataset = self.import_sheet()
+        directory = snapshot_path(dataset)
+        writer = ColumnSnapshotWriter()
+        writer.append(load_student_frame(dataset).head(5))
+        self.assertTrue(writer.write(directory, revision=3))
+        self.assertFalse(writer.write(directory, revision=2))
+        with open(os.path.join(directory, 'manifest.json')) as f:
+            self.assertEqual(json.load(f)['revision'], 3)
+        self.assertFalse([name for name in os.listdir(os.path.dirname(directory)) if name.endswith('.tmp')])
+
+
+class MaintenanceCommandTests(ExamsTestCase):
+    def setUp(self):
+        super().setUp()
+        path = os.path.join(self.directory, 'students.xlsx')
+        write_student_sheet(path, 500, seed=5)
+        with open(path, 'rb') as f, self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/upload/', {'file': f})
+        self.imported = ImportJob.objects.get(pk=response.json()['job_id']).dataset
+
+    def command(self, name, **options):
+        out = StringIO()
+        call_command(name, stdout=out, **options)
+        return out.getvalue()
+
+    def write_schedule(self, rows):
+        import openpyxl
+        path = os.path.join(self.directory, 'schedule.xlsx')
+        workbook = openpyxl.Workbook()
+        workbook.remove(workbook.active)
+        for department, exams in rows.items():
+            sheet = workbook.create_sheet(department)
+            sheet.append(['Semester', 'CourseCode', 'CourseTitle', 'ExamDate', 'ExamSession'])
+            for exam in exams:
+                sheet.append(exam)
+        workbook.save(path)
+        return path
+
+    def test_reload_rewrites_only_changed_students(self):
+        stale = list(Student.objects.filter(dataset=self.imported).values_list('pk', flat=True)[:3])
+        Student.objects.filter(pk__in=stale).update(department='', hall_no_int=None)
+
+        output = self.command('reload_dataset', dataset=self.imported.id, source='snapshot', dry_run=True)
+        self.assertIn('0 added, 3 updated, 0 removed, 497 unchanged', output)
+        self.assertEqual(Student.objects.filter(pk__in=stale, department='').count(), 3)
+
+        output = self.command('reload_dataset', dataset=self.imported.id, source='snapshot')
+        self.assertIn('3 updated', output)
+        self.assertFalse(Student.objects.filter(pk__in=stale, department='').exists())
+        self.assertEqual(Student.objects.filter(dataset=self.imported).count(), 500)
+
+        # Re-parsing the file finds nothing left to fix
+        output = self.command('reload_dataset', dataset=self.imported.id)
+        self.assertIn('0 updated, 0 removed, 500 unchanged', output)
+
+    def test_reload_from_file_does_not_undo_a_delta(self):
+        students = synthetic_students(510, seed=5)
+        students.loc[:49, 'seat_no'] = '99'
+        path = os.path.join(self.directory, 'corrected.xlsx')
+        students.rename(columns={field: HEADER_VARIANTS[field][0] for field in STUDENT_FIELDS}).to_excel(
+            path, index=False)
+        with open(path, 'rb') as f:
+            response = self.client.post(f'/api/datasets/{self.imported.id}/delta/', {'file': f})
+        self.assertEqual(response.json()['added'], 10)
+        self.assertEqual(response.json()['updated'], 50)
+        corrected_hash = Dataset.objects.get(pk=self.imported.id).content_hash
+
+        with self.assertRaisesMessage(CommandError, 'changed by a delta'):
+            self.command('reload_dataset', dataset=self.imported.id)
+        self.assertEqual(Student.objects.filter(dataset=self.imported).count(), 510)
+
+        # Forced, the reload goes back to the upload and to its hash
+        output = self.command('reload_dataset', dataset=self.imported.id, force=True)
+        self.assertIn('0 added, 50 updated, 10 removed', output)
+        dataset = Dataset.objects.get(pk=self.imported.id)
+        self.assertEqual(dataset.content_hash, self.imported.content_hash)
+        self.assertNotEqual(dataset.content_hash, corrected_hash)
+        # The corrected sheet is no longer taken for the stored one
+        with open(path, 'rb') as f, self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/upload/', {'file': f})
+        self.assertNotIn('duplicate', response.json())
+        # The file describes the dataset again, so it reloads without force
+        output = self.command('reload_dataset', dataset=self.imported.id)
+        self.assertIn('0 updated, 0 removed, 500 unchanged', output)
+
+    def test_check_dataset_reports_stale_derived_data(self):
+        output = self.command('check_dataset')
+        self.assertIn(f'students: {self.fixture_students}', output)
+        self.assertIn('No consistency problems found', output)
+
+        StudentSnapshot.objects.filter(dataset=self.dataset, register_no=self.register_no).delete()
+        Student.objects.filter(dataset=self.dataset, register_no=self.register_no).update(exam_date=None)
+        out = StringIO()
+        with self.assertRaisesMessage(CommandError, '1 consistency problems found'):
+            call_command('check_dataset', sample=5, stdout=out)
+        self.assertIn(f'{self.fixture_students - 1} student snapshots for {self.fixture_students} students', out.getvalue())
+        self.assertIn('1 students without an exam date', out.getvalue())
+        self.assertIn(f'missing exam date: {self.register_no}', out.getvalue())
+
+    def test_schedule_replace_upserts_by_course(self):
+        path = self.write_schedule({'CSE': [
+            ('I', '24UCS171', 'Python Programming', date(2025, 12, 29), 'AN'),
+            ('I', '24UCS172', 'Data Structures', date(2025, 12, 30), 'FN'),
+        ]})
+        kept = HallTicketExam.objects.get(department='CSE', course_code='24UCS171').pk
+
+        summary = load_hall_ticket_schedule(path)
+        self.assertTrue(summary['skipped'])
+        summary = load_hall_ticket_schedule(path, replace=True, dry_run=True)
+        self.assertEqual((summary['created'], summary['updated'], summary['removed']), (1, 1, 5))
+        self.assertEqual(HallTicketExam.objects.count(), 6)
+
+        output = self.command('load_hall_tickets', file=path, replace=True)
+        self.assertIn('1 created, 1 updated, 5 removed, 0 unchanged', output)
+        exam = HallTicketExam.objects.get(department='CSE', course_code='24UCS171')
+        self.assertEqual((exam.pk, exam.exam_date, exam.session), (kept, date(2025, 12, 29), 'AN'))
+        self.assertEqual(HallTicketExam.objects.count(), 2)
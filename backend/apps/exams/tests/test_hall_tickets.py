@@ -0,0 +1,112 @@
+"""
+The hall ticket endpoint, its per-department schedule cache and the
+printable PDF tickets.
+"""
+import json
+import os
+import re
+import zipfile
+import zlib
+
+from django.test import SimpleTestCase, override_settings
+
+from ..cache import get_department_semesters_json, invalidate_hall_ticket_schedule
+from ..models import HallTicketExam, Student
+from ..pdf import HallTicketTemplate, ROWS_PER_PAGE
+from ..tickets import archive_path, write_hall_tickets_zip
+from .base import ExamsTestCase
+
+EXAM = {'course_code': '24UCS171', 'course_title': 'Python Programming', 'exam_date': '2025-12-19',
+        'session': 'FN'}
+
+
+class DepartmentScheduleCacheTests(ExamsTestCase):
+    def test_department_without_exams_is_cached(self):
+        # Version counter, the department's exams, whether any schedule exists
+        with self.assertNumQueries(3):
+            self.assertEqual(get_department_semesters_json('ECE'), '')
+        with self.assertNumQueries(0):
+            self.assertEqual(get_department_semesters_json('ECE'), '')
+
+        register_no = (
+            Student.objects.filter(dataset=self.dataset, department='ECE')
+            .values_list('register_no', flat=True).first()
+        )
+        self.client.get(f'/api/hall-ticket/?register_no={register_no}')
+        # Only the snapshot lookup
+        with self.assertNumQueries(1):
+            response = self.client.get(f'/api/hall-ticket/?register_no={register_no}')
+        self.assertEqual(response.status_code, 404)
+
+    def test_unloaded_schedule_answers_503_until_loaded(self):
+        HallTicketExam.objects.all().delete()
+        invalidate_hall_ticket_schedule()
+        self.assertIsNone(get_department_semesters_json('AI&ML'))
+        self.assertEqual(self.hall_ticket().status_code, 503)
+
+        HallTicketExam.objects.create(department='AI&ML', semester='I', course_code='24UCS171',
+                                      course_title='Python Programming', exam_date='2025-12-19', session='FN')
+        invalidate_hall_ticket_schedule()
+        response = self.hall_ticket()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(response.json()['semesters']), ['I'])
+
+
+class PdfWriterTests(SimpleTestCase):
+    def render(self, schedules, department='CSE', title='TEST EXAMINATIONS'):
+        return HallTicketTemplate(schedules, title).render('711623UCS089', 'Student (One)', department)
+
+    def test_document_structure(self):
+        pdf = self.render({'CSE': {'I': [EXAM], 'III': [EXAM]}})
+        self.assertTrue(pdf.startswith(b'%PDF-1.4'))
+        self.assertTrue(pdf.endswith(b'%%EOF\n'))
+        self.assertIn(b'/Count 2', pdf)
+
+        # Every xref entry points at its object, and startxref at the table
+        startxref = int(re.search(rb'startxref\n(\d+)', pdf).group(1))
+        self.assertTrue(pdf[startxref:].startswith(b'xref'))
+        offsets = re.findall(rb'(\d{10}) 00000 n', pdf)
+        for number, offset in enumerate(offsets, 1):
+            self.assertTrue(pdf[int(offset):].startswith(b'%d 0 obj' % number))
+
+    def test_long_schedules_span_pages(self):
+        pdf = self.render({'CSE': {'I': [EXAM] * (ROWS_PER_PAGE + 1)}})
+        self.assertIn(b'/Count 2', pdf)
+
+    def test_student_text_is_escaped(self):
+        self.assertIn(rb'(Student \(One\)) Tj', self.render({'CSE': {'I': [EXAM]}}))
+
+    def test_title(self):
+        pdf = self.render({'CSE': {'I': [EXAM]}}, title='SUPPLEMENTARY EXAMINATIONS - APR 2026')
+        streams = re.findall(rb'/FlateDecode >>\nstream\n(.*?)\nendstream', pdf, re.DOTALL)
+        self.assertTrue(any(b'(SUPPLEMENTARY EXAMINATIONS - APR 2026)' in zlib.decompress(stream)
+                            for stream in streams))
+
+    def test_department_without_exams(self):
+        self.assertIsNone(self.render({'CSE': {'I': [EXAM]}}, department='ECE'))
+
+
+@override_settings(HALL_TICKET_PDF_WORKERS=1)
+class HallTicketArchiveTests(ExamsTestCase):
+    def test_endpoint_serves_rendered_archives_only(self):
+        response = self.client.get('/api/hall-tickets/pdf/?department=AI%26ML')
+        self.assertEqual(response.status_code, 404)
+        self.assertIn('render_hall_tickets', response.json()['error'])
+
+        stats = write_hall_tickets_zip(self.dataset, 'AI&ML')
+        self.assertEqual(stats['path'], archive_path(self.dataset, 'AI&ML'))
+        self.assertEqual(os.listdir(os.path.dirname(stats['path'])), [os.path.basename(stats['path'])])
+
+        response = self.client.get('/api/hall-tickets/pdf/?department=AI%26ML')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('hall_tickets_AI_ML.zip', response['Content-Disposition'])
+        path = os.path.join(self.directory, 'download.zip')
+        with open(path, 'wb') as f:
+            f.write(b''.join(response.streaming_content))
+        with zipfile.ZipFile(path) as archive:
+            names = archive.namelist()
+            summary = json.loads(archive.read('summary.json'))
+        students = Student.objects.filter(dataset=self.dataset, department='AI&ML').count()
+        self.assertEqual(summary['tickets'], students)
+        self.assertEqual(len(names), students + 1)
+        self.assertTrue(all(name.startswith('AI&ML/') for name in names[:-1]))
@@ -0,0 +1,56 @@
+"""
+Hall blocks and floors, and the cached hall listing.
+"""
+import re
+
+from django.conf import settings
+from django.test import SimpleTestCase
+
+from .. import cache
+from ..cache import get_hall_summaries, invalidate_active_dataset
+from ..halls import FLOORS, INNOVATION_BLOCK, UNKNOWN, get_block_from_hall_no, get_floor_from_hall_no
+from .base import ExamsTestCase
+
+# The student hall seating page resolves floors on its own
+HALL_SEATING_PAGE = settings.BASE_DIR.parent / 'frontend' / 'src' / 'app' / 'student' / 'hall-seating' / 'page.tsx'
+
+
+def page_floors():
+    """
+    {block: [(first, last, floor)]} as written in the hall seating page.
+    """
+    source = HALL_SEATING_PAGE.read_text()
+    floors = {}
+    for block, body in re.findall(r"block === '([^']+)'\) \{(.*?)\}", source, re.DOTALL):
+        floors[block] = [
+            (int(first), int(last), floor) for first, last, floor in
+            re.findall(r"hallNum >= (\d+) && hallNum <= (\d+)\) return '([^']+)'", body)
+        ]
+    return floors
+
+
+class FloorTests(SimpleTestCase):
+    def test_blocks(self):
+        self.assertEqual(get_block_from_hall_no(None), UNKNOWN)
+        self.assertEqual(get_block_from_hall_no(99), UNKNOWN)
+        self.assertEqual(get_block_from_hall_no(101), 'Academic Block')
+        self.assertEqual(get_block_from_hall_no(2001), INNOVATION_BLOCK)
+
+    def test_innovation_block_floors(self):
+        for hall_no, floor in ((1001, 'First Floor'), (2001, 'Second Floor'), (3005, 'Third Floor'),
+                               (5999, 'Fifth Floor'), (6000, UNKNOWN)):
+            with self.subTest(hall_no=hall_no):
+                self.assertEqual(get_floor_from_hall_no(hall_no, INNOVATION_BLOCK), floor)
+
+    def test_floors_match_the_student_page(self):
+        if not HALL_SEATING_PAGE.exists():
+            self.skipTest('frontend sources not available')
+        self.assertEqual(page_floors(), FLOORS)
+
+
+class HallSummaryCacheTests(ExamsTestCase):
+    def test_invalidation_drops_the_cached_listing(self):
+        get_hall_summaries(self.dataset)
+        self.assertIsNotNone(cache._hall_summaries)
+        invalidate_active_dataset()
+        self.assertIsNone(cache._hall_summaries)
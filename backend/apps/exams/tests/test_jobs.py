@@ -0,0 +1,78 @@
+"""
+Background import jobs and their status endpoint.
+"""
+import os
+from datetime import timedelta
+
+from django.core.files.base import ContentFile
+from django.test import override_settings
+from django.utils import timezone
+
+from ..jobs import _queued, run_import_job
+from ..models import Dataset, ImportJob
+from ..synthetic import HEADER_VARIANTS, synthetic_students, write_student_sheet
+from ..utils import STUDENT_FIELDS
+from .base import ExamsTestCase
+
+
+class ImportJobTests(ExamsTestCase):
+    def status(self, job):
+        return self.client.get(f'/api/jobs/{job.id}/').json()
+
+    def test_import_job_creates_dataset(self):
+        path = os.path.join(self.directory, 'students.xlsx')
+        write_student_sheet(path, 50, seed=7)
+        with open(path, 'rb') as f, self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/upload/', {'file': f})
+        status = self.client.get(response.json()['status_url']).json()
+        self.assertEqual(status['stage'], ImportJob.STAGE_DONE)
+        self.assertEqual(status['students_count'], 50)
+        self.assertEqual(Dataset.objects.get(pk=status['dataset_id']).students.count(), 50)
+
+    @override_settings(STUDENT_INGEST_CHUNK_SIZE=4)
+    def test_unparseable_dates_are_logged_and_reported(self):
+        students = synthetic_students(10, seed=3)[STUDENT_FIELDS]
+        students['exam_date'] = ['TBA', '31-31-2025', '', 'TBA', '19-12-2025'] * 2
+        path = os.path.join(self.directory, 'students.xlsx')
+        students.rename(columns={field: HEADER_VARIANTS[field][0] for field in STUDENT_FIELDS}).to_excel(
+            path, index=False)
+        with open(path, 'rb') as f:
+            job = ImportJob.objects.create(file=ContentFile(f.read(), name='students.xlsx'))
+
+        with self.assertLogs('apps.exams.ingest', 'WARNING') as logs:
+            run_import_job(job.id)
+
+        status = self.status(job)
+        self.assertEqual(status['stage'], ImportJob.STAGE_DONE)
+        self.assertEqual(status['unparsed_dates'], {'count': 6, 'values': ['TBA', '31-31-2025']})
+        # One aggregated warning per chunk with bad dates, not one per row
+        self.assertEqual(len(logs.records), 3)
+        self.assertIn("Chunk 1: 3 exam dates could not be read, e.g. 'TBA', '31-31-2025'", logs.output[0])
+
+    def test_failed_import_reports_error_and_leaves_no_dataset(self):
+        job = ImportJob.objects.create(file=ContentFile(b'not a spreadsheet', name='broken.xlsx'))
+        datasets = Dataset.objects.count()
+        _queued.add(job.id)
+        with self.assertLogs('apps.exams.jobs', 'ERROR'):
+            run_import_job(job.id)
+
+        status = self.status(job)
+        self.assertEqual(status['stage'], ImportJob.STAGE_FAILED)
+        self.assertTrue(status['error'])
+        self.assertEqual(Dataset.objects.count(), datasets)
+        self.assertNotIn(job.id, _queued)
+
+    def test_queued_job_of_a_lost_worker_goes_stale(self):
+        job = ImportJob.objects.create()
+        self.assertEqual(self.status(job)['stage'], ImportJob.STAGE_QUEUED)
+
+        # Never started: the worker holding it in memory restarted
+        ImportJob.objects.filter(pk=job.pk).update(updated_at=timezone.now() - timedelta(hours=1))
+        status = self.status(job)
+        self.assertEqual(status['stage'], ImportJob.STAGE_FAILED)
+        self.assertEqual(status['error'], 'Job was interrupted. Please try again.')
+
+    def test_finished_job_never_goes_stale(self):
+        job = ImportJob.objects.create(stage=ImportJob.STAGE_DONE)
+        ImportJob.objects.filter(pk=job.pk).update(updated_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(self.status(job)['stage'], ImportJob.STAGE_DONE)
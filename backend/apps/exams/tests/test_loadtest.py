@@ -0,0 +1,26 @@
+"""
+Safety checks and options of the loadtest command.
+"""
+from unittest import mock
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import SimpleTestCase
+
+from ..management.commands.loadtest import _server_address
+
+
+class LoadtestCommandTests(SimpleTestCase):
+    def test_refuses_other_databases(self):
+        with mock.patch.object(connection, 'vendor', 'postgresql'):
+            with self.assertRaisesMessage(CommandError, '--allow-database'):
+                call_command('loadtest')
+
+    def test_server_address(self):
+        self.assertEqual(_server_address('http://127.0.0.1:8000'), ('127.0.0.1', 8000, ''))
+        self.assertEqual(_server_address('localhost:8000/'), ('localhost', 8000, ''))
+        self.assertEqual(_server_address('http://example.com/exams/'), ('example.com', 80, '/exams'))
+        for url in ('https://example.com', 'http://example.com:port', 'http://'):
+            with self.subTest(url=url), self.assertRaises(CommandError):
+                _server_address(url)
@@ -0,0 +1,63 @@
+"""
+The metrics endpoint and the per-worker metrics files.
+"""
+import json
+import os
+import subprocess
+import sys
+
+from django.contrib.auth.models import User
+from django.test import override_settings
+
+from ..metrics import render_metrics
+from .base import ExamsTestCase
+
+
+class MetricsEndpointTests(ExamsTestCase):
+    def test_metrics_are_staff_only(self):
+        self.assertIn(self.client.get('/api/metrics/').status_code, (401, 403))
+        User.objects.create_user('student', password='pw')
+        self.client.login(username='student', password='pw')
+        self.assertEqual(self.client.get('/api/metrics/').status_code, 403)
+
+        User.objects.create_superuser('admin', 'admin@example.com', 'pw')
+        self.client.login(username='admin', password='pw')
+        self.login()
+        response = self.client.get('/api/metrics/')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('http_requests_total{view="LoginView",method="POST",status="200"}', response.content.decode())
+
+
+class MetricsFileTests(ExamsTestCase):
+    def write(self, directory, name, requests):
+        with open(os.path.join(directory, name), 'w') as f:
+            json.dump({'histograms': [], 'counters': [
+                ['http_requests_total', [['view', 'RetiredView'], ['method', 'GET'], ['status', '200']], requests],
+            ]}, f)
+
+    def exited_pid(self):
+        process = subprocess.Popen([sys.executable, '-c', 'pass'])
+        process.wait()
+        return process.pid
+
+    def requests(self, output):
+        prefix = 'http_requests_total{view="RetiredView",method="GET",status="200"} '
+        return int(next(line for line in output.splitlines() if line.startswith(prefix))[len(prefix):])
+
+    def test_exited_workers_are_retired_without_lowering_totals(self):
+        directory = os.path.join(self.directory, 'metrics')
+        os.makedirs(directory)
+        # A live process (the test runner's parent) and one that has exited
+        self.write(directory, f'{os.getppid()}-1.json', 3)
+        self.write(directory, f'{self.exited_pid()}-2.json', 5)
+
+        with override_settings(METRICS_DIR=directory):
+            totals = [self.requests(render_metrics())]
+            self.assertIn('metrics_processes 2', render_metrics())
+            self.assertEqual(sorted(os.listdir(directory)), [f'{os.getppid()}-1.json', 'retired.json', 'retired.lock'])
+            totals.append(self.requests(render_metrics()))
+
+            self.write(directory, f'{self.exited_pid()}-3.json', 2)
+            totals.append(self.requests(render_metrics()))
+            totals.append(self.requests(render_metrics()))
+        self.assertEqual(totals, [8, 8, 10, 10])
@@ -0,0 +1,32 @@
+"""
+Purging datasets in batches.
+"""
+from ..models import ActiveDataset, Dataset, DatasetStats, Student, StudentSnapshot
+from ..purge import purge_datasets
+from .base import ExamsTestCase, create_unactivated_dataset
+
+
+class PurgeTests(ExamsTestCase):
+    def test_purge_counts_deleted_rows(self):
+        # The count comes from the deletes, not from the (here wrong) stats
+        DatasetStats.objects.filter(dataset=self.dataset).update(distinct_students=1)
+        other = create_unactivated_dataset(50, seed=1)
+
+        progress = []
+        self.assertEqual(purge_datasets([self.dataset.id], batch_size=64, progress=progress.append), 200)
+        self.assertEqual(progress, [64, 128, 192, 200])
+        self.assertFalse(Dataset.objects.filter(pk=self.dataset.pk).exists())
+        self.assertFalse(StudentSnapshot.objects.filter(dataset_id=self.dataset.pk).exists())
+        self.assertIsNone(ActiveDataset.objects.get().dataset_id)
+        self.assertEqual(Student.objects.filter(dataset=other).count(), 50)
+
+    def test_purge_all_spares_imports_committed_meanwhile(self):
+        imported = []
+
+        def progress(rows):
+            if not imported:
+                imported.append(create_unactivated_dataset(50, seed=2))
+
+        self.assertEqual(purge_datasets(batch_size=100, progress=progress), 200)
+        self.assertEqual(list(Dataset.objects.all()), imported)
+        self.assertEqual(Student.objects.filter(dataset=imported[0]).count(), 50)
@@ -0,0 +1,106 @@
+"""
+Sheet parsing and normalization helpers.
+"""
+from datetime import date, datetime
+from importlib import import_module
+
+import numpy as np
+import pandas as pd
+
+from django.test import SimpleTestCase
+
+from ..utils import (
+    get_department_from_register_no, get_departments_from_register_nos, normalize_department_name,
+    normalize_student_frame, parse_exam_dates,
+)
+
+
+def parse(*values):
+    return list(parse_exam_dates(pd.Series(values, dtype=object)))
+
+
+class ParseExamDatesTests(SimpleTestCase):
+    def test_excel_serial_numbers(self):
+        self.assertEqual(parse(45645, 45645.0, np.int64(45645), '45645'), [date(2024, 12, 19)] * 4)
+
+    def test_numbers_outside_the_serial_range_are_missing(self):
+        # 20251227 and 99999999 would overflow the timestamp range
+        self.assertEqual(parse(20251227, 99999999, 0, -5, 1e12), [None] * 5)
+
+    def test_booleans_are_missing(self):
+        self.assertEqual(parse(True, False), [None, None])
+        self.assertEqual(list(parse_exam_dates(pd.Series([True, False]))), [None, None])
+
+    def test_text_is_read_day_first(self):
+        self.assertEqual(parse('05-12-2025', '13-12-2025', '05/12/2025', '05.12.2025'),
+                         [date(2025, 12, 5), date(2025, 12, 13), date(2025, 12, 5), date(2025, 12, 5)])
+
+    def test_iso_text(self):
+        self.assertEqual(parse('2025-12-19', ' 2025-12-19 ', '2025-12-19 00:00:00'), [date(2025, 12, 19)] * 3)
+
+    def test_month_first_and_other_text_is_missing(self):
+        self.assertEqual(parse('12-31-2025', '2025/31/12', 'TBA', ''), [None] * 4)
+
+    def test_datetime_values(self):
+        self.assertEqual(parse(datetime(2025, 12, 19, 9, 30), date(2025, 12, 20), pd.Timestamp('2025-12-21')),
+                         [date(2025, 12, 19), date(2025, 12, 20), date(2025, 12, 21)])
+        self.assertEqual(list(parse_exam_dates(pd.Series(pd.to_datetime(['2025-12-19', None])))),
+                         [date(2025, 12, 19), None])
+
+    def test_missing_cells(self):
+        self.assertEqual(parse(None, np.nan, '2025-12-19'), [None, None, date(2025, 12, 19)])
+
+    def test_unparseable_dates_are_reported(self):
+        report = {}
+        parse_exam_dates(pd.Series(['TBA', 'TBA', '', None, True, 20251227, '19-12-2025'], dtype=object), report)
+        self.assertEqual(report, {'count': 4, 'values': ['TBA', 'True', '20251227']})
+
+        parse_exam_dates(pd.Series(['19-12-2025', None]), report)
+        self.assertEqual(report, {'count': 0, 'values': []})
+
+    def test_one_bad_cell_does_not_fail_the_sheet(self):
+        students = normalize_student_frame(pd.DataFrame({
+            'register_no': ['953624243001', '953624243002', '953624243003'],
+            'exam_date': [20251227, True, '19-12-2025'],
+        }))
+        self.assertEqual(students['exam_date'].tolist(), [None, None, date(2025, 12, 19)])
+
+
+REGISTER_NOS = {
+    '711725UAM132': 'AI&ML',
+    '711724uad217': 'AI&DS',
+    ' 711623UCS089': 'CSE',
+    '711726UEC210': 'ECE',
+    '24UIT001': 'IT',
+    'UME101': 'MECH',
+    '711725URA001': 'R&A',
+    '711725UCB001': 'CSBS',
+    '711725UCY001': 'CYS',
+    # The code must follow the leading digits, not appear later on
+    '711725XYZUCS1': None,
+    '953624243001': None,
+    '': None,
+    None: None,
+}
+
+
+class DepartmentTests(SimpleTestCase):
+    def test_register_numbers(self):
+        for register_no, department in REGISTER_NOS.items():
+            with self.subTest(register_no=register_no):
+                self.assertEqual(get_department_from_register_no(register_no), department)
+
+    def test_register_number_column(self):
+        self.assertEqual(get_departments_from_register_nos(list(REGISTER_NOS)).tolist(),
+                         [department or '' for department in REGISTER_NOS.values()])
+
+    def test_migration_backfill_matches(self):
+        migration = import_module('apps.exams.migrations.0011_student_derived_fields')
+        for register_no, department in REGISTER_NOS.items():
+            with self.subTest(register_no=register_no):
+                self.assertEqual(migration._department(register_no), department or '')
+
+    def test_department_names(self):
+        for name in ('AIML', 'AI ML', 'AI-ML', 'AI_ML', 'ai&ml'):
+            self.assertEqual(normalize_department_name(name), 'AI&ML')
+        self.assertEqual(normalize_department_name('cse'), 'CSE')
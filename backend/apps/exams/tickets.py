@@ -0,0 +1,224 @@
+"""
+Batch rendering of hall ticket PDFs for printing.
+
+Tickets for a department (or the whole active dataset) are rendered across a
+process pool and written into a ZIP archive that is produced incrementally:
+the students are read in chunks, at most a few batches are in flight at once
+and each ZIP chunk is handed to the caller as soon as it is written, so memory
+stays bounded regardless of the number of tickets.
+
+Rendering runs in the render_hall_tickets command, which stores the archive
+under MEDIA_ROOT for the admin endpoint to serve; a request never renders.
+"""
+import json
+import os
+import shutil
+import tempfile
+import time
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+
+from .cache import get_department_semesters_json
+from .models import Student
+from .pdf import HallTicketTemplate
+
+# Rendered archives, under MEDIA_ROOT, one directory per dataset
+ARCHIVE_DIRECTORY = 'hall_tickets'
+
+_template = None  # Per worker process, built by _init_worker
+
+
+def _init_worker(schedules, title):
+    global _template
+    _template = HallTicketTemplate(schedules, title)
+
+
+def _render_batch(students):
+    """
+    Render (register_no, name, department) tuples in a worker.
+    Returns (register_no, department, pdf bytes) for each ticket.
+    """
+    return [
+        (register_no, department, _template.render(register_no, name, department))
+        for register_no, name, department in students
+    ]
+
+
+def _worker_count():
+    workers = getattr(settings, 'HALL_TICKET_PDF_WORKERS', 0)
+    return workers if workers > 0 else (os.cpu_count() or 1)
+
+
+def load_schedules(departments):
+    """
+    Semester-grouped exam schedules of the given departments (cached per
+    department); departments without exams are left out.
+    """
+    schedules = {}
+    for department in departments:
+        semesters_json = get_department_semesters_json(department)
+        if semesters_json:
+            schedules[department] = json.loads(semesters_json)
+    return schedules
+
+
+def _student_batches(dataset, departments, batch_size):
+    students = (
+        Student.objects.filter(dataset=dataset, department__in=departments)
+        .order_by('department', 'register_no')
+        .values_list('register_no', 'name', 'department')
+    )
+    batch = []
+    for student in students.iterator(chunk_size=batch_size):
+        batch.append(student)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def render_hall_tickets(dataset, department=None, workers=None, batch_size=None):
+    """
+    Render the hall tickets of a dataset's students, optionally limited to
+    one department. Yields (register_no, department, pdf bytes) in register
+    number order within each department; students whose department has no
+    exams are skipped.
+    Rendering is spread across `workers` processes (HALL_TICKET_PDF_WORKERS,
+    or one per CPU); each worker builds the shared page template once.
+    """
+    workers = workers or _worker_count()
+    batch_size = batch_size or settings.HALL_TICKET_PDF_BATCH_SIZE
+
+    if department:
+        departments = [department]
+    else:
+        departments = list(
+            Student.objects.filter(dataset=dataset).exclude(department='')
+            .order_by().values_list('department', flat=True).distinct()
+        )
+    schedules = load_schedules(departments)
+    if not schedules:
+        return
+    batches = _student_batches(dataset, sorted(schedules), batch_size)
+
+    title = settings.HALL_TICKET_EXAM_TITLE
+    if workers <= 1:
+        _init_worker(schedules, title)
+        for batch in batches:
+            yield from _render_batch(batch)
+        return
+
+    # Keep a bounded window of batches in flight, consumed in order
+    executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                   initargs=(schedules, title))
+    try:
+        pending = deque()
+        for batch in batches:
+            pending.append(executor.submit(_render_batch, batch))
+            if len(pending) >= workers * 2:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+class _ChunkWriter:
+    """
+    Write-only file object collecting what ZipFile writes, so it can be
+    drained after every entry. Not seekable, so ZipFile streams entries with
+    data descriptors.
+    """
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def stream_hall_tickets_zip(dataset, department=None, workers=None, batch_size=None, stats=None):
+    """
+    Yield a ZIP archive of hall ticket PDFs (<department>/<register_no>.pdf)
+    chunk by chunk. The archive ends with summary.json holding the ticket
+    count, elapsed seconds and tickets per second; the same figures are
+    stored in `stats` when a dict is passed.
+    """
+    started = time.perf_counter()
+    output = _ChunkWriter()
+    count = 0
+    with zipfile.ZipFile(output, 'w', compression=zipfile.ZIP_STORED) as archive:
+        for register_no, ticket_department, pdf in render_hall_tickets(dataset, department, workers, batch_size):
+            # PDF streams are already compressed
+            archive.writestr(f"{ticket_department}/{register_no.replace('/', '_')}.pdf", pdf)
+            count += 1
+            yield output.drain()
+
+        elapsed = time.perf_counter() - started
+        summary = {
+            'tickets': count,
+            'seconds': round(elapsed, 3),
+            'tickets_per_second': round(count / elapsed, 1) if elapsed else None,
+        }
+        if stats is not None:
+            stats.update(summary)
+        archive.writestr('summary.json', json.dumps(summary, indent=2))
+    yield output.drain()
+
+
+def archive_path(dataset, department=None):
+    """
+    Where the hall ticket archive of a dataset (at its current revision) is
+    stored, for one department or all of them.
+    """
+    name = f"hall_tickets_{department or 'all'}_r{dataset.revision}.zip".replace('&', '_')
+    return os.path.join(settings.MEDIA_ROOT, ARCHIVE_DIRECTORY, str(dataset.id), name)
+
+
+def write_hall_tickets_zip(dataset, department=None, path=None, workers=None, batch_size=None):
+    """
+    Render a hall ticket archive into `path` (archive_path() by default).
+    The archive is written next to it and moved into place when complete,
+    so a reader never sees a partial one. Returns the summary figures of
+    stream_hall_tickets_zip() and the path.
+    """
+    path = path or archive_path(dataset, department)
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+
+    stats = {}
+    handle, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(handle, 'wb') as output:
+            for chunk in stream_hall_tickets_zip(dataset, department, workers, batch_size, stats=stats):
+                output.write(chunk)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+    stats['path'] = path
+    return stats
+
+
+def delete_hall_ticket_archives(dataset):
+    """
+    Remove every stored hall ticket archive of a dataset.
+    """
+    shutil.rmtree(os.path.join(settings.MEDIA_ROOT, ARCHIVE_DIRECTORY, str(dataset.id)), ignore_errors=True)
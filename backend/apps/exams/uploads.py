@@ -0,0 +1,54 @@
+"""
+Content hashing of uploaded files.
+
+ContentHashUploadHandler (first in FILE_UPLOAD_HANDLERS) feeds every chunk of
+an upload into SHA-256 as Django receives it and passes the chunk on to the
+handler that stores the file, so the digest is ready when the view runs
+without reading the file a second time.
+"""
+import hashlib
+
+from django.core.files.uploadhandler import FileUploadHandler
+
+
+class ContentHashUploadHandler(FileUploadHandler):
+    """
+    Record the SHA-256 of each uploaded file in request.upload_hashes, keyed
+    by form field name.
+    """
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.digest = hashlib.sha256()
+
+    def receive_data_chunk(self, raw_data, start):
+        self.digest.update(raw_data)
+        return raw_data
+
+    def file_complete(self, file_size):
+        if not hasattr(self.request, 'upload_hashes'):
+            self.request.upload_hashes = {}
+        self.request.upload_hashes[self.field_name] = self.digest.hexdigest()
+        # Let the next handler build the file object
+        return None
+
+
+def uploaded_file_hash(request, field_name):
+    """
+    SHA-256 hex digest of the file uploaded as `field_name`; the file is
+    read here only when the upload handler did not run.
+    """
+    content_hash = getattr(request, 'upload_hashes', {}).get(field_name)
+    if content_hash:
+        return content_hash
+    return file_hash(request.FILES[field_name])
+
+
+def file_hash(file):
+    """
+    SHA-256 hex digest of an open Django File, which is left at its start.
+    """
+    digest = hashlib.sha256()
+    for chunk in file.chunks():
+        digest.update(chunk)
+    file.seek(0)
+    return digest.hexdigest()
@@ -1,17 +1,30 @@
 from django.urls import path
 from .views import (
-    LoginView, DatasetUploadView, DatasetListView, 
-    ToggleDatasetView, DeleteStudentsView,
-    HallTicketView
+    LoginView, DatasetUploadView, JobStatusView, DatasetListView, 
+    DatasetDetailView, DatasetDeltaView, ToggleDatasetView, DeleteStudentsView,
+    HallTicketView, HallTicketPdfView, HallListView, HallSeatingView,
+    MetricsView
 )
 
 urlpatterns = [
     path('login/', LoginView.as_view(), name='login'),
     path('upload/', DatasetUploadView.as_view(), name='upload'),
+    path('upload/<int:job_id>/', JobStatusView.as_view(), name='upload-status'),
+    path('jobs/<int:job_id>/', JobStatusView.as_view(), name='job-status'),
     path('datasets/', DatasetListView.as_view(), name='datasets'),
+    path('datasets/<int:pk>/', DatasetDetailView.as_view(), name='dataset-detail'),
     path('datasets/<int:pk>/toggle/', ToggleDatasetView.as_view(), name='toggle-dataset'),
+    path('datasets/<int:pk>/delta/', DatasetDeltaView.as_view(), name='dataset-delta'),
     path('delete-all/', DeleteStudentsView.as_view(), name='delete-all'),
     
     # Hall Ticket endpoint (student-only)
     path('hall-ticket/', HallTicketView.as_view(), name='hall-ticket'),
+    path('hall-tickets/pdf/', HallTicketPdfView.as_view(), name='hall-ticket-pdf'),
+    
+    # Hall seating maps of the active dataset
+    path('halls/', HallListView.as_view(), name='halls'),
+    path('halls/<str:hall_no>/', HallSeatingView.as_view(), name='hall-seating'),
+    
+    # Request metrics for Prometheus (staff only)
+    path('metrics/', MetricsView.as_view(), name='metrics'),
 ]
@@ -1,125 +1,177 @@
 import pandas as pd
+import numpy as np
 import os
 import io
+import re
+import time
+import logging
 
-def clean_and_parse_excel(file_obj):
+from .instrumentation import StageTimer, WarningLimiter
+
+logger = logging.getLogger(__name__)
+
+# Fields of a Student row read from the sheet, in model order
+STUDENT_FIELDS = [
+    'register_no', 'name', 'course_code', 'course_title',
+    'exam_date', 'session', 'hall_no', 'seat_no',
+]
+
+# Fields normalize_student_frame derives from the sheet fields
+DERIVED_STUDENT_FIELDS = ['hall_no_int', 'seat_no_int', 'department']
+
+# Largest value an IntegerField holds on every supported database
+MAX_INT_FIELD = 2147483647
+
+# Day zero of Excel's serial date system (accounts for the 1900 leap year bug)
+EXCEL_EPOCH = pd.Timestamp('1899-12-30')
+# Serial number of 9999-12-31, the last date Excel can represent
+MAX_EXCEL_SERIAL = 2958465
+
+# Accepted exam date text, tried in order; day-first only, never month-first
+DATE_FORMATS = ['%Y-%m-%d', '%Y-%m-%d %H:%M:%S', '%d-%m-%Y', '%d/%m/%Y', '%d.%m.%Y']
+
+# File signatures of the sheet formats we accept
+ZIP_SIGNATURE = b'PK\x03\x04'                        # .xlsx (OOXML in a ZIP container)
+OLE2_SIGNATURE = b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1'  # .xls (BIFF8 in an OLE2 container)
+BIFF_SIGNATURES = (b'\x09\x00', b'\x09\x02', b'\x09\x04', b'\x09\x08')  # bare BIFF2-5 .xls
+HTML_MARKERS = (b'<html', b'<table', b'<?xml', b'<!doctype html')
+
+
+def sniff_sheet_format(file_obj):
+    """
+    Identify an uploaded sheet from its leading bytes, whatever its name:
+    'xlsx', 'xls', 'html' (an HTML table, often saved with an .xls name) or
+    None when it is none of these.
+    """
+    file_obj.seek(0)
+    head = file_obj.read(1024)
+    file_obj.seek(0)
+
+    if head.startswith(ZIP_SIGNATURE):
+        return 'xlsx'
+    if head.startswith(OLE2_SIGNATURE) or head.startswith(BIFF_SIGNATURES):
+        return 'xls'
+
+    text = head.lstrip(b'\xef\xbb\xbf \t\r\n').lower()  # UTF-8 BOM and leading whitespace
+    if text.startswith(b'<') and any(marker in text for marker in HTML_MARKERS):
+        return 'html'
+    return None
+
+
+def _html_flavor():
+    """
+    The pd.read_html flavor whose parser is installed (lxml preferred), or None.
+    """
+    from importlib.util import find_spec
+
+    if find_spec('lxml'):
+        return 'lxml'
+    if find_spec('bs4') and find_spec('html5lib'):
+        return 'bs4'
+    return None
+
+
+def _read_xls_columns(file_obj):
+    """
+    Read the first sheet of a .xls workbook column by column (one bulk call
+    per column) into a DataFrame, header row as column names.
+    """
+    import xlrd
+
+    workbook = xlrd.open_workbook(file_contents=file_obj.read(),
+                                  formatting_info=False,
+                                  on_demand=True,
+                                  ignore_workbook_corruption=True)
+    try:
+        sheet = workbook.sheet_by_index(0)
+        if sheet.nrows == 0:
+            return pd.DataFrame()
+        header = sheet.row_values(0)
+        columns = [sheet.col_values(col_idx, start_rowx=1) for col_idx in range(sheet.ncols)]
+    finally:
+        workbook.release_resources()
+
+    df = pd.DataFrame(dict(enumerate(columns)))
+    df.columns = header
+    return df
+
+
+def clean_and_parse_excel(file_obj, timer=None):
     """
     Parses an uploaded Excel file (xlsx, xls, HTML content in xls).
     Returns a pandas DataFrame with standardized columns.
+
+    The format is identified from the file's signature (sniff_sheet_format)
+    and read by that format's parser only. Pass a StageTimer to have the
+    sniff, parse and map stages timed into it.
     """
-    import logging
-    import xlrd
-    from io import BytesIO
-    
-    logging.basicConfig(filename='d:/adminstudent/debug.log', level=logging.DEBUG, 
-                       format='%(asctime)s - %(message)s')
+    timer = timer or StageTimer()
     
-    df = None
-    excel_error = None
-    html_error = None
-    
-    # Get file name to determine type
+    # Get file name for the logs; the format comes from the content
     file_name = getattr(file_obj, 'name', '')
-    logging.debug(f"Processing file: {file_name}")
-    print(f"DEBUG: Processing file: {file_name}")
-    
-    # Read first few bytes to check content type
-    file_obj.seek(0)
-    first_bytes = file_obj.read(500)
-    file_obj.seek(0)
-    
-    logging.debug(f"First 500 bytes: {first_bytes}")
-    print(f"DEBUG: First 200 chars of file: {first_bytes[:200]}")
-    
-    is_html = b'<html' in first_bytes.lower() or b'<table' in first_bytes.lower() or b'<?xml' in first_bytes.lower()
-    
-    # Strategy 1: Try HTML parsing first if HTML detected
-    if is_html:
-        logging.debug("Detected HTML/XML content")
-        print(f"DEBUG: Detected HTML/XML content in file")
-        for engine in ['lxml', 'html5lib', 'bs4']:
-            try:
-                file_obj.seek(0)
-                dfs = pd.read_html(file_obj, flavor=engine)
-                if dfs and len(dfs) > 0:
-                    df = dfs[0]
-                    logging.debug(f"Successfully read HTML with {engine}: {len(df)} rows, {len(df.columns)} cols")
-                    print(f"DEBUG: Successfully read HTML table with engine '{engine}': {len(df)} rows, {len(df.columns)} columns")
-                    break
-            except Exception as e:
-                logging.debug(f"HTML read with {engine} failed: {str(e)}")
-                print(f"DEBUG: HTML read with {engine} failed: {str(e)}")
-                html_error = str(e)
-    
-    # Strategy 2: Try standard Excel parsing if not HTML or if HTML failed
-    if df is None:
-        logging.debug("Trying Excel parsing")
-        try:
-            file_obj.seek(0)
-            if file_name.endswith('.xlsx'):
-                df = pd.read_excel(file_obj, engine='openpyxl')
-            elif file_name.endswith('.xls'):
-                # For .xls files, try direct xlrd parsing with forgiving options
-                try:
-                    file_obj.seek(0)
-                    file_contents = file_obj.read()
-                    workbook = xlrd.open_workbook(file_contents=file_contents, 
-                                                 formatting_info=False,
-                                                 on_demand=True,
-                                                 ignore_workbook_corruption=True)
-                    sheet = workbook.sheet_by_index(0)
-                    
-                    # Convert to list of lists
-                    data = []
-                    for row_idx in range(sheet.nrows):
-                        row = []
-                        for col_idx in range(sheet.ncols):
-                            cell = sheet.cell(row_idx, col_idx)
-                            row.append(cell.value)
-                        data.append(row)
-                    
-                    # Create DataFrame
-                    if len(data) > 0:
-                        df = pd.DataFrame(data[1:], columns=data[0])
-                        logging.debug(f"Successfully read XLS with direct xlrd: {len(df)} rows, {len(df.columns)} cols")
-                        print(f"DEBUG: Successfully read XLS with direct xlrd: {len(df)} rows, {len(df.columns)} columns")
-                except Exception as xlrd_err:
-                    logging.debug(f"Direct xlrd failed: {str(xlrd_err)}")
-                    print(f"DEBUG: Direct xlrd failed: {str(xlrd_err)}")
-                    raise xlrd_err
+    with timer.span('sniff'):
+        sheet_format = sniff_sheet_format(file_obj)
+    
+    try:
+        with timer.span('parse'):
+            if sheet_format == 'xlsx':
+                rows = _iter_sheet_rows(file_obj, sheet_format)
+                header = next(rows, None)
+                df = pd.DataFrame(list(rows), columns=header) if header is not None else pd.DataFrame()
+            elif sheet_format == 'xls':
+                df = _read_xls_columns(file_obj)
+            elif sheet_format == 'html':
+                flavor = _html_flavor()
+                if flavor is None:
+                    raise ValueError("Reading HTML sheets needs lxml (or bs4 and html5lib) installed")
+                df = pd.read_html(file_obj, flavor=flavor)[0]
             else:
-                # Try openpyxl first, then xlrd
-                try:
-                    df = pd.read_excel(file_obj, engine='openpyxl')
-                except:
-                    file_obj.seek(0)
-                    df = pd.read_excel(file_obj, engine='xlrd')
-            
-            if df is not None:
-                logging.debug(f"Successfully read Excel: {len(df)} rows, {len(df.columns)} cols")
-                print(f"DEBUG: Successfully read Excel file: {len(df)} rows, {len(df.columns)} columns")
-        except Exception as e:
-            excel_error = str(e)
-            logging.debug(f"Excel read failed: {excel_error}")
-            print(f"DEBUG: Excel read failed: {excel_error}")
-
-    if df is None:
-        error_msg = f"Could not parse file. Ensure it is a valid Excel or HTML table file. Excel error: {excel_error}, HTML error: {html_error}"
-        logging.debug(error_msg)
-        print(f"DEBUG: {error_msg}")
+                raise ValueError("Unrecognised file type (expected .xlsx, .xls or an HTML table)")
+    except Exception as e:
+        error_msg = f"Could not parse file. Ensure it is a valid Excel or HTML table file. {sheet_format or 'Unknown'} error: {e}"
+        logger.warning('Parsing %s failed: %s', file_name, error_msg)
         raise ValueError(error_msg)
 
-    # Standardize Column Names - convert to lowercase for matching
-    df.columns = df.columns.astype(str).str.lower().str.strip().str.replace(r'\s+', '', regex=True)
-    
-    print(f"DEBUG: Detected Columns in file: {list(df.columns)}")
+    with timer.span('map'):
+        # Standardize Column Names - convert to lowercase for matching
+        df.columns = standardize_column_names(df.columns)
+        detected = list(df.columns)
 
+        # Apply mapping
+        df = df.rename(columns=map_student_columns(df.columns))
+
+    timer.log(logger, logging.DEBUG, 'Read %s as %s: %d rows, columns %s -> %s',
+              file_name, sheet_format, len(df), detected, list(df.columns))
+
+    # Check for critical column
+    if 'register_no' not in df.columns:
+        # Fallback: if 'register_no' is missing but we have column 0, maybe use that? 
+        # No, that's too risky.
+        raise ValueError(f"Could not find 'Register No' column. Found columns: {list(df.columns)}")
+        
+    df = df.dropna(subset=['register_no'])
+         
+    return df
+
+
+def standardize_column_names(columns):
+    """
+    Lowercase header names and strip all whitespace, e.g. 'Exam Date ' -> 'examdate'.
+    """
+    return pd.Index(columns).astype(str).str.lower().str.strip().str.replace(r'\s+', '', regex=True)
+
+
+def map_student_columns(columns):
+    """
+    Map standardized header names to Student fields.
+    Returns a {header: field} dict for the headers that were recognised.
+    """
     # Robust Fuzzy Mapping
     # We iterate over columns and try to match them to expected fields
     
     normalization_map = {}
     
-    for col in df.columns:
+    for col in columns:
         # Register No Matching - handle 'registerno', 'register_no', 'regno', etc.
         if 'register' in col or col == 'regno' or col == 'registerno':
             normalization_map[col] = 'register_no'
@@ -154,23 +206,280 @@ def clean_and_parse_excel(file_obj):
         elif 'examdate' in col or (col == 'date'):
             normalization_map[col] = 'exam_date'
 
-    # Apply mapping
-    df = df.rename(columns=normalization_map)
-    print(f"DEBUG: Mapped Columns: {list(df.columns)}")
+    return normalization_map
 
-    # Check for critical column
-    if 'register_no' not in df.columns:
-        # Fallback: if 'register_no' is missing but we have column 0, maybe use that? 
-        # No, that's too risky.
-        raise ValueError(f"Could not find 'Register No' column. Found columns: {list(df.columns)}")
-        
-    df = df.dropna(subset=['register_no'])
-         
-    return df
+
+def _iter_sheet_rows(file_obj, sheet_format=None):
+    """
+    Yield the first worksheet's rows as lists of cell values, header first,
+    without materializing the sheet.
+    Returns None when the file is not a workbook that can be read this way
+    (e.g. HTML saved with an .xls extension).
+    """
+    import xlrd
+    import openpyxl
+
+    sheet_format = sheet_format or sniff_sheet_format(file_obj)
+    file_obj.seek(0)
+
+    if sheet_format == 'xlsx':
+        # Read-only mode streams rows from the worksheet XML
+        workbook = openpyxl.load_workbook(file_obj, read_only=True, data_only=True)
+
+        def rows():
+            try:
+                for row in workbook.worksheets[0].iter_rows(values_only=True):
+                    yield list(row)
+            finally:
+                workbook.close()
+        return rows()
+
+    if sheet_format == 'xls':
+        workbook = xlrd.open_workbook(file_contents=file_obj.read(),
+                                      formatting_info=False,
+                                      on_demand=True,
+                                      ignore_workbook_corruption=True)
+
+        def rows():
+            try:
+                sheet = workbook.sheet_by_index(0)
+                for row_idx in range(sheet.nrows):
+                    yield sheet.row_values(row_idx)
+            finally:
+                workbook.release_resources()
+        return rows()
+
+    return None
+
+
+def iter_student_chunks(file_obj, chunk_size=5000, timer=None):
+    """
+    Parse an uploaded student sheet in chunks of at most chunk_size rows.
+    Yields DataFrames with columns already mapped to Student fields, like
+    clean_and_parse_excel, so memory stays flat however large the sheet is.
+    Files that can't be streamed (HTML tables) are parsed whole and sliced.
+    Pass a StageTimer to have the sniff, parse and map stages timed into it
+    (time the caller spends between chunks is not counted).
+    """
+    timer = timer or StageTimer()
+    with timer.span('sniff'):
+        sheet_format = sniff_sheet_format(file_obj)
+    with timer.span('parse'):
+        rows = _iter_sheet_rows(file_obj, sheet_format)
+
+    if rows is None:
+        df = clean_and_parse_excel(file_obj, timer)
+        for start in range(0, len(df), chunk_size):
+            yield df.iloc[start:start + chunk_size]
+        return
+
+    with timer.span('parse'):
+        header = next(rows, None)
+    if header is None:
+        raise ValueError("Could not parse file. The worksheet is empty.")
+
+    with timer.span('map'):
+        columns = standardize_column_names(header)
+        mapping = map_student_columns(columns)
+        mapped = [mapping.get(col, col) for col in columns]
+    if 'register_no' not in mapped:
+        rows.close()
+        raise ValueError(f"Could not find 'Register No' column. Found columns: {list(mapped)}")
+
+    width = len(header)
+    chunk = []
+    started = time.perf_counter()
+    for row in rows:
+        # Pad short rows and drop cells beyond the header
+        chunk.append((row + [None] * (width - len(row)))[:width])
+        if len(chunk) >= chunk_size:
+            frame = pd.DataFrame(chunk, columns=mapped).dropna(subset=['register_no'])
+            timer.add('parse', time.perf_counter() - started)
+            yield frame
+            chunk = []
+            started = time.perf_counter()
+    if chunk:
+        frame = pd.DataFrame(chunk, columns=mapped).dropna(subset=['register_no'])
+        timer.add('parse', time.perf_counter() - started)
+        yield frame
+    else:
+        timer.add('parse', time.perf_counter() - started)
+
+
+def _clean_text_column(column):
+    """
+    Convert a column to stripped strings, with missing values as ''.
+    Whole numbers that Excel stored as floats lose their decimal part
+    (e.g. 201.0 -> '201'), which keeps hall, seat and register numbers clean.
+    Each distinct value is cleaned once and broadcast back to the rows.
+    """
+    codes, uniques = pd.factorize(column)
+    text = pd.Series(uniques, dtype=object).astype(str).str.strip()
+    text = text.str.replace(r'^(-?\d+)\.0+$', r'\1', regex=True)
+    # Missing cells have code -1, which picks the trailing ''
+    return np.append(text.to_numpy(dtype=object), '').take(codes)
+
+
+def parse_exam_dates(column, report=None, sample_limit=5):
+    """
+    Parse an exam_date column into datetime.date objects (None if unparseable).
+
+    Handles datetime/Timestamp values, Excel serial numbers (1 to
+    MAX_EXCEL_SERIAL, numeric cells or numeric text) and text in one of
+    DATE_FORMATS, which are all day-first so 05-12-2025 is 5 December.
+    Anything else (other numbers, booleans, month-first text) becomes None.
+    Each distinct value is parsed once, in one vectorized pass per kind, and
+    the results are broadcast back to the rows.
+
+    If a `report` dict is passed, it receives the number of filled cells that
+    could not be parsed ('count') and up to sample_limit of their distinct
+    values as text ('values').
+    """
+    codes, uniques = pd.factorize(column)
+    values = pd.Series(uniques, dtype=object)
+    parsed = pd.Series(pd.NaT, index=values.index, dtype='datetime64[ns]')
+
+    # Booleans would pass as the numbers 0 and 1
+    is_bool = values.map(lambda v: isinstance(v, (bool, np.bool_)))
+    numbers = pd.to_numeric(values.where(~is_bool), errors='coerce')
+
+    # Excel serial numbers; larger ones would overflow the timestamp range
+    is_serial = (numbers >= 1) & (numbers <= MAX_EXCEL_SERIAL)
+    if is_serial.any():
+        parsed[is_serial] = EXCEL_EPOCH + pd.to_timedelta(numbers[is_serial], unit='D')
+
+    # Date strings, trying each format on what the previous ones left
+    is_text = numbers.isna() & values.map(lambda v: isinstance(v, str))
+    if is_text.any():
+        text = values[is_text].str.strip()
+        for date_format in DATE_FORMATS:
+            todo = parsed[is_text].isna()
+            if not todo.any():
+                break
+            parsed[todo[todo].index] = pd.to_datetime(text[todo], format=date_format, errors='coerce')
+
+    # Datetimes and dates (no text or numbers are left to guess at)
+    is_datetime = numbers.isna() & ~is_text & ~is_bool
+    if is_datetime.any():
+        parsed[is_datetime] = pd.to_datetime(values[is_datetime], format='mixed', errors='coerce')
+
+    if report is not None:
+        # Blank text is a missing date, not a bad one
+        unparsed = parsed.isna() & ~values.map(lambda v: isinstance(v, str) and not v.strip())
+        rows = np.bincount(codes[codes >= 0], minlength=len(values))
+        report['count'] = int(rows[unparsed.to_numpy()].sum())
+        report['values'] = [str(value) for value in values[unparsed].head(sample_limit)]
+
+    dates = np.where(parsed.notna(), parsed.dt.date, None)
+    # Missing cells have code -1, which picks the trailing None
+    return np.append(dates, None).take(codes)
+
+
+def _integer_column(text):
+    """
+    Integer values of a cleaned text column; None where it isn't a whole
+    number that fits an IntegerField.
+    """
+    numbers = pd.to_numeric(pd.Series(text), errors='coerce')
+    valid = numbers.notna() & (numbers % 1 == 0) & (numbers.abs() <= MAX_INT_FIELD)
+    return np.where(valid, numbers.fillna(0).astype('int64').to_numpy(dtype=object), None)
+
+
+def normalize_student_frame(df, date_report=None):
+    """
+    Normalize a parsed student sheet column-wise.
+    Returns a DataFrame with STUDENT_FIELDS followed by DERIVED_STUDENT_FIELDS:
+    text columns as stripped strings, hall/seat/register numbers without Excel
+    float artefacts, exam_date as datetime.date or None, hall/seat numbers as
+    integers (None if not numeric) and the department code ('' if unknown).
+    Missing columns become ''. Exam dates that could not be parsed are
+    reported into `date_report` (see parse_exam_dates).
+    """
+    normalized = pd.DataFrame(index=df.index)
+    for field in STUDENT_FIELDS:
+        if field not in df.columns:
+            normalized[field] = None if field == 'exam_date' else ''
+            continue
+
+        column = df[field]
+        if isinstance(column, pd.DataFrame):
+            # Several headers mapped to the same field; the first one wins
+            column = column.iloc[:, 0]
+
+        if field == 'exam_date':
+            normalized[field] = parse_exam_dates(column, date_report)
+        else:
+            normalized[field] = _clean_text_column(column)
+
+    normalized['hall_no_int'] = _integer_column(normalized['hall_no'].to_numpy())
+    normalized['seat_no_int'] = _integer_column(normalized['seat_no'].to_numpy())
+    normalized['department'] = get_departments_from_register_nos(normalized['register_no']).to_numpy()
+    return normalized
+
+
+def drop_duplicate_register_numbers(df, report_limit=50, seen=None):
+    """
+    Remove rows whose register number already appeared earlier in the sheet.
+    A register number is unique per dataset, so only the first row is kept.
+    When the sheet is processed in chunks, pass the same `seen` set for every
+    chunk so repeats across chunks are caught too; it is updated in place.
+
+    Returns the de-duplicated DataFrame and a report dict:
+    {'count': <rows dropped>, 'register_nos': [<first few repeated numbers>]}
+    """
+    register_nos = df['register_no'].astype(str)
+    duplicated = register_nos.duplicated(keep='first')
+    if seen is not None:
+        duplicated |= register_nos.isin(seen)
+        seen.update(register_nos[~duplicated])
+    dropped = int(duplicated.sum())
+
+    report = {'count': dropped, 'register_nos': []}
+    if dropped:
+        report['register_nos'] = register_nos[duplicated].unique()[:report_limit].tolist()
+        logger.info('Dropped %d duplicate register number rows', dropped)
+        df = df[~duplicated]
+
+    return df, report
 
 
 # ============ HALL TICKET UTILITY FUNCTIONS ============
 
+# Base form of a department name (no separators) -> canonical key
+DEPARTMENT_NAME_MAP = {
+    'AIML': 'AI&ML',
+    'AIDS': 'AI&DS',
+    'CSE': 'CSE',
+    'ECE': 'ECE',
+    'IT': 'IT',
+    'MECH': 'MECH',
+    'RA': 'R&A',
+    'CSBS': 'CSBS',
+    'CYS': 'CYS',
+}
+_DEPARTMENT_NAMES = frozenset(DEPARTMENT_NAME_MAP.values())
+_DEPARTMENT_SEPARATORS = str.maketrans('', '', '&-_ ')
+
+# Register number department code -> canonical key
+DEPARTMENT_CODE_MAP = {
+    'UAM': 'AI&ML',
+    'UAD': 'AI&DS',
+    'UCS': 'CSE',
+    'UEC': 'ECE',
+    'UME': 'MECH',
+    'UIT': 'IT',
+    'URA': 'R&A',
+    'UCB': 'CSBS',
+    'UCY': 'CYS',
+}
+
+# The department code directly follows the leading digits (institution
+# code and year), e.g. 711725 UAM 132
+DEPARTMENT_CODE_PATTERN = re.compile(
+    r'^\s*\d*(' + '|'.join(DEPARTMENT_CODE_MAP) + ')', re.IGNORECASE
+)
+
+
 def normalize_department_name(dept_name):
     """
     Normalize department name to canonical key.
@@ -200,27 +509,12 @@ def normalize_department_name(dept_name):
     normalized = str(dept_name).upper().strip()
     
     # Remove common separators to create a base form
-    base_form = normalized.replace('&', '').replace('-', '').replace('_', '').replace(' ', '')
-    
-    # Map base forms to canonical department names
-    canonical_map = {
-        'AIML': 'AI&ML',
-        'AIDS': 'AI&DS',
-        'CSE': 'CSE',
-        'ECE': 'ECE',
-        'IT': 'IT',
-        'MECH': 'MECH',
-        'RA': 'R&A',
-        'CSBS': 'CSBS',
-        'CYS': 'CYS',
-    }
-    
-    # Check if base form matches
-    if base_form in canonical_map:
-        return canonical_map[base_form]
+    canonical = DEPARTMENT_NAME_MAP.get(normalized.translate(_DEPARTMENT_SEPARATORS))
+    if canonical:
+        return canonical
     
     # If already in canonical form, return as-is
-    if normalized in canonical_map.values():
+    if normalized in _DEPARTMENT_NAMES:
         return normalized
     
     # No match found
@@ -229,11 +523,12 @@ def normalize_department_name(dept_name):
 
 def get_department_from_register_no(register_no):
     """
-    Extract department from register number by searching for 3-letter department code.
+    Extract department from register number by its 3-letter department code.
     Returns department name or None if invalid.
     
-    The department code can appear anywhere in the register number.
-    This logic is year-independent and works with any register number format.
+    The code must directly follow the leading digits of the register number
+    (institution code and year), so letters later in the number can't be
+    mistaken for it. This logic is year-independent.
     
     Mapping:
     UAM → AI&ML
@@ -255,29 +550,31 @@ def get_department_from_register_no(register_no):
     if not register_no:
         return None
     
-    # Convert to uppercase for case-insensitive matching
-    register_no_upper = str(register_no).upper()
-    
-    # Department code mapping (3-letter codes)
-    dept_code_map = {
-        'UAM': 'AI&ML',
-        'UAD': 'AI&DS',
-        'UCS': 'CSE',
-        'UEC': 'ECE',
-        'UME': 'MECH',
-        'UIT': 'IT',
-        'URA': 'R&A',
-        'UCB': 'CSBS',
-        'UCY': 'CYS',
-    }
-    
-    # Search for any valid department code in the register number
-    for code, department in dept_code_map.items():
-        if code in register_no_upper:
-            return department
-    
-    # No valid department code found
-    return None
+    match = DEPARTMENT_CODE_PATTERN.match(str(register_no))
+    if not match:
+        return None
+    return DEPARTMENT_CODE_MAP[match.group(1).upper()]
+
+
+def get_departments_from_register_nos(register_nos):
+    """
+    Vectorized get_department_from_register_no for a whole register number
+    column. Returns a Series of department names ('' where unknown) aligned
+    with the input.
+    """
+    register_nos = pd.Series(register_nos)
+    # A sheet repeats each register number once per course; match each
+    # distinct value once (missing values factorize to -1 -> '')
+    positions, uniques = pd.factorize(register_nos)
+    match = DEPARTMENT_CODE_PATTERN.match
+    departments = []
+    for value in uniques:
+        found = match(str(value))
+        departments.append(DEPARTMENT_CODE_MAP[found.group(1).upper()] if found else '')
+    departments.append('')
+    return pd.Series(
+        np.array(departments, dtype=object).take(positions), index=register_nos.index
+    )
 
 
 def parse_hall_ticket_excel(file_obj):
@@ -296,6 +593,7 @@ def parse_hall_ticket_excel(file_obj):
     from datetime import datetime
     
     records = []
+    row_errors = WarningLimiter(logger)
     
     # Load workbook
     file_obj.seek(0)
@@ -307,10 +605,10 @@ def parse_hall_ticket_excel(file_obj):
         department = normalize_department_name(sheet_name)
         
         if not department:
-            print(f"WARNING: Unknown worksheet '{sheet_name}', skipping...")
+            logger.warning("Unknown worksheet '%s', skipping", sheet_name)
             continue
         
-        print(f"Processing worksheet '{sheet_name}' → Department: {department}")
+        logger.info("Processing worksheet '%s' -> department %s", sheet_name, department)
         
         sheet = wb[sheet_name]
         
@@ -337,7 +635,7 @@ def parse_hall_ticket_excel(file_obj):
         required = ['semester', 'course_code', 'course_title', 'exam_date', 'session']
         missing = [col for col in required if col not in header_map]
         if missing:
-            print(f"WARNING: Worksheet '{sheet_name}' missing columns: {missing}, skipping...")
+            logger.warning("Worksheet '%s' missing columns %s, skipping", sheet_name, missing)
             continue
         
         # Read data rows (starting from row 2)
@@ -375,7 +673,8 @@ def parse_hall_ticket_excel(file_obj):
                     'session': session,
                 })
             except Exception as e:
-                print(f"WARNING: Error parsing row in '{sheet_name}': {e}")
+                row_errors.warning("Error parsing row in '%s': %s", sheet_name, e)
                 continue
     
+    row_errors.flush('row errors')
     return records
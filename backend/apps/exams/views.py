@@ -1,12 +1,31 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.authentication import BasicAuthentication, SessionAuthentication
+from rest_framework.permissions import IsAdminUser
 from django.contrib.auth import authenticate
 from django.contrib.auth.models import User
-from .models import Dataset, Student
-from .utils import clean_and_parse_excel
+from .models import ActiveDataset, Dataset, HallSeating, Student, StudentSnapshot, ImportJob
+from .jobs import submit_import_job, submit_purge_job
+from .cache import (
+    get_active_dataset, invalidate_active_dataset,
+    get_department_semesters_json, get_hall_summaries
+)
+from .delta import apply_student_delta
+from .halls import build_hall_seatings, hall_summary
+from .metrics import render_metrics
+from .tickets import archive_path
+from .uploads import uploaded_file_hash
+from .snapshots import build_student_snapshots, dump_json, login_payload, ticket_student_payload
+from django.conf import settings
+from django.http import FileResponse, HttpResponse
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Q
+from django.urls import reverse
 from django.utils import timezone
-import pandas as pd
+from datetime import datetime, timedelta
+import os
 
 class LoginView(APIView):
     def post(self, request):
@@ -22,147 +41,313 @@ class LoginView(APIView):
         
         else: # Student Login
             # Check active dataset first
-            active_dataset = Dataset.objects.filter(is_active=True).first()
+            active_dataset = get_active_dataset()
             if not active_dataset:
                 return Response({'error': 'No active exam info found. Pending for admin access.'}, status=status.HTTP_403_FORBIDDEN)
             
-            try:
-                # Filter by active dataset and credentials
-                student = Student.objects.get(register_no=username, password=password, dataset=active_dataset)
-                
-                # Clean hall and seat numbers (remove decimal points from Excel numeric values)
-                hall_no = str(student.hall_no).strip()
-                seat_no = str(student.seat_no).strip()
-                
-                # Convert decimal values to integers (e.g., "201.0" -> "201")
-                try:
-                    if '.' in hall_no:
-                        hall_no = str(int(float(hall_no)))
-                except (ValueError, TypeError):
-                    pass  # Keep original if conversion fails
-                
-                try:
-                    if '.' in seat_no:
-                        seat_no = str(int(float(seat_no)))
-                except (ValueError, TypeError):
-                    pass  # Keep original if conversion fails
-                
-                # Format exam date properly (from database DateField)
-                exam_date_str = student.exam_date.strftime('%Y-%m-%d') if student.exam_date else None
-                
-                return Response({
-                    'role': 'student',
-                    'name': student.name,
-                    'register_no': student.register_no,
-                    'course_code': student.course_code,
-                    'course_title': student.course_title,
-                    'exam_date': exam_date_str,  # Properly formatted from database
-                    'session': student.session,
-                    'hall_no': hall_no,  # Cleaned (no decimals)
-                    'seat_no': seat_no   # Cleaned (no decimals)
-                }, status=status.HTTP_200_OK)
-            except Student.DoesNotExist:
+            # One point lookup on the snapshot built when the dataset was activated
+            payload = StudentSnapshot.objects.filter(
+                dataset=active_dataset, register_no=username, password=password
+            ).values_list('login_json', flat=True).first()
+            
+            # Snapshots current with the students answer misses too, so a bad
+            # login costs one query; only datasets activated before snapshots
+            # existed (or not rebuilt since) fall back to the students table
+            if payload is None and active_dataset.snapshots_revision != active_dataset.revision:
+                student = Student.objects.filter(register_no=username, password=password, dataset=active_dataset).first()
+                if student is not None:
+                    payload = dump_json(login_payload(student))
+            if payload is None:
                 return Response({'error': 'Invalid Credentials or Student not found in active list'}, status=status.HTTP_401_UNAUTHORIZED)
+            
+            return HttpResponse(payload, content_type='application/json')
+
+
+def _upload_response(job, message, status_code, **extra):
+    return Response({
+        'message': message,
+        'job_id': job.id,
+        'status_url': reverse('job-status', args=[job.id]),
+        **extra
+    }, status=status_code)
+
+
+def _duplicate_upload_response(content_hash):
+    """
+    Response for a file identical to an existing dataset or to an import
+    still in progress, or None if the file is new.
+    """
+    stale_after = timezone.now() - timedelta(seconds=settings.IMPORT_JOB_STALE_SECONDS)
+    job = (
+        ImportJob.objects.filter(kind=ImportJob.KIND_IMPORT)
+        .filter(
+            # Deltas change a dataset's contents (and hash) after its import
+            Q(stage=ImportJob.STAGE_DONE, dataset__content_hash=content_hash)
+            | Q(content_hash=content_hash, updated_at__gte=stale_after,
+                stage__in=[ImportJob.STAGE_QUEUED, ImportJob.STAGE_READING, ImportJob.STAGE_INSERTING])
+        )
+        .order_by('-created_at').first()
+    )
+    if job is not None and job.dataset_id:
+        return _upload_response(job, 'This file was already uploaded', status.HTTP_200_OK,
+                                dataset_id=job.dataset_id, duplicate=True)
+    if job is not None:
+        return _upload_response(job, 'This file is already being imported', status.HTTP_202_ACCEPTED,
+                                duplicate=True)
+    
+    # Datasets imported before upload jobs existed
+    dataset_id = (
+        Dataset.objects.filter(content_hash=content_hash)
+        .order_by('-uploaded_at').values_list('id', flat=True).first()
+    )
+    if dataset_id is not None:
+        return Response({
+            'message': 'This file was already uploaded',
+            'job_id': None,
+            'status_url': None,
+            'dataset_id': dataset_id,
+            'duplicate': True
+        }, status=status.HTTP_200_OK)
+    return None
+
+
+def _replayed_upload_response(job, content_hash):
+    """
+    Response for an upload repeating the Idempotency-Key of `job`.
+    """
+    if job.content_hash and job.content_hash != content_hash:
+        return Response({'error': 'This Idempotency-Key was already used for a different file'},
+                        status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+    return _upload_response(job, 'Upload already accepted', status.HTTP_202_ACCEPTED, dataset_id=job.dataset_id)
 
 
 class DatasetUploadView(APIView):
+    """
+    Store an uploaded sheet and queue its import.
+    A file identical to an existing dataset (or to an import in progress) is
+    not imported again; the existing dataset or job is returned instead. A
+    request repeating an earlier Idempotency-Key with the same file gets that
+    request's job, unless the job failed: the retry is then imported again
+    under the key. With a different file it is rejected with 422.
+    """
     def post(self, request):
         # Only allow simpler validation for now (assume admin checks handled via token or session, but for quick prototype we skip strict auth check here or add simple one if needed)
         # For full security we'd check headers.
         
+        idempotency_key = request.headers.get('Idempotency-Key', '').strip() or None
+        if idempotency_key and len(idempotency_key) > 100:
+            return Response({'error': 'Idempotency-Key must be at most 100 characters'}, status=status.HTTP_400_BAD_REQUEST)
+        
         file = request.FILES.get('file')
         if not file:
             return Response({'error': 'No file provided'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        # Hashed while the upload streamed in (see uploads.py)
+        content_hash = uploaded_file_hash(request, 'file')
+        if idempotency_key:
+            job = ImportJob.objects.filter(idempotency_key=idempotency_key).first()
+            failed = job is not None and (job.stage == ImportJob.STAGE_FAILED or job.is_stale)
+            if failed and job.content_hash == content_hash:
+                # Retrying a failed import: the key moves to the new job
+                ImportJob.objects.filter(pk=job.pk).update(idempotency_key=None)
+            elif job is not None:
+                return _replayed_upload_response(job, content_hash)
+
+        duplicate = _duplicate_upload_response(content_hash)
+        if duplicate is not None:
+            return duplicate
 
+        # Store the file and hand parsing/inserting to a background job so
+        # large sheets don't hold a web worker; poll the status URL for progress
+        job = ImportJob(file=file, content_hash=content_hash, idempotency_key=idempotency_key)
         try:
-            df = clean_and_parse_excel(file)
-            
-            # Create Dataset
-            dataset = Dataset.objects.create(file=file, is_active=False)
-            
-            # Create Students
-            students_to_create = []
-            for _, row in df.iterrows():
-                # Format Date if needed
-                e_date = row.get('exam_date')
-                parsed_date = None
-                
-                # Try to parse the exam_date
-                if pd.notna(e_date):
-                    try:
-                        # Handle string dates in YYYY-MM-DD format
-                        if isinstance(e_date, str):
-                            from datetime import datetime
-                            parsed_date = datetime.strptime(e_date.strip(), '%Y-%m-%d').date()
-                        # Handle datetime objects
-                        elif hasattr(e_date, 'date'):
-                            parsed_date = e_date.date()
-                        # Handle pandas Timestamp
-                        elif pd.api.types.is_datetime64_any_dtype(type(e_date)):
-                            parsed_date = pd.to_datetime(e_date).date()
-                        # Handle Excel serial numbers
-                        elif isinstance(e_date, (int, float)) and e_date > 0:
-                            from datetime import datetime, timedelta
-                            excel_epoch = datetime(1899, 12, 30)
-                            parsed_date = (excel_epoch + timedelta(days=float(e_date))).date()
-                        else:
-                            # Last resort: try pandas
-                            parsed_date = pd.to_datetime(e_date, errors='coerce').date()
-                    except Exception as parse_error:
-                        print(f"DEBUG: Date parsing error for value '{e_date}' (type: {type(e_date)}): {parse_error}")
-                        parsed_date = None
-                
-                students_to_create.append(Student(
-                    dataset=dataset,
-                    register_no=str(row.get('register_no', '')),
-                    name=str(row.get('name', '')),
-                    course_code=str(row.get('course_code', '')),
-                    course_title=str(row.get('course_title', '')),
-                    exam_date=parsed_date, 
-                    session=str(row.get('session', '')),
-                    hall_no=str(row.get('hall_no', '')),
-                    seat_no=str(row.get('seat_no', ''))
-                ))
-            
-            Student.objects.bulk_create(students_to_create)
-            
-            return Response({'message': 'Dataset uploaded successfully', 'students_count': len(students_to_create), 'dataset_id': dataset.id}, status=status.HTTP_201_CREATED)
+            with transaction.atomic():
+                job.save()
+                submit_import_job(job)
+        except IntegrityError:
+            # A concurrent retry with the same key got there first
+            job.file.delete(save=False)
+            job = ImportJob.objects.filter(idempotency_key=idempotency_key).first()
+            if job is None:
+                raise
+            return _replayed_upload_response(job, content_hash)
+        
+        return _upload_response(job, 'Upload accepted, import in progress', status.HTTP_202_ACCEPTED)
+
+
+class JobStatusView(APIView):
+    """
+    Progress of a background import or purge job.
+    """
+    def get(self, request, job_id):
+        try:
+            job = ImportJob.objects.get(pk=job_id)
+        except ImportJob.DoesNotExist:
+            return Response({'error': 'Job not found'}, status=status.HTTP_404_NOT_FOUND)
+        
+        stage = job.stage
+        error = job.error
+        # A job whose row stopped updating lost its worker (restart or crash)
+        if job.is_stale:
+            stage = ImportJob.STAGE_FAILED
+            error = 'Job was interrupted. Please try again.'
+        
+        return Response({
+            'job_id': job.id,
+            'kind': job.kind,
+            'stage': stage,
+            'rows_processed': job.rows_processed,
+            'rows_per_second': job.rows_per_second,
+            'dataset_id': job.dataset_id,
+            'students_count': job.rows_processed if stage == ImportJob.STAGE_DONE and job.kind == ImportJob.KIND_IMPORT else None,
+            'duplicates': job.duplicates,
+            'unparsed_dates': job.unparsed_dates,
+            'error': error or None,
+            'created_at': job.created_at,
+            'started_at': job.started_at,
+            'finished_at': job.finished_at
+        })
+
+class DatasetPagination(PageNumberPagination):
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
 
-        except Exception as e:
-            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
 class DatasetListView(APIView):
+    """
+    Lists datasets, newest first, with their ingest statistics.
+    Pass ?page= (and optionally ?page_size=) for a paginated response;
+    without it the full list is returned as before.
+    """
     def get(self, request):
-        datasets = Dataset.objects.all().order_by('-uploaded_at')
+        datasets = Dataset.objects.select_related('stats').order_by('-uploaded_at')
+        
+        paginator = None
+        if 'page' in request.query_params:
+            paginator = DatasetPagination()
+            datasets = paginator.paginate_queryset(datasets, request, view=self)
+        else:
+            datasets = list(datasets)
+        
+        # Datasets uploaded before stats existed are counted in one grouped query
+        missing = [d.id for d in datasets if not hasattr(d, 'stats')]
+        counts = {}
+        if missing:
+            counts = dict(
+                Student.objects.filter(dataset_id__in=missing)
+                .values('dataset_id').annotate(n=Count('id'))
+                .values_list('dataset_id', 'n')
+            )
+        
         data = []
         for d in datasets:
+            stats = getattr(d, 'stats', None)
             data.append({
                 'id': d.id,
                 'uploaded_at': d.uploaded_at,
                 'is_active': d.is_active,
-                'student_count': d.students.count()
+                'student_count': stats.distinct_students if stats else counts.get(d.id, 0),
+                'stats': {
+                    'row_count': stats.row_count,
+                    'distinct_students': stats.distinct_students,
+                    'distinct_halls': stats.distinct_halls,
+                    'first_exam_date': stats.first_exam_date,
+                    'last_exam_date': stats.last_exam_date,
+                    'parse_seconds': stats.parse_seconds
+                } if stats else None
             })
+        
+        if paginator is not None:
+            return paginator.get_paginated_response(data)
         return Response(data)
 
 class ToggleDatasetView(APIView):
     def post(self, request, pk):
         try:
-            dataset = Dataset.objects.get(pk=pk)
-            # Deactivate all others if activating this one
-            if not dataset.is_active:
-                Dataset.objects.update(is_active=False)
-                dataset.is_active = True
-            else:
-                dataset.is_active = False # Toggle off
-            dataset.save()
+            # Materialize the students' login/ticket payloads before going live;
+            # done before the swap so the pointer lock is held only briefly
+            with transaction.atomic():
+                # Concurrent activations (and deltas) of the dataset queue here
+                dataset = Dataset.objects.select_for_update().get(pk=pk)
+                if not dataset.is_active and dataset.snapshots_revision != dataset.revision:
+                    # Not built yet, or built before the students last changed
+                    build_student_snapshots(dataset)
+                    build_hall_seatings(dataset)
+                    Dataset.objects.filter(pk=pk).update(snapshots_revision=dataset.revision)
+            
+            with transaction.atomic():
+                # Swaps the single active-dataset pointer under a row lock
+                dataset = ActiveDataset.toggle(pk)
+                invalidate_active_dataset()
             return Response({'message': f"Dataset {'activated' if dataset.is_active else 'deactivated'}", 'is_active': dataset.is_active})
         except Dataset.DoesNotExist:
             return Response({'error': 'Dataset not found'}, status=status.HTTP_404_NOT_FOUND)
 
+class DatasetDeltaView(APIView):
+    """
+    Apply a corrected student sheet to an existing dataset, writing only the
+    students that were added, changed or (unless partial=true) left out, and
+    return the change summary. Pass dry_run=true to get the summary without
+    writing anything. Sheets larger than STUDENT_DELTA_MAX_BYTES are refused,
+    as they are parsed and written within the request.
+    """
+    def post(self, request, pk):
+        file = request.FILES.get('file')
+        if not file:
+            return Response({'error': 'No file provided'}, status=status.HTTP_400_BAD_REQUEST)
+        if file.size > settings.STUDENT_DELTA_MAX_BYTES:
+            return Response(
+                {'error': f'Corrected sheets are limited to {settings.STUDENT_DELTA_MAX_BYTES // 1024} KB; '
+                          'upload a larger sheet as a new dataset instead'},
+                status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+            )
+        try:
+            dataset = Dataset.objects.get(pk=pk)
+        except Dataset.DoesNotExist:
+            return Response({'error': 'Dataset not found'}, status=status.HTTP_404_NOT_FOUND)
+        
+        flags = {
+            name: str(request.data.get(name, request.query_params.get(name, ''))).lower() in ('1', 'true', 'yes')
+            for name in ('partial', 'dry_run')
+        }
+        try:
+            summary = apply_student_delta(
+                dataset, file,
+                remove_missing=not flags['partial'],
+                dry_run=flags['dry_run'],
+                content_hash=uploaded_file_hash(request, 'file'),
+            )
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(summary)
+
 class DeleteStudentsView(APIView):
     def delete(self, request):
-        Dataset.objects.all().delete() # Cascades to students
-        return Response({'message': 'All data cleared'})
+        # Students are removed in batches by a background job; poll status_url
+        with transaction.atomic():
+            job = ImportJob.objects.create(kind=ImportJob.KIND_PURGE)
+            submit_purge_job(job)
+        return Response({
+            'message': 'Deleting all data',
+            'job_id': job.id,
+            'status_url': reverse('job-status', args=[job.id])
+        }, status=status.HTTP_202_ACCEPTED)
+
+
+class DatasetDetailView(APIView):
+    def delete(self, request, pk):
+        if not Dataset.objects.filter(pk=pk).exists():
+            return Response({'error': 'Dataset not found'}, status=status.HTTP_404_NOT_FOUND)
+        
+        with transaction.atomic():
+            job = ImportJob.objects.create(kind=ImportJob.KIND_PURGE)
+            submit_purge_job(job, [pk])
+        return Response({
+            'message': f'Deleting dataset {pk}',
+            'job_id': job.id,
+            'status_url': reverse('job-status', args=[job.id])
+        }, status=status.HTTP_202_ACCEPTED)
 
 
 # ============ HALL TICKET VIEWS ============
@@ -170,30 +355,13 @@ class DeleteStudentsView(APIView):
 class HallTicketView(APIView):
     """
     Student endpoint to retrieve hall ticket data.
-    Automatically determines department from register number.
-    Auto-loads hall ticket data from pre-existing Excel file if database is empty.
+    The department is determined from the register number at upload time.
     Returns all semesters' exam data for the student's department.
+    The schedule itself is loaded at deploy time (manage.py load_hall_tickets);
+    until then this endpoint answers 503 instead of parsing Excel in the request.
     """
     def get(self, request):
-        from .models import HallTicketExam, Student
-        from .utils import get_department_from_register_no, parse_hall_ticket_excel
-        import os
-        
-        # Auto-load Excel data if database is empty
-        if not HallTicketExam.objects.exists():
-            try:
-                # Path to the pre-existing hall ticket Excel file
-                excel_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'HALL_TICKET.xlsx')
-                
-                if os.path.exists(excel_path):
-                    with open(excel_path, 'rb') as excel_file:
-                        records = parse_hall_ticket_excel(excel_file)
-                        if records:
-                            exam_objects = [HallTicketExam(**record) for record in records]
-                            HallTicketExam.objects.bulk_create(exam_objects)
-                            print(f"Auto-loaded {len(records)} hall ticket records from Excel file")
-            except Exception as e:
-                print(f"Error auto-loading hall ticket data: {str(e)}")
+        from .utils import get_department_from_register_no
         
         # Get register number from query params
         register_no = request.GET.get('register_no')
@@ -201,48 +369,164 @@ class HallTicketView(APIView):
         if not register_no:
             return Response({'error': 'Register number is required'}, status=status.HTTP_400_BAD_REQUEST)
         
-        # Identify department from register number
-        department = get_department_from_register_no(register_no)
+        # Get student details from active dataset
+        active_dataset = get_active_dataset()
+        if not active_dataset:
+            return Response({'error': 'No active dataset found'}, status=status.HTTP_403_FORBIDDEN)
+        
+        # The department was identified from the register number at upload
+        snapshot = StudentSnapshot.objects.filter(
+            dataset=active_dataset, register_no=register_no
+        ).values_list('department', 'ticket_json').first()
+        
+        if snapshot is not None:
+            department, student_json = snapshot
+        else:
+            # Datasets activated before snapshots existed have none
+            try:
+                student = Student.objects.get(register_no=register_no, dataset=active_dataset)
+            except Student.DoesNotExist:
+                if not get_department_from_register_no(register_no):
+                    return Response({'error': 'Invalid register number format or unknown department'}, status=status.HTTP_400_BAD_REQUEST)
+                return Response({'error': 'Student not found in active dataset'}, status=status.HTTP_404_NOT_FOUND)
+            department = student.department
+            student_json = dump_json(ticket_student_payload(student))
         
         if not department:
             return Response({'error': 'Invalid register number format or unknown department'}, status=status.HTTP_400_BAD_REQUEST)
         
-        # Get student details from active dataset
+        # Exam data for this department, grouped by semester (cached per department)
+        semesters_json = get_department_semesters_json(department)
+        
+        if semesters_json is None:
+            return Response(
+                {'error': 'Hall ticket schedule is loading. Please try again shortly.'},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+                headers={'Retry-After': '30'}
+            )
+        if not semesters_json:
+            return Response({'error': f'No hall ticket data found for department {department}'}, status=status.HTTP_404_NOT_FOUND)
+        
+        # Return student info and exam data, both already serialized
+        return HttpResponse(
+            f'{{"student":{student_json},"semesters":{semesters_json}}}',
+            content_type='application/json'
+        )
+
+
+class HallTicketPdfView(APIView):
+    """
+    Admin endpoint serving printable hall tickets of the active dataset as
+    a ZIP of PDFs (one per student, <department>/<register_no>.pdf), for one
+    department (?department=CSE) or all of them.
+    Archives are rendered ahead of time by `manage.py render_hall_tickets`,
+    as rendering is too slow for a request; each ends with a summary.json
+    of the ticket count and tickets per second.
+    """
+    def get(self, request):
+        from .utils import normalize_department_name
+        
+        department = request.GET.get('department')
+        if department:
+            department = normalize_department_name(department)
+            if not department:
+                return Response({'error': 'Unknown department'}, status=status.HTTP_400_BAD_REQUEST)
+            if not get_department_semesters_json(department):
+                return Response({'error': f'No hall ticket data found for department {department}'}, status=status.HTTP_404_NOT_FOUND)
+        
+        active_dataset = get_active_dataset()
+        if not active_dataset:
+            return Response({'error': 'No active dataset found'}, status=status.HTTP_403_FORBIDDEN)
+        
+        path = archive_path(active_dataset, department)
+        if not os.path.exists(path):
+            command = 'render_hall_tickets' + (f' --department "{department}"' if department else '')
+            return Response({'error': f'Hall tickets are not rendered yet; run manage.py {command}'},
+                            status=status.HTTP_404_NOT_FOUND)
+        filename = f"hall_tickets_{department or 'all'}.zip".replace('&', '_')
+        return FileResponse(open(path, 'rb'), as_attachment=True, filename=filename,
+                            content_type='application/zip')
+
+
+# ============ HALL SEATING VIEWS ============
+
+def _hall_filters(request):
+    """
+    exam_date (YYYY-MM-DD) and session filters from the query string.
+    Raises ValueError for a malformed date.
+    """
+    filters = {}
+    exam_date = request.GET.get('exam_date')
+    if exam_date:
+        filters['exam_date'] = datetime.strptime(exam_date, '%Y-%m-%d').date()
+    session = request.GET.get('session')
+    if session:
+        filters['session'] = session
+    return filters
+
+
+class HallListView(APIView):
+    """
+    Halls of the active dataset with block, floor and occupancy, optionally
+    filtered by ?exam_date=YYYY-MM-DD and ?session=.
+    Served from the seating maps built at activation (cached per worker).
+    """
+    def get(self, request):
         try:
-            active_dataset = Dataset.objects.filter(is_active=True).first()
-            if not active_dataset:
-                return Response({'error': 'No active dataset found'}, status=status.HTTP_403_FORBIDDEN)
-            
-            student = Student.objects.get(register_no=register_no, dataset=active_dataset)
-        except Student.DoesNotExist:
-            return Response({'error': 'Student not found in active dataset'}, status=status.HTTP_404_NOT_FOUND)
+            filters = _hall_filters(request)
+        except ValueError:
+            return Response({'error': 'exam_date must be YYYY-MM-DD'}, status=status.HTTP_400_BAD_REQUEST)
         
-        # Get all exam data for this department, grouped by semester
-        exams = HallTicketExam.objects.filter(department=department).order_by('semester', 'exam_date', 'session')
+        active_dataset = get_active_dataset()
+        if not active_dataset:
+            return Response({'error': 'No active dataset found'}, status=status.HTTP_403_FORBIDDEN)
         
-        if not exams.exists():
-            return Response({'error': f'No hall ticket data found for department {department}'}, status=status.HTTP_404_NOT_FOUND)
+        halls = get_hall_summaries(active_dataset)
+        if filters:
+            exam_date = filters.get('exam_date')
+            exam_date = exam_date.strftime('%Y-%m-%d') if exam_date else None
+            halls = [
+                hall for hall in halls
+                if (not exam_date or hall['exam_date'] == exam_date)
+                and ('session' not in filters or hall['session'] == filters['session'])
+            ]
+        return HttpResponse(dump_json(halls), content_type='application/json')
+
+
+class HallSeatingView(APIView):
+    """
+    Seat grid of one hall (roster ordered by seat number) for each date and
+    session it is used, optionally filtered by ?exam_date= and ?session=.
+    """
+    def get(self, request, hall_no):
+        try:
+            filters = _hall_filters(request)
+        except ValueError:
+            return Response({'error': 'exam_date must be YYYY-MM-DD'}, status=status.HTTP_400_BAD_REQUEST)
         
-        # Group exams by semester
-        semesters_data = {}
-        for exam in exams:
-            sem = exam.semester
-            if sem not in semesters_data:
-                semesters_data[sem] = []
-            
-            semesters_data[sem].append({
-                'course_code': exam.course_code,
-                'course_title': exam.course_title,
-                'exam_date': exam.exam_date.strftime('%d-%m-%Y'),
-                'session': exam.session
-            })
+        active_dataset = get_active_dataset()
+        if not active_dataset:
+            return Response({'error': 'No active dataset found'}, status=status.HTTP_403_FORBIDDEN)
         
-        # Return student info and exam data
-        return Response({
-            'student': {
-                'name': student.name,
-                'register_no': student.register_no,
-                'department': department
-            },
-            'semesters': semesters_data
-        }, status=status.HTTP_200_OK)
+        seatings = HallSeating.objects.filter(dataset=active_dataset, hall_no=hall_no, **filters)
+        # Seat grids are stored serialized; splice them in without re-parsing
+        body = ','.join(
+            f'{dump_json(hall_summary(seating))[:-1]},"seats":{seating.seats_json}}}'
+            for seating in seatings
+        )
+        if not body:
+            return Response({'error': f'No seating found for hall {hall_no}'}, status=status.HTTP_404_NOT_FOUND)
+        return HttpResponse(f'[{body}]', content_type='application/json')
+
+
+class MetricsView(APIView):
+    """
+    Request latency and database cost per view across all workers, in the
+    Prometheus text format. Staff only: log in through /admin/ or scrape with
+    HTTP basic auth.
+    """
+    authentication_classes = [BasicAuthentication, SessionAuthentication]
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return HttpResponse(render_metrics(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -12,7 +12,9 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 
 from pathlib import Path
 import os
+import tempfile
 import dj_database_url
+from corsheaders.defaults import default_headers
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -48,6 +50,7 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',  # Add whitenoise for static files
+    'apps.exams.metrics.RequestMetricsMiddleware',  # Per-view timings for /api/metrics/
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -156,6 +159,81 @@ STORAGES = {
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# How often each worker re-checks shared cache version counters (seconds).
+# Admin changes such as toggling a dataset reach every worker within this delay.
+CACHE_REVALIDATE_SECONDS = float(os.environ.get('CACHE_REVALIDATE_SECONDS', '2'))
+
+# Student sheet ingestion: rows parsed per chunk, and rows per INSERT statement
+STUDENT_INGEST_CHUNK_SIZE = int(os.environ.get('STUDENT_INGEST_CHUNK_SIZE', '5000'))
+STUDENT_INSERT_BATCH_SIZE = int(os.environ.get('STUDENT_INSERT_BATCH_SIZE', '1000'))
+
+# Largest corrected sheet (bytes) applied to a dataset within the request;
+# bigger sheets are refused and should be uploaded as a new dataset
+STUDENT_DELTA_MAX_BYTES = int(os.environ.get('STUDENT_DELTA_MAX_BYTES', str(5 * 1024 * 1024)))
+
+# Hash uploads with SHA-256 while they stream in (request.upload_hashes), then
+# store them with Django's default handlers
+FILE_UPLOAD_HANDLERS = [
+    'apps.exams.uploads.ContentHashUploadHandler',
+    'django.core.files.uploadhandler.MemoryFileUploadHandler',
+    'django.core.files.uploadhandler.TemporaryFileUploadHandler',
+]
+
+# Background upload imports: worker threads per process (0 runs imports
+# inline after the upload commits), progress write interval, and how long a
+# running or queued job may go without an update before it is reported as failed
+IMPORT_JOB_WORKERS = int(os.environ.get('IMPORT_JOB_WORKERS', '1'))
+IMPORT_JOB_PROGRESS_INTERVAL = float(os.environ.get('IMPORT_JOB_PROGRESS_INTERVAL', '1'))
+IMPORT_JOB_STALE_SECONDS = int(os.environ.get('IMPORT_JOB_STALE_SECONDS', '60'))
+
+# Student rows deleted per transaction when purging datasets
+PURGE_BATCH_SIZE = int(os.environ.get('PURGE_BATCH_SIZE', '5000'))
+
+# Hall ticket exam schedule workbook, loaded by `manage.py load_hall_tickets`
+HALL_TICKET_EXCEL_PATH = os.environ.get('HALL_TICKET_EXCEL_PATH', os.path.join(BASE_DIR.parent, 'HALL_TICKET.xlsx'))
+
+# Maximum number of per-department hall ticket schedules kept in each worker.
+HALL_TICKET_CACHE_SIZE = int(os.environ.get('HALL_TICKET_CACHE_SIZE', '32'))
+
+# Batch hall ticket PDFs: rendering processes (0 = one per CPU) and tickets
+# handed to a process at a time
+HALL_TICKET_PDF_WORKERS = int(os.environ.get('HALL_TICKET_PDF_WORKERS', '0'))
+HALL_TICKET_PDF_BATCH_SIZE = int(os.environ.get('HALL_TICKET_PDF_BATCH_SIZE', '200'))
+# Examination named in the banner of printed hall tickets
+HALL_TICKET_EXAM_TITLE = os.environ.get('HALL_TICKET_EXAM_TITLE',
+                                        'HALL TICKET FOR THE END SEMESTER EXAMINATIONS - NOV/DEC 2025')
+
+# Request metrics: directory where each worker process writes its histograms
+# for /api/metrics/ to add up ('' keeps them per process), and the minimum
+# interval between writes
+METRICS_DIR = os.environ.get('METRICS_DIR', os.path.join(tempfile.gettempdir(), 'exam-portal-metrics'))
+METRICS_FLUSH_SECONDS = float(os.environ.get('METRICS_FLUSH_SECONDS', '5'))
+
+# Logging: application loggers ('apps.*') write to the console at APP_LOG_LEVEL.
+# INFO reports imports with their stage timings; DEBUG adds per-file parse details.
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'default': {
+            'format': '%(asctime)s %(levelname)s %(name)s: %(message)s',
+        },
+    },
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+            'formatter': 'default',
+        },
+    },
+    'loggers': {
+        'apps': {
+            'handlers': ['console'],
+            'level': os.environ.get('APP_LOG_LEVEL', 'INFO'),
+            'propagate': False,
+        },
+    },
+}
+
 # CORS settings - Update with your frontend URL on Render
 CORS_ALLOWED_ORIGINS = os.environ.get(
     'CORS_ALLOWED_ORIGINS',
@@ -165,6 +243,9 @@ CORS_ALLOWED_ORIGINS = os.environ.get(
 # Allow credentials for CORS
 CORS_ALLOW_CREDENTIALS = True
 
+# Uploads send an Idempotency-Key so retried requests aren't imported twice
+CORS_ALLOW_HEADERS = (*default_headers, 'idempotency-key')
+
 # Security settings for production
 if not DEBUG:
     SECURE_SSL_REDIRECT = True
@@ -0,0 +1,183 @@
+"""
+Benchmark the student sheet parsers on generated sheets.
+
+Writes synthetic student sheets (apps/exams/synthetic.py) as .xlsx, .xls
+(needs xlwt) and HTML-disguised-as-.xls at each size, then times each
+parser on each sheet in a fresh process and reports wall time, rows per
+second and peak memory (RSS growth while parsing):
+
+  clean_and_parse_excel  the whole-file parser
+  upload                 iter_student_chunks + normalize_student_frame, as the
+                         upload import runs them (without the database inserts)
+
+Run from backend/:
+  python scripts/benchmark_parsers.py [--sizes 10000,50000,200000] [--formats xlsx,xls,html]
+                                      [--output results.json] [--compare previous.json]
+"""
+import argparse
+import gc
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
+
+PARSERS = ['clean_and_parse_excel', 'upload']
+XLS_MAX_ROWS = 65535
+
+
+def _max_rss_mb():
+    # ru_maxrss is in kilobytes on Linux, bytes on macOS
+    scale = 1024 * 1024 if sys.platform == 'darwin' else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+
+
+def _current_rss_mb():
+    """
+    Resident memory right now (Linux); falls back to the peak elsewhere.
+    """
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * resource.getpagesize() / (1024 * 1024)
+    except OSError:
+        return _max_rss_mb()
+
+
+def run_child(path, parser):
+    """
+    Parse one sheet in this (fresh) process and print the measurements as
+    the last line of output.
+    """
+    from apps.exams.utils import clean_and_parse_excel, iter_student_chunks, normalize_student_frame
+
+    gc.collect()
+    baseline = _current_rss_mb()
+    started = time.perf_counter()
+    with open(path, 'rb') as f:
+        if parser == 'clean_and_parse_excel':
+            rows = len(clean_and_parse_excel(f))
+        else:
+            rows = sum(len(normalize_student_frame(chunk)) for chunk in iter_student_chunks(f))
+    seconds = time.perf_counter() - started
+    print(json.dumps({
+        'rows': rows,
+        'seconds': round(seconds, 3),
+        'rows_per_second': round(rows / seconds) if seconds else None,
+        'peak_mb': round(_max_rss_mb() - baseline, 1),
+    }))
+
+
+def measure(path, parser, repeat):
+    """
+    Best of `repeat` child runs; an error dict if the parser fails.
+    """
+    best = None
+    for _ in range(repeat):
+        child = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), '--child', path, parser],
+            capture_output=True, text=True
+        )
+        if child.returncode != 0:
+            error = (child.stderr.strip().splitlines() or ['failed'])[-1]
+            return {'error': error}
+        result = json.loads(child.stdout.strip().splitlines()[-1])
+        if best is None or result['seconds'] < best['seconds']:
+            best = result
+    return best
+
+
+def generate(directory, sheet_format, size, seed):
+    """
+    Path of the generated sheet (reused if it exists). Raises RuntimeError
+    when the format can't be written here.
+    """
+    from apps.exams.synthetic import write_student_sheet
+
+    suffix = {'xlsx': '.xlsx', 'xls': '.xls', 'html': '_html.xls'}[sheet_format]
+    path = os.path.join(directory, f'students_{size}{suffix}')
+    if not os.path.exists(path):
+        write_student_sheet(path, size, sheet_format, seed)
+    return path
+
+
+def report(results, baseline):
+    header = f"{'format':6} {'rows':>8} {'parser':22} {'seconds':>9} {'rows/s':>10} {'peak MB':>8}"
+    print(header)
+    print('-' * len(header))
+    previous = {(r['format'], r['size'], r['parser']): r for r in (baseline or {}).get('results', [])}
+    for result in results:
+        if 'error' in result:
+            line = f"{result['format']:6} {result['size']:>8} {result['parser']:22} {result['error']}"
+        else:
+            line = (f"{result['format']:6} {result['size']:>8} {result['parser']:22} "
+                    f"{result['seconds']:>9.3f} {result['rows_per_second'] or 0:>10,} {result['peak_mb']:>8.1f}")
+            old = previous.get((result['format'], result['size'], result['parser']))
+            if old and old.get('seconds'):
+                line += (f"   ({(result['seconds'] - old['seconds']) / old['seconds'] * 100:+.0f}% time, "
+                         f"{result['peak_mb'] - old['peak_mb']:+.1f} MB)")
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', default='10000,50000,200000')
+    parser.add_argument('--formats', default='xlsx,xls,html')
+    parser.add_argument('--parsers', default=','.join(PARSERS))
+    parser.add_argument('--repeat', type=int, default=1, help='Runs per case; the fastest is reported')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--sheets-dir', help='Keep generated sheets here (reused on later runs)')
+    parser.add_argument('--output', help='Write results as JSON to this file')
+    parser.add_argument('--compare', help='Results JSON of an earlier run to compare with')
+    parser.add_argument('--child', nargs=2, metavar=('PATH', 'PARSER'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    import django
+    django.setup()
+
+    if args.child:
+        run_child(*args.child)
+        return
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+    directory = args.sheets_dir or tempfile.mkdtemp(prefix='sheets_')
+    os.makedirs(directory, exist_ok=True)
+    results = []
+    for size in [int(size) for size in args.sizes.split(',')]:
+        for sheet_format in args.formats.split(','):
+            cases = [{'format': sheet_format, 'size': size, 'parser': name} for name in args.parsers.split(',')]
+            if sheet_format == 'xls' and size > XLS_MAX_ROWS:
+                results.extend(dict(case, error=f'skipped: .xls holds at most {XLS_MAX_ROWS} rows') for case in cases)
+                continue
+            try:
+                path = generate(directory, sheet_format, size, args.seed)
+            except RuntimeError as e:
+                results.extend(dict(case, error=f'skipped: {e}') for case in cases)
+                continue
+            for case in cases:
+                results.append(dict(case, **measure(path, case['parser'], args.repeat)))
+                print('.', end='', flush=True)
+    print('\n')
+
+    report(results, baseline)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'seed': args.seed, 'results': results}, f, indent=2)
+        print(f'\nResults written to {args.output}')
+    if not args.sheets_dir:
+        for name in os.listdir(directory):
+            os.remove(os.path.join(directory, name))
+        os.rmdir(directory)
+
+
+if __name__ == '__main__':
+    main()
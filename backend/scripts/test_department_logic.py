@@ -12,6 +12,8 @@ test_cases = [
     ('711725UCB200', 'CSBS'),
     ('711725UCY300', 'CYS'),
     ('711725XXX999', None),  # Invalid department code
+    ('711725UCS1UAM', 'CSE'),  # Only the code after the leading digits counts
+    ('711725XUAM132', None),
 ]
 
 print('\nDepartment Identification Tests:')
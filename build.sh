@@ -11,5 +11,8 @@ pip install -r requirements.txt
 # Run database migrations
 python manage.py migrate
 
+# Load the hall ticket schedule (skipped if already loaded)
+python manage.py load_hall_tickets
+
 # Collect static files
 python manage.py collectstatic --no-input
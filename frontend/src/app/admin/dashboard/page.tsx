@@ -1,13 +1,16 @@
 "use client";
 import { useEffect, useState } from 'react';
 import { useRouter } from 'next/navigation';
-import { uploadDataset, getDatasets, toggleDataset, deleteStudents } from '../../api';
+import { uploadDataset, waitForJob, getDatasets, toggleDataset, deleteStudents } from '../../api';
 import { motion } from 'framer-motion';
 
 export default function AdminDashboard() {
     const [datasets, setDatasets] = useState<any[]>([]);
     const [loading, setLoading] = useState(false);
     const [msg, setMsg] = useState('');
+    // The selected sheet and its idempotency key, kept for retrying after a
+    // failed upload so the retry can't import the sheet twice
+    const [pendingUpload, setPendingUpload] = useState<{ file: File; key: string } | null>(null);
     const router = useRouter();
 
     useEffect(() => {
@@ -25,17 +28,40 @@ export default function AdminDashboard() {
 
     const handleUpload = async (e: any) => {
         const file = e.target.files[0];
+        // Let the same file be picked again as a new upload
+        e.target.value = '';
         if (!file) return;
+        const upload = { file, key: crypto.randomUUID() };
+        setPendingUpload(upload);
+        await runUpload(upload);
+    };
+
+    const runUpload = async (upload: { file: File; key: string }) => {
         setLoading(true);
         setMsg('Uploading...');
         try {
-            await uploadDataset(file);
+            const res = await uploadDataset(upload.file, upload.key);
+            if (res.data.duplicate && res.data.dataset_id) {
+                // Same file as an existing dataset: nothing was imported
+                setPendingUpload(null);
+                setMsg('');
+                alert(res.data.message);
+                fetchDatasets();
+                return;
+            }
+            await waitForJob(res.data.job_id, (job) => {
+                setMsg(job.rows_processed ? `Importing... ${job.rows_processed} rows` : 'Importing...');
+            });
+            setPendingUpload(null);
             setMsg('');
             alert('Hall seating is uploaded');
             fetchDatasets();
         } catch (err: any) {
             setMsg('');
-            alert(err.response?.data?.error || 'Upload failed');
+            // Rejected requests won't succeed on retry; network and server errors
+            // may, and so may a failed import, which the server runs again for the key
+            if (err.response && err.response.status < 500) setPendingUpload(null);
+            alert(err.response?.data?.error || err.message || 'Upload failed');
         } finally {
             setLoading(false);
         }
@@ -51,7 +77,10 @@ export default function AdminDashboard() {
             setLoading(true);
             setMsg('Deleting...');
             try {
-                await deleteStudents();
+                const res = await deleteStudents();
+                await waitForJob(res.data.job_id, (job) => {
+                    setMsg(job.rows_processed ? `Deleting... ${job.rows_processed} rows` : 'Deleting...');
+                });
                 setMsg('');
                 alert('The previous allocation is deleted. Now you can upload the new hall seating.');
                 fetchDatasets();
@@ -121,6 +150,11 @@ export default function AdminDashboard() {
                             <input type="file" className="hidden" onChange={handleUpload} accept=".xls,.xlsx" />
                         </label>
                         {loading && <p className="text-sm text-blue-600 animate-pulse">{msg}</p>}
+                        {pendingUpload && !loading && (
+                            <button onClick={() => runUpload(pendingUpload)} className="w-full bg-purple-100 hover:bg-purple-200 text-purple-800 font-bold py-2 rounded-lg transition">
+                                Retry upload of {pendingUpload.file.name}
+                            </button>
+                        )}
 
                         <button onClick={handleRefresh} className="w-full bg-orange-500 hover:bg-orange-600 text-white font-bold py-3 rounded-lg shadow-lg flex items-center justify-center gap-2 transition transform hover:-translate-y-1">
                             <span>🔄 Refresh Seating Plans</span>
@@ -14,14 +14,58 @@ export const loginStudent = async (username: string, password: string) => {
   return api.post('/login/', { username, password, role: 'student' });
 };
 
-export const uploadDataset = async (file: File) => {
+// Retrying with the same idempotency key returns the first attempt's job
+// instead of importing the file twice; create one key per file selection.
+export const uploadDataset = async (file: File, idempotencyKey: string) => {
   const formData = new FormData();
   formData.append('file', file);
   return api.post('/upload/', formData, {
+    headers: { 'Content-Type': 'multipart/form-data', 'Idempotency-Key': idempotencyKey },
+  });
+};
+
+// Apply a corrected sheet to an existing dataset; only changed students are
+// written. `partial` keeps students missing from the sheet, `dryRun` only
+// reports the changes.
+export const uploadDatasetDelta = async (
+  id: number,
+  file: File,
+  options: { partial?: boolean; dryRun?: boolean } = {}
+) => {
+  const formData = new FormData();
+  formData.append('file', file);
+  formData.append('partial', String(Boolean(options.partial)));
+  formData.append('dry_run', String(Boolean(options.dryRun)));
+  return api.post(`/datasets/${id}/delta/`, formData, {
     headers: { 'Content-Type': 'multipart/form-data' },
   });
 };
 
+export const getJobStatus = async (jobId: number) => {
+  return api.get(`/jobs/${jobId}/`);
+};
+
+// Uploads and deletions run as background jobs; poll the job until it
+// finishes, giving up after `timeoutMs` (the job itself keeps running).
+export const waitForJob = async (
+  jobId: number,
+  onProgress?: (job: any) => void,
+  timeoutMs: number = 30 * 60 * 1000
+) => {
+  const deadline = Date.now() + timeoutMs;
+  while (true) {
+    const res = await getJobStatus(jobId);
+    const job = res.data;
+    if (job.stage === 'done') return job;
+    if (job.stage === 'failed') throw new Error(job.error || 'Job failed');
+    if (Date.now() >= deadline) {
+      throw new Error('Still running after a long wait; refresh the page later to see the result');
+    }
+    if (onProgress) onProgress(job);
+    await new Promise((resolve) => setTimeout(resolve, 1500));
+  }
+};
+
 export const getDatasets = async () => {
   return api.get('/datasets/');
 }
@@ -34,4 +78,17 @@ export const deleteStudents = async () => {
   return api.delete('/delete-all/');
 }
 
+export const deleteDataset = async (id: number) => {
+  return api.delete(`/datasets/${id}/`);
+}
+
+// Hall seating maps (block, floor, occupancy and seat grid) of the active dataset
+export const getHalls = async (params?: { exam_date?: string; session?: string }) => {
+  return api.get('/halls/', { params });
+}
+
+export const getHallSeating = async (hallNo: string, params?: { exam_date?: string; session?: string }) => {
+  return api.get(`/halls/${encodeURIComponent(hallNo)}/`, { params });
+}
+
 export default api;